@@ -0,0 +1,225 @@
+# Benchmark suite for the simulator hot paths
+# Results are written to JSON, and a compare mode flags regressions against a stored baseline:
+#
+#   python benchmarks/run_benchmarks.py --output results.json
+#   python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json --threshold 0.25
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import numpy as np
+
+from hardware_sim.fft_block import FftBlock
+from hardware_sim.buffer import Buffer
+from hardware_sim.register_map import FFtRegisterMap
+from general.helper_functions import create_fft_config, generate_single_tone, get_fft_size
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# A benchmark is slower than its baseline when it takes more than (1 + threshold) times as long:
+DEFAULT_THRESHOLD = 0.25
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Startup benchmarks: code timed in a fresh interpreter (so the modules are really imported), {model} is a model path
+STARTUP_SNIPPETS = {
+    "startup.import[hardware_sim.fft_block]": "import hardware_sim.fft_block",
+    "startup.import[hardware_sim.classifier_block]": "import hardware_sim.classifier_block",
+    "startup.import[hardware_sim.multi_lane_runner]": "import hardware_sim.multi_lane_runner",
+    "startup.import[interface.cli_controller]": "import interface.cli_controller",
+    "startup.classifier_block_init": "from hardware_sim.classifier_block import ClassifierBlock\nClassifierBlock({model!r})",
+}
+
+def time_call(func, repeat=5, min_time=0.02):
+    """
+    Time a function call, returning the median seconds per call over `repeat` rounds.
+    Every round runs the function enough times to take at least min_time seconds.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number)
+    return float(np.median(rounds))
+
+def time_startup(code, repeat=3):
+    """
+    Time a code snippet in a fresh interpreter (imports included, interpreter start excluded),
+    returning the median seconds over `repeat` interpreters.
+    """
+    script = f"import sys, time\nsys.path.insert(0, {ROOT!r})\nstart = time.perf_counter()\n{code}\nprint(time.perf_counter() - start)"
+    rounds = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+        rounds.append(float(output.split()[-1]))
+    return float(np.median(rounds))
+
+def bench_fft_block():
+    results = {}
+    for size_code in range(12):
+        fft_size = get_fft_size(size_code)
+        signal = generate_single_tone(frequency_bin=1, fft_size=fft_size)
+        for normalization in (0, 1):
+            for phase in (0, 512):
+                fft_block = FftBlock()
+                fft_block.configure(create_fft_config(size_code, 0, normalization, phase, 0))
+                fft_block.load_input(signal)
+                name = f"fft_block.run[size={fft_size},norm={normalization},phase={phase}]"
+                results[name] = {"seconds": time_call(fft_block.run), "unit": "call"}
+    return results
+
+def bench_register_dispatch():
+    reg_map = FFtRegisterMap()
+    fft_block = FftBlock()
+    reg_map.bind_module_to_register(fft_block, "WINDOW_HOP")
+    return {
+        "register_map.write_register[unbound]": {"seconds": time_call(lambda: reg_map.write_register("FFT_DATA_IN", 1234)), "unit": "call"},
+        "register_map.write_register[handler]": {"seconds": time_call(lambda: reg_map.write_register("WINDOW_HOP", 16)), "unit": "call"},
+        "register_map.read_register": {"seconds": time_call(lambda: reg_map.read_register("FFT_CONFIG")), "unit": "call"},
+        "register_map.write_address[handler]": {"seconds": time_call(lambda: reg_map.write_address(0x11, 16)), "unit": "call"},
+        "register_map.read_address": {"seconds": time_call(lambda: reg_map.read_address(0x0A)), "unit": "call"},
+    }
+
+def bench_buffer():
+    samples = generate_single_tone(frequency_bin=1, fft_size=4096)
+    buffer = Buffer(4096, 4096)
+    ring = Buffer(8192, ring=True)
+    def ring_cycle():
+        ring.append(samples)
+        ring.consume(4096)
+    return {
+        "buffer.writeBuffer[4096]": {"seconds": time_call(lambda: buffer.writeBuffer(samples)), "unit": "call"},
+        "buffer.getBuffer": {"seconds": time_call(buffer.getBuffer), "unit": "call"},
+        "buffer.ring_append_consume[4096]": {"seconds": time_call(ring_cycle), "unit": "call"},
+    }
+
+def find_models():
+    """
+    Find the trained models to benchmark (trains a small one when none is available).
+    """
+    from hardware_sim.model_registry import DEFAULT_MODEL_PATHS
+    candidates = {"trained_rf_classifier": "ml_module/trained_rf_classifier.joblib"}
+    candidates.update({f"slot{slot}": path for slot, path in DEFAULT_MODEL_PATHS.items()})
+    models = {name: os.path.join(ROOT, path) for name, path in candidates.items() if os.path.isfile(os.path.join(ROOT, path))}
+    if not models:
+        import joblib
+        from sklearn.ensemble import RandomForestClassifier
+        from ml_module.dataset_generator import generate_dataset_batched
+        X, y = generate_dataset_batched(3000, 64, seed=0)
+        path = os.path.join(tempfile.mkdtemp(), "benchmark_rf.joblib")
+        joblib.dump(RandomForestClassifier(n_estimators=100, random_state=42).fit(X, y), path)
+        models["benchmark_rf"] = path
+    return models
+
+def bench_classifier():
+    from hardware_sim.classifier_block import ClassifierBlock
+    from hardware_sim.model_registry import get_feature_size
+    from model.rf_classifier import ArrayForest
+    results = {}
+    for name, path in find_models().items():
+        classifier = ClassifierBlock(path)
+        num_features = get_feature_size(classifier.model) or 64
+        features = np.abs(np.fft.fft(generate_single_tone(frequency_bin=3, fft_size=num_features)))
+        results[f"classifier_block.classify[{name}]"] = {"seconds": time_call(lambda: classifier.classify(features), repeat=3), "unit": "call"}
+        # Same forest on the array-backed engine
+        classifier.model = ArrayForest.from_sklearn(classifier.model)
+        results[f"classifier_block.classify[{name},array]"] = {"seconds": time_call(lambda: classifier.classify(features), repeat=3), "unit": "call"}
+    return results
+
+def bench_dataset():
+    from ml_module.dataset_generator import generate_dataset, generate_dataset_batched
+    num_samples = 2000
+    return {
+        "generate_dataset[2000x64]": {"seconds": time_call(lambda: generate_dataset(num_samples, 64), repeat=3) / num_samples, "unit": "sample"},
+        "generate_dataset_batched[2000x64]": {"seconds": time_call(lambda: generate_dataset_batched(num_samples, 64, seed=0), repeat=3) / num_samples, "unit": "sample"},
+    }
+
+def bench_startup():
+    model = next(iter(find_models().values()))
+    return {name: {"seconds": time_startup(code.format(model=model)), "unit": "process"} for name, code in STARTUP_SNIPPETS.items()}
+
+BENCHMARKS = {
+    "fft": bench_fft_block,
+    "registers": bench_register_dispatch,
+    "buffer": bench_buffer,
+    "classifier": bench_classifier,
+    "dataset": bench_dataset,
+    "startup": bench_startup,
+}
+
+def run_benchmarks(groups=None):
+    """
+    Run the benchmark groups (all by default) and return the results document.
+    """
+    groups = list(BENCHMARKS.keys()) if groups is None else groups
+    results = {}
+    for group in groups:
+        if group not in BENCHMARKS:
+            raise ValueError(f"Unknown benchmark group {group}. Valid options are: {list(BENCHMARKS.keys())}")
+        results.update(BENCHMARKS[group]())
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare two results documents, returning the regressions as (name, baseline seconds, current seconds, ratio).
+    Benchmarks missing from either side are skipped.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None or reference["seconds"] <= 0:
+            continue
+        ratio = result["seconds"] / reference["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append((name, reference["seconds"], result["seconds"], ratio))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the simulator hot paths")
+    parser.add_argument("--output", help="Write the results JSON to this file")
+    parser.add_argument("--groups", nargs="+", choices=list(BENCHMARKS.keys()), help="Benchmark groups to run (default: all)")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="Compare against a baseline JSON (default: the stored baseline)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown ratio before flagging a regression")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.groups)
+    for name, result in current["results"].items():
+        print(f"{name:60s} {result['seconds'] * 1e6:12.3f} us/{result['unit']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(current, baseline, args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: {before * 1e6:.3f} us -> {after * 1e6:.3f} us ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 # This is the library for the helper functions in the signal to interfirence repository:
 #  
 
+import zipfile
 import numpy as np
 
 def get_fft_size_code(fft_size):
@@ -41,7 +42,7 @@ def get_fft_size(fft_size_code):
     fft_size_lookup = {0:2, 1:4, 2:8, 3:16, 4:32, 5:64, 6:128, 7:256, 8:512, 9:1024, 10:2048, 11:4096}
     return fft_size_lookup.get(fft_size_code, None) # Returns None if code is invalid
 
-def create_fft_config(fft_size_code, zero_padding, normalization, phase_correction, phase_sign):
+def create_fft_config(fft_size_code, zero_padding, normalization, phase_correction, phase_sign, batch_mode=0, single_precision=0):
     """
     Helper to create a 32-bit config word for the FFT block.
     """
@@ -51,6 +52,8 @@ def create_fft_config(fft_size_code, zero_padding, normalization, phase_correcti
     config |= (phase_correction & 0x7FF) << 6 # 11 bits for phase correction value
     config |= (phase_sign & 0x1) << 17        # 1 bit for phase sign
     config |= (normalization & 0x1) << 18     # 1 bit for normalization enable
+    config |= (batch_mode & 0x1) << 19        # 1 bit for batch (multi-frame) mode
+    config |= (single_precision & 0x1) << 20  # 1 bit for the single precision (complex64) data path
     return config
 
 
@@ -92,3 +95,35 @@ def generate_noise(fft_size):
     noise_imag = np.random.randn(fft_size)
     noise = (noise_real + 1j * noise_imag) / np.sqrt(2)  # Normalize for unit average power
     return noise
+
+def load_npz_mmap(path, names):
+    """
+    Memory map arrays stored (uncompressed) in an .npz file, without reading them.
+    Compressed members are read into memory instead.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for name in names:
+            info = archive.getinfo(name + ".npy")
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member, allow_pickle=False)
+                continue
+            # Local file header: 30 fixed bytes, then the file name and the extra field
+            f.seek(info.header_offset + 26)
+            nameLength, extraLength = np.frombuffer(f.read(4), dtype="<u2")
+            f.seek(info.header_offset + 30 + int(nameLength) + int(extraLength))
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortranOrder, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortranOrder, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject:
+                raise ValueError(f"Array {name} holds Python objects")
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+                continue
+            data = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape, order="F" if fortranOrder else "C")
+            # A plain ndarray view of the mapping skips the memmap subclass overhead on every indexing
+            arrays[name] = data.view(np.ndarray)
+    return arrays
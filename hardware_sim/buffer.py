@@ -2,45 +2,210 @@
 # It is a simulation of a hardware buffer
 import numpy as np
 
+# Sample formats a buffer can store:
+#   complex (complex128), np.complex64 : complex samples
+#   IQ16                               : packed int16 I/Q pairs (shape (..., 2)), decoded to complex64 with a scale
+IQ16 = "iq16"
+# int16 full scale maps to 1.0:
+IQ16_SCALE = 1.0 / 32768
+
 class Buffer:
-    def __init__(self, max_size=None, bufferFullSize=None):
+    def __init__(self, max_size=None, bufferFullSize=None, ring=False, dtype=complex, scale=IQ16_SCALE):
         self.buffer = None
         self.max_size = max_size
         self.bufferFullSize = bufferFullSize if bufferFullSize is not None else max_size
         if self.max_size is not None and self.bufferFullSize is not None:
             if self.max_size < self.bufferFullSize:
                 raise ValueError("Buffer max size cannot exceed buffer full size")
+        # Sample format (the conversions in and out of the buffer are explicit, see encode/decode)
+        self.packed = isinstance(dtype, str) and dtype == IQ16
+        if not self.packed and np.dtype(dtype) not in (np.dtype(np.complex64), np.dtype(np.complex128)):
+            raise ValueError("Buffer dtype must be complex64, complex128 or iq16")
+        self.dtype = np.dtype(np.int16) if self.packed else np.dtype(dtype)
+        self.scale = scale
+        # Ring (circular) mode: fixed preallocated storage with head/tail indices
+        self.ring = ring
+        self.head = 0  # index of the oldest sample
+        self.tail = 0  # index where the next sample is written
+        self.count = 0 # fill level in samples
+        if self.ring:
+            if self.max_size is None:
+                raise ValueError("Ring buffer requires a max size")
+            self.buffer = np.zeros((self.max_size, 2) if self.packed else self.max_size, dtype=self.dtype)
 
     def writeBuffer(self, data):
         if isinstance(data, list) or isinstance(data, np.ndarray):
-            if self.max_size and len(data) > self.max_size:
+            # Sizes are counted in samples, so a 2-D batch of frames is checked as a whole:
+            if self.max_size and self.numSamples(data) > self.max_size:
                 raise ValueError(f"Data exceeds buffer max size {self.max_size}")
-            self.buffer = np.array(data, dtype=complex)
+            if self.ring:
+                # A ring buffer is a sample stream: a 2-D batch of frames (FFT batch/STFT output) would lose its frame boundaries
+                packedInput = self.packed and np.asarray(data).dtype == np.int16
+                if np.ndim(data) > (2 if packedInput else 1):
+                    raise ValueError("Ring buffers only hold a sample stream, batches of frames need a linear buffer")
+                # Same semantics as the linear buffer: the new data replaces the content
+                self.clear()
+                self.append(data)
+                return
+            # The buffer keeps its own copy in its sample format
+            self.buffer = self.encode(data, copy=True)
         else:
             raise TypeError("Buffer data must be a list or numpy array")
 
+    def encode(self, data, copy=False):
+        """
+        Convert samples to the buffer's storage format.
+        Packed int16 I/Q input (shape (..., 2)) is stored as is, complex input is quantized with the scale.
+        """
+        if self.packed:
+            data = np.asarray(data)
+            if data.dtype == np.int16 and data.ndim >= 2 and data.shape[-1] == 2:
+                return np.array(data, copy=True) if copy else data
+            packed = np.empty(np.shape(data) + (2,), dtype=np.int16)
+            packed[..., 0] = np.clip(np.round(np.real(data) / self.scale), -32768, 32767)
+            packed[..., 1] = np.clip(np.round(np.imag(data) / self.scale), -32768, 32767)
+            return packed
+        if copy:
+            return np.array(data, dtype=self.dtype)
+        return np.asarray(data, dtype=self.dtype)
+
+    def decode(self, raw):
+        """
+        Convert stored samples to complex samples (complex64 for packed int16 I/Q).
+        """
+        if not self.packed:
+            return raw
+        samples = np.empty(raw.shape[:-1], dtype=np.complex64)
+        samples.real = raw[..., 0]
+        samples.imag = raw[..., 1]
+        samples *= np.float32(self.scale)
+        return samples
+
+    def numSamples(self, data):
+        """
+        Number of samples in data (a packed int16 I/Q pair counts as one sample).
+        """
+        if self.packed and isinstance(data, np.ndarray) and data.dtype == np.int16 and data.ndim >= 2 and data.shape[-1] == 2:
+            return data.size // 2
+        return np.size(data)
+
+    def getSampleDtype(self):
+        """
+        Get the dtype of the samples the buffer hands out (getBuffer / read / consume).
+        """
+        return np.dtype(np.complex64) if self.packed else self.dtype
+
+    def append(self, data):
+        """
+        Append samples at the tail of a ring buffer.
+        """
+        if not self.ring:
+            raise ValueError("append is only supported in ring mode")
+        if not (isinstance(data, list) or isinstance(data, np.ndarray)):
+            raise TypeError("Buffer data must be a list or numpy array")
+        # a ring buffer is a sample stream, frames are flattened
+        data = self.encode(data)
+        data = data.reshape(-1, 2) if self.packed else np.ravel(data)
+        numSamples = len(data)
+        if numSamples > self.max_size - self.count:
+            raise ValueError(f"Buffer overflow: {numSamples} samples written with {self.max_size - self.count} free")
+        # Copy in at most two pieces (before and after the wrap point):
+        first = min(numSamples, self.max_size - self.tail)
+        self.buffer[self.tail:self.tail + first] = data[:first]
+        self.buffer[:numSamples - first] = data[first:]
+        self.tail = (self.tail + numSamples) % self.max_size
+        self.count += numSamples
+
+    def getSegments(self, numSamples=None):
+        """
+        Get the oldest samples of a ring buffer as one or two zero-copy views (two when they wrap).
+        The views are in the storage format (int16 I/Q pairs for a packed buffer).
+        """
+        if not self.ring:
+            raise ValueError("getSegments is only supported in ring mode")
+        if numSamples is None:
+            numSamples = self.count
+        if numSamples > self.count:
+            raise ValueError(f"Buffer underflow: {numSamples} samples requested with {self.count} stored")
+        first = min(numSamples, self.max_size - self.head)
+        if first == numSamples:
+            return (self.buffer[self.head:self.head + numSamples],)
+        return (self.buffer[self.head:], self.buffer[:numSamples - first])
+
+    def read(self, numSamples=None):
+        """
+        Read the oldest samples of a ring buffer without consuming them.
+        This is a view when the samples are contiguous and a copy only when they wrap around (or need decoding).
+        """
+        segments = self.getSegments(numSamples)
+        if len(segments) == 1:
+            return self.decode(segments[0])
+        return self.decode(np.concatenate(segments))
+
+    def consume(self, numSamples):
+        """
+        Read and remove the oldest samples of a ring buffer.
+        A returned view stays valid until the next append.
+        """
+        data = self.read(numSamples)
+        self.discard(numSamples)
+        return data
+
+    def discard(self, numSamples):
+        """
+        Remove the oldest samples of a ring buffer without reading them.
+        """
+        if numSamples > self.count:
+            raise ValueError(f"Buffer underflow: {numSamples} samples requested with {self.count} stored")
+        self.head = (self.head + numSamples) % self.max_size
+        self.count -= numSamples
+
     def getBuffer(self):
+        if self.ring:
+            return self.read()
+        if self.buffer is None:
+            return None
+        return self.decode(self.buffer)
+
+    def getRaw(self):
+        """
+        Get the stored samples in the storage format, without decoding.
+        """
+        if self.ring:
+            segments = self.getSegments()
+            return segments[0] if len(segments) == 1 else np.concatenate(segments)
         return self.buffer
 
     def clear(self):
-        self.buffer = None
+        if self.ring:
+            self.head = 0
+            self.tail = 0
+            self.count = 0
+        else:
+            self.buffer = None
 
     def isFull(self):
+        if self.ring:
+            return self.count >= self.bufferFullSize
         if self.buffer is not None:
-            return len(self.buffer) >= self.bufferFullSize
+            return self.numSamples(self.buffer) >= self.bufferFullSize
         else:
             return False
-    
+
     def isEmpty(self):
+        if self.ring:
+            return self.count == 0
         if self.buffer is not None:
-            return len(self.buffer) == 0
+            return self.numSamples(self.buffer) == 0
         else:
             return True
 
     def __len__(self):
+        if self.ring:
+            return self.count
         if self.buffer is not None:
-            return len(self.buffer)
+            return self.numSamples(self.buffer)
         else:
             return 0
 
-    
\ No newline at end of file
+
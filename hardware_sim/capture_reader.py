@@ -0,0 +1,131 @@
+# This is the I/Q capture reader (the "I/Q Signal Input" of the pipeline):
+# It memory maps a capture file and streams it frame by frame, so multi-GB recordings never have to fit in RAM.
+# Supported formats:
+#   npy     : .npy file of complex samples (1-D) or of interleaved I/Q pairs (shape (n, 2))
+#   int16   : raw interleaved int16 I/Q (I0, Q0, I1, Q1, ...), scaled to +-1.0
+#   float32 : raw interleaved float32 I/Q
+import os
+import numpy as np
+from hardware_sim.buffer import Buffer
+
+CAPTURE_FORMATS = ("npy", "int16", "float32")
+# Format used when none is given, by file extension (common SDR naming):
+CAPTURE_EXTENSIONS = {".npy": "npy", ".cs16": "int16", ".iq16": "int16", ".cf32": "float32", ".fc32": "float32"}
+# int16 full scale maps to 1.0:
+INT16_SCALE = 1.0 / 32768
+
+class CaptureReader:
+    def __init__(self, path, frame_size, fmt=None, start_offset=0, frame_count=None, loop=False, scale=None, dtype=complex):
+        """
+        Open a capture for streaming frames of frame_size samples, starting at sample start_offset.
+        frame_count limits the number of frames (None: until the end), loop wraps around to start_offset at the end.
+        Frames are returned as dtype (complex128 by default, complex64 for a single precision pipeline).
+        """
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Capture file not found: {path}")
+        if fmt is None:
+            fmt = CAPTURE_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+            if fmt is None:
+                raise ValueError(f"Capture format must be given for this file. Known extensions are: {list(CAPTURE_EXTENSIONS.keys())}")
+        if fmt not in CAPTURE_FORMATS:
+            raise ValueError(f"Invalid capture format {fmt}. Valid options are: {list(CAPTURE_FORMATS)}")
+        if frame_size <= 0:
+            raise ValueError("Frame size must be positive")
+        if np.dtype(dtype) not in (np.dtype(np.complex64), np.dtype(np.complex128)):
+            raise ValueError("Capture frames must be complex64 or complex128")
+        self.dtype = np.dtype(dtype)
+        self.path = path
+        self.fmt = fmt
+        self.frame_size = frame_size
+        self.start_offset = start_offset
+        self.frame_count = frame_count
+        self.loop = loop
+
+        # Memory map the samples (nothing is read until a frame is requested)
+        if fmt == "npy":
+            data = np.load(path, mmap_mode="r")
+            if data.ndim == 2 and data.shape[1] == 2:
+                self.interleaved = True
+            elif data.ndim == 1 and np.iscomplexobj(data):
+                self.interleaved = False
+            else:
+                raise ValueError("npy captures must be 1-D complex or (n, 2) I/Q pairs")
+            self.scale = 1.0 if scale is None else scale
+        else:
+            data = np.memmap(path, dtype=np.int16 if fmt == "int16" else np.float32, mode="r")
+            if len(data) % 2:
+                raise ValueError("Raw I/Q captures must hold an even number of values")
+            data = data.reshape(-1, 2)
+            self.interleaved = True
+            self.scale = (INT16_SCALE if fmt == "int16" else 1.0) if scale is None else scale
+        self.data = data
+        self.num_samples = len(data)
+        if start_offset < 0 or start_offset >= self.num_samples:
+            raise ValueError(f"Start offset {start_offset} is outside the capture ({self.num_samples} samples)")
+        # Only full frames are streamed
+        self.frames_available = (self.num_samples - start_offset) // frame_size
+        if self.frames_available == 0:
+            raise ValueError(f"Capture is shorter than a single frame of {frame_size} samples")
+
+    def read_frame(self, index):
+        """
+        Read frame `index` (counted from the start offset) as complex samples.
+        Only this frame is read from disk.
+        """
+        if index < 0 or index >= self.frames_available:
+            raise IndexError(f"Frame {index} is outside the capture ({self.frames_available} frames)")
+        start = self.start_offset + index * self.frame_size
+        samples = self.data[start:start + self.frame_size]
+        if self.interleaved:
+            frame = np.empty(self.frame_size, dtype=self.dtype)
+            frame.real = samples[:, 0]
+            frame.imag = samples[:, 1]
+        else:
+            frame = np.array(samples, dtype=self.dtype)
+        if self.scale != 1.0:
+            frame *= frame.real.dtype.type(self.scale)
+        return frame
+
+    def frames(self):
+        """
+        Stream the frames (a generator, one frame in memory at a time).
+        """
+        produced = 0
+        index = 0
+        while self.frame_count is None or produced < self.frame_count:
+            if index == self.frames_available:
+                if not self.loop:
+                    return
+                index = 0
+            yield self.read_frame(index)
+            index += 1
+            produced += 1
+
+    def __iter__(self):
+        return self.frames()
+
+    def __len__(self):
+        """
+        Number of frames the reader streams (the loop keeps going until frame_count).
+        """
+        if self.frame_count is None:
+            if self.loop:
+                raise TypeError("A looping capture without a frame count has no length")
+            return self.frames_available
+        if self.loop:
+            return self.frame_count
+        return min(self.frame_count, self.frames_available)
+
+    def feed(self, buffer, frame):
+        """
+        Write a frame to a buffer (appended for a ring buffer, replacing the content otherwise).
+        """
+        if not isinstance(buffer, Buffer):
+            raise ValueError("Capture frames must be fed to a Buffer object")
+        if buffer.ring:
+            buffer.append(frame)
+        else:
+            buffer.writeBuffer(frame)
+
+    def __repr__(self):
+        return f"CaptureReader(path={self.path}, fmt={self.fmt}, frame_size={self.frame_size}, frames={self.frames_available}, loop={self.loop}, dtype={self.dtype})"
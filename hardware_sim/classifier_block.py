@@ -1,28 +1,72 @@
-import os
-import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-import joblib
+import math
+import threading
+import time
+from collections import deque
 import numpy as np
-from hardware_sim.register_map import ClassifierRegMap
-from hardware_sim.buffer import Buffer
+from hardware_sim.model_registry import ModelRegistry, get_feature_size
+from hardware_sim import profiler
+
+# Depth of the per-frame result FIFO (the oldest results are dropped when it overflows):
+RESULT_FIFO_DEPTH = 4096
+# Performance counter registers are 32 bits wide:
+PERF_COUNTER_WRAP = 2 ** 32
 
 class ClassifierBlock:
-    def __init__(self, model_path="ml_module/trained_rf_classifier.joblib"):
+    def __init__(self, model_path="ml_module/trained_rf_classifier.joblib", batch_timeout=0.01, registry=None, model=None):
         self.model_path = model_path
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Model file not found: {model_path}")
-        if not model_path.endswith('.joblib'):
-            raise ValueError("Model file must be a .joblib file")
-        if not os.path.isfile(model_path):
-            raise ValueError("Model path must be a file")
-        if not os.access(model_path, os.R_OK):
-            raise PermissionError(f"Model file is not readable: {model_path}")
-        # Load the trained model
-        self.model = joblib.load(model_path)
+        # The registry holds the models of the CLASSIFY_MODEL_SELECT slots (shared between blocks if passed in)
+        self.registry = registry if registry is not None else ModelRegistry()
+        # The trained model is loaded at its first use, not here (an already loaded model can be shared between blocks instead)
+        self._model = model
+        if model is None:
+            self.registry.validate_path(model_path) # a bad path still fails at construction
+        self.model_slot = None
+        self.fft_block = None
+        self.feature_extractor = None # without one the classifier is fed with the magnitude spectrum
         self.input_buffer = None
         self.output_registers = {}
-        self.latency_cycles = 0
+        self.latency_cycles = 0 # processing latency of a trigger in cycles (used with an event kernel)
+        self.kernel = None
+        self.busy = False
+        self.done_callbacks = []
         self.triggered = False
+        # Micro-batching: frames are collected and classified with a single predict call
+        self.batch_size = 1               # CLASSIFY_BATCH_SIZE register, 0 or 1 classify every frame on its own
+        self.batch_timeout = batch_timeout # latency deadline (seconds) for the oldest pending frame
+        self.pending_features = []
+        self.pending_frames = []
+        self.pending_since = None
+        self.deadline_timer = None # flushes a partial batch at its deadline (kernel event, or a timer thread without a kernel)
+        self.pending_lock = threading.RLock() # the timer thread flushes concurrently with submit
+        self.batches_flushed = 0
+        self.frame_index = 0
+        self.result_fifo = deque(maxlen=RESULT_FIFO_DEPTH) # (frame index, label) for every classified frame
+        self.result_sink = None # optional columnar log of every result (see result_sink.py)
+        # Performance counters (updated while profiling is enabled)
+        self.perf_frames = 0
+        self.perf_last_ns = 0
+
+    @property
+    def model(self):
+        """
+        The classifier model, loaded from model_path on first access.
+        """
+        if self._model is None:
+            self._model = self.registry.load_path(self.model_path)
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+
+    def is_model_loaded(self):
+        return self._model is not None
+
+    def load_model(self):
+        """
+        Load the model now (e.g. before a timing critical run), instead of at the first prediction.
+        """
+        return self.model
 
     def bind_input(self, buffer):
         """
@@ -30,6 +74,28 @@ class ClassifierBlock:
         """
         self.input_buffer = buffer
 
+    def bind_fft_block(self, fft_block):
+        """
+        Bind the FFT block feeding the classifier, so model selections are checked against its FFT size.
+        """
+        self.fft_block = fft_block
+
+    def bind_feature_extractor(self, feature_extractor):
+        """
+        Bind the feature extractor block computing the classifier features from the FFT output.
+        """
+        self.feature_extractor = feature_extractor
+
+    def get_feature_size(self):
+        """
+        Get the feature vector length the classifier is fed with (None if unknown).
+        """
+        if self.fft_block is None or not self.fft_block.getFFTSize():
+            return None
+        if self.feature_extractor is not None:
+            return self.feature_extractor.get_feature_size(self.fft_block.getFFTSize())
+        return self.fft_block.getFFTSize()
+
     def bind_registers(self, classify_trigger_reg, classify_result_reg, classify_done_reg=None):
         """
         Bind the registers to the classifier block.
@@ -38,35 +104,83 @@ class ClassifierBlock:
         self.output_registers['result'] = classify_result_reg
         self.output_registers['done'] = classify_done_reg
 
+    def bind_perf_registers(self, classify_perf_frames_reg, classify_perf_last_ns_reg=None):
+        """
+        Bind the performance counter registers (frames classified and last predict time in ns, while profiling is enabled).
+        """
+        self.output_registers['perf_frames'] = classify_perf_frames_reg
+        self.output_registers['perf_last_ns'] = classify_perf_last_ns_reg
+
+    def bind_result_sink(self, result_sink):
+        """
+        Bind a result sink logging every classified frame (with the class probabilities if the sink keeps them).
+        """
+        self.result_sink = result_sink
+
+    def bind_kernel(self, kernel):
+        """
+        Bind an event kernel: a trigger then completes (result, CLASSIFY_DONE) latency_cycles later in simulated time.
+        """
+        self.kernel = kernel
+
+    def on_done(self, callback):
+        """
+        Register a callback(classifier_block) called when a trigger completes.
+        """
+        self.done_callbacks.append(callback)
+
     def handle_CLASSIFY_TRIGGER(self, value):
+        if value == 1 and self.kernel is not None:
+            if self.busy:
+                raise ValueError("Classifier block is busy")
+            self.busy = True
+            if self.output_registers.get('done'):
+                self.output_registers['done'].write(0) #this is direct access to register so it bypasses read only condition
+            self.kernel.schedule(self.latency_cycles, self.finish)
+            return
         if value == 1:
             self.triggered = True
             self.run()
+            for callback in self.done_callbacks:
+                callback(self)
         self.triggered = False
-    
-    def handle_CLASSIFY_MODEL_SELECT(self, value):
-        model_paths = {
-            0: "ml_module/model_rf_classifier.joblib",
-            1: "ml_module/model_rf_snr_augmented.joblib",
-            2: "ml_module/model_rf_fft128.joblib",
-            3: "ml_module/model_rf_fft512.joblib"
-        }
-        selected_path = model_paths.get(value)
-        if selected_path:
-            if not os.path.exists(selected_path):
-                raise FileNotFoundError(f"Model file not found: {selected_path}")
-            if not os.path.isfile(selected_path):
-                raise ValueError("Model path must be a file")
-            if not os.access(selected_path, os.R_OK):
-                raise PermissionError(f"Model file is not readable: {selected_path}")
-            self.model = joblib.load(selected_path)
-            if self.output_registers.get('done'):
-                self.output_registers['done'].write(0)
-        else:
-            raise ValueError(f"Invalid model selection {value}. Valid options are: {list(model_paths.keys())}")
-
 
+    def finish(self):
+        """
+        Completion event of a trigger (event kernel mode), the input buffer is read at this time.
+        """
+        self.triggered = True
+        try:
+            self.run()
+        finally:
+            self.triggered = False
+            self.busy = False
+        for callback in self.done_callbacks:
+            callback(self)
+    
+    def handle_CLASSIFY_BATCH_SIZE(self, value):
+        """
+        Handle the batch size register, frames already pending are flushed first.
+        """
+        self.flush()
+        self.batch_size = value
 
+    def handle_CLASSIFY_MODEL_SELECT(self, value):
+        """
+        Handle the model select register, switching to a (cached) model from the registry.
+        """
+        model = self.registry.get(value)
+        # Check the model against the current FFT size now, not at the first predict
+        modelFeatures = get_feature_size(model)
+        feature_size = self.get_feature_size()
+        if modelFeatures is not None and feature_size is not None and modelFeatures != feature_size:
+            raise ValueError(f"Model {value} expects {modelFeatures} features, but the classifier is fed with {feature_size}")
+        self.flush() # pending frames are classified by the model they were submitted to
+        self.model = model
+        self.model_slot = value
+        self.model_path = self.registry.model_paths[value]
+        if self.output_registers.get('done'):
+            self.output_registers['done'].write(0)
 
     def run(self):
         if self.triggered and self.input_buffer is not None:
@@ -76,20 +190,172 @@ class ClassifierBlock:
                 print("ClassifierBlock: Input buffer is empty.")
                 return
 
-            features = np.abs(fft_result).reshape(1, -1)
-            label = self.model.predict(features)[0]
+            # One feature vector per frame (a batch of frames is 2-D)
+            prof = profiler.active
+            if prof is not None:
+                start = profiler.now_ns()
+            features = self.extract_features(fft_result)
+            if prof is not None:
+                prof.record("classifier.features", start, profiler.now_ns(), "classifier")
+            if self.batch_size > 1:
+                self.submit(features)
+            else:
+                self.classify(features)
+
+            self.triggered = False
 
-            # Write to the registers if initiated using the register's object write command:
-            if self.output_registers.get('result'):
-                self.output_registers['result'].write(label) # this is direct access to register so it bypasses read only condition
+    def extract_features(self, fft_result):
+        """
+        Compute the classifier features of an FFT frame (or a 2-D batch): the feature extractor's
+        features when one is bound, the magnitude spectrum otherwise.
+        """
+        if self.feature_extractor is not None:
+            return self.feature_extractor.extract(fft_result)
+        return np.abs(fft_result)
+
+    def classify(self, features):
+        """
+        Classify a feature vector (or a 2-D batch, one vector per row) and update the result registers.
+        """
+        features = np.asarray(features)
+        batch = features.ndim == 2
+        features = features if batch else features.reshape(1, -1)
+        frames = range(self.frame_index, self.frame_index + len(features))
+        self.frame_index += len(features)
+        labels = self.predict(features, frames)
+        return labels if batch else labels[0]
+
+    def submit(self, features):
+        """
+        Queue a feature vector (or a 2-D batch) for micro-batched classification.
+        The batch is classified once it reaches the batch size or its oldest frame reaches the latency deadline.
+        """
+        features = np.asarray(features)
+        rows = features if features.ndim == 2 else features.reshape(1, -1)
+        with self.pending_lock:
+            first = not self.pending_features
+            if first:
+                self.pending_since = self.get_timestamp()
+            self.pending_features.extend(rows)
+            self.pending_frames.extend(range(self.frame_index, self.frame_index + len(rows)))
+            self.frame_index += len(rows)
             if self.output_registers.get('done'):
-                self.output_registers['done'].write(1) #this is direct access to register so it bypasses read only condition
+                self.output_registers['done'].write(0) #this is direct access to register so it bypasses read only condition
+            if len(self.pending_features) >= self.batch_size or self.deadline_expired():
+                self.flush()
+            elif first:
+                self.schedule_deadline()
 
-            self.triggered = False
+    def schedule_deadline(self):
+        """
+        Schedule the flush of the pending batch at its deadline, so it is classified even if no other frame arrives:
+        a kernel event batch_timeout later in simulated time, or a timer thread without a kernel.
+        """
+        if self.kernel is not None:
+            self.deadline_timer = self.kernel.schedule(math.ceil(self.batch_timeout * self.kernel.clock_hz), self.flush_batch, self.batches_flushed)
+        else:
+            self.deadline_timer = threading.Timer(self.batch_timeout, self.flush_batch, (self.batches_flushed,))
+            self.deadline_timer.daemon = True
+            self.deadline_timer.start()
+
+    def flush_batch(self, batch):
+        """
+        Deadline of a pending batch: flush it unless it was already flushed (a timer can fire while flush cancels it).
+        """
+        with self.pending_lock:
+            if batch == self.batches_flushed:
+                self.flush()
+
+    def flush(self):
+        """
+        Classify all the pending frames with a single predict call.
+        """
+        with self.pending_lock:
+            if self.deadline_timer is not None:
+                self.deadline_timer.cancel()
+                self.deadline_timer = None
+            if not self.pending_features:
+                return None
+            features = np.vstack(self.pending_features)
+            frames = self.pending_frames
+            self.pending_features = []
+            self.pending_frames = []
+            self.pending_since = None
+            self.batches_flushed += 1
+            return self.predict(features, frames)
+
+    def deadline_expired(self):
+        """
+        Check if the oldest pending frame has waited longer than the batch timeout (in simulated time with an event kernel).
+        """
+        if self.pending_since is None:
+            return False
+        return self.get_timestamp() - self.pending_since >= self.batch_timeout
+
+    def predict(self, features, frames):
+        """
+        Predict a 2-D batch of feature vectors and publish the per-frame results.
+        """
+        prof = profiler.active
+        if prof is not None:
+            start = profiler.now_ns()
+        sink = self.result_sink
+        probabilities = None
+        if sink is not None and sink.num_classes is not None:
+            # Same labels as predict, from the probabilities the sink logs
+            probabilities = self.model.predict_proba(features)
+            labels = self.model.classes_.take(np.argmax(probabilities, axis=1), axis=0)
+        else:
+            labels = self.model.predict(features)
+        if prof is not None:
+            self.record_profile(prof, start, profiler.now_ns(), len(labels))
+        self.result_fifo.extend(zip(frames, labels))
+        if sink is not None:
+            fft_config = self.fft_block.config if self.fft_block is not None else None
+            sink.append_batch(frames, labels, self.get_timestamp(), fft_config=fft_config or 0,
+                              model_id=self.model_slot if self.model_slot is not None else -1, probabilities=probabilities)
+
+        # Write to the registers if initiated using the register's object write command (last frame of the batch):
+        if self.output_registers.get('result'):
+            self.output_registers['result'].write(labels[-1]) # this is direct access to register so it bypasses read only condition
+        if self.output_registers.get('done'):
+            self.output_registers['done'].write(1) #this is direct access to register so it bypasses read only condition
+        return labels
+
+    def get_timestamp(self):
+        """
+        Timestamp of a result: simulated seconds with an event kernel, time.perf_counter() otherwise.
+        """
+        if self.kernel is not None:
+            return self.kernel.to_seconds(self.kernel.now)
+        return time.perf_counter()
+
+    def record_profile(self, prof, start, end, numFrames):
+        """
+        Record a predict span and update the performance registers.
+        """
+        prof.record("classifier.predict", start, end, "classifier", {"frames": numFrames})
+        self.perf_frames += numFrames
+        self.perf_last_ns = end - start
+        if self.output_registers.get('perf_frames'):
+            self.output_registers['perf_frames'].write(self.perf_frames % PERF_COUNTER_WRAP) # this is direct access to register so it bypasses read only condition
+        if self.output_registers.get('perf_last_ns'):
+            self.output_registers['perf_last_ns'].write(min(self.perf_last_ns, PERF_COUNTER_WRAP - 1)) # this is direct access to register so it bypasses read only condition
+
+    def read_results(self):
+        """
+        Pop all the (frame index, label) results from the result FIFO.
+        """
+        results = list(self.result_fifo)
+        self.result_fifo.clear()
+        return results
 
     def update(self):
         if self.triggered:
             self.run()
+        # Flush a partial batch once its latency deadline has passed (also done by the deadline timer)
+        if self.deadline_expired():
+            self.flush()
 
 
     def __str__(self):
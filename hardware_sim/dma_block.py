@@ -0,0 +1,177 @@
+# This is the DMA block:
+# It moves whole blocks of I/Q samples between host arrays and the Buffers bound to the hardware blocks,
+# so sample data does not have to go through the 4-byte FFT_DATA_IN / FFT_DATA_OUT registers.
+import math
+import numpy as np
+from hardware_sim.buffer import Buffer
+
+# Default DMA latency model (used with an event kernel): descriptor setup plus the burst itself
+DMA_SETUP_CYCLES = 16
+DMA_SAMPLES_PER_CYCLE = 1
+
+class DmaBlock:
+    def __init__(self):
+        self.endpoints = {} # endpoint id -> Buffer or host numpy array
+        self.src = 0
+        self.dst = 0
+        self.src_offset = 0
+        self.dst_offset = 0
+        self.length = 0
+        self.done = 0
+        self.done_register = None
+        self.transfers = 0
+        self.samples_moved = 0
+        # Event-driven timing (see bind_kernel), without a kernel a transfer runs synchronously
+        self.kernel = None
+        self.latency_cycles = None # None: default DMA latency model
+        self.busy = False
+        self.done_callbacks = []
+
+    def bind_endpoint(self, endpoint_id, endpoint):
+        """
+        Bind a Buffer or a 1-D host array to an endpoint id (the value written to DMA_SRC / DMA_DST).
+        """
+        if isinstance(endpoint, np.ndarray):
+            if endpoint.ndim != 1:
+                raise ValueError("Host arrays must be 1-D sample arrays")
+        elif not isinstance(endpoint, Buffer):
+            raise ValueError("DMA endpoint must be a Buffer object or a numpy array")
+        self.endpoints[endpoint_id] = endpoint
+
+    def bind_registers(self, dma_done_reg):
+        """
+        Bind the done register to the DMA block.
+        """
+        self.done_register = dma_done_reg
+
+    def handle_DMA_SRC(self, value):
+        self.src = value
+
+    def handle_DMA_DST(self, value):
+        self.dst = value
+
+    def handle_DMA_SRC_OFFSET(self, value):
+        self.src_offset = value
+
+    def handle_DMA_DST_OFFSET(self, value):
+        self.dst_offset = value
+
+    def handle_DMA_LENGTH(self, value):
+        self.length = value
+
+    def bind_kernel(self, kernel):
+        """
+        Bind an event kernel: a transfer then completes (data moved, DMA_DONE set) after its latency in simulated time.
+        """
+        self.kernel = kernel
+
+    def on_done(self, callback):
+        """
+        Register a callback(dma_block) called when a transfer completes.
+        """
+        self.done_callbacks.append(callback)
+
+    def get_latency_cycles(self):
+        """
+        Get the latency of the transfer described by the registers, in cycles.
+        """
+        if self.latency_cycles is not None:
+            return self.latency_cycles
+        return DMA_SETUP_CYCLES + math.ceil(self.length / DMA_SAMPLES_PER_CYCLE)
+
+    def handle_DMA_START(self, value):
+        """
+        Handle the DMA start register.
+        """
+        if value != 1:
+            return
+        if self.kernel is None:
+            self.run()
+            self.notify_done()
+            return
+        if self.busy:
+            raise ValueError("DMA block is busy")
+        self.busy = True
+        self.set_done(0)
+        self.kernel.schedule(self.get_latency_cycles(), self.finish)
+
+    def finish(self):
+        """
+        Completion event of a transfer (event kernel mode), the samples are moved at this time.
+        """
+        try:
+            self.run()
+        finally:
+            self.busy = False
+        self.notify_done()
+
+    def notify_done(self):
+        for callback in self.done_callbacks:
+            callback(self)
+
+    def update(self, name, value):
+        """
+        Update the DMA block with the given register name and value.
+        """
+        # Registers without a handle_<name> method have no side effect on the DMA block
+        pass
+
+    def run(self):
+        """
+        Run the transfer described by the DMA registers.
+        """
+        self.set_done(0)
+        source = self.get_endpoint(self.src)
+        destination = self.get_endpoint(self.dst)
+        data = self.read_source(source, self.length, self.src_offset)
+        self.write_destination(destination, data, self.dst_offset)
+        # A ring source is only drained once the destination took the burst (nothing is lost on a failed write)
+        if isinstance(source, Buffer) and source.ring:
+            source.discard(self.length)
+        self.transfers += 1
+        self.samples_moved += self.length
+        self.set_done(1)
+
+    def get_endpoint(self, endpoint_id):
+        endpoint = self.endpoints.get(endpoint_id)
+        if endpoint is None:
+            raise ValueError(f"No DMA endpoint bound to id {endpoint_id}")
+        return endpoint
+
+    def read_source(self, source, length, offset):
+        """
+        Read a block of samples from the source, as a view whenever possible.
+        Ring buffers are peeked (run drains them after the write), linear buffers are read in place, host arrays are read at the offset.
+        """
+        if isinstance(source, Buffer):
+            if len(source) < length:
+                raise ValueError(f"DMA source holds {len(source)} samples, {length} requested")
+            if source.ring:
+                return source.read(length)
+            return np.ravel(source.getBuffer())[:length]
+        if offset + length > len(source):
+            raise ValueError(f"DMA read of {length} samples at offset {offset} exceeds the host array ({len(source)} samples)")
+        return source[offset:offset + length]
+
+    def write_destination(self, destination, data, offset):
+        """
+        Write a block of samples to the destination with a single bulk copy.
+        Ring buffers are appended to, linear buffers are replaced, host arrays are written at the offset.
+        """
+        if isinstance(destination, Buffer):
+            if destination.ring:
+                destination.append(data)
+            else:
+                destination.writeBuffer(data)
+            return
+        if offset + len(data) > len(destination):
+            raise ValueError(f"DMA write of {len(data)} samples at offset {offset} exceeds the host array ({len(destination)} samples)")
+        destination[offset:offset + len(data)] = data
+
+    def set_done(self, value):
+        self.done = value
+        if self.done_register is not None:
+            self.done_register.write(value) # this is direct access to register so it bypasses read only condition
+
+    def __repr__(self):
+        return f"DmaBlock(src={self.src}, dst={self.dst}, length={self.length}, transfers={self.transfers}, samples_moved={self.samples_moved})"
@@ -0,0 +1,113 @@
+# This is the discrete-event simulation kernel:
+# Simulated time is counted in clock cycles and only advances from one scheduled event to the next
+# (a priority queue ordered by time), so idle cycles cost nothing however long the schedule is.
+# Blocks bound to a kernel declare their processing latency in cycles: a start register write makes them busy,
+# and their DONE/STATUS registers change when the completion event fires at start time + latency.
+import heapq
+import itertools
+
+# Clock used to convert simulated cycles to seconds:
+DEFAULT_CLOCK_HZ = 500e6
+
+class Event:
+    """
+    A scheduled callback (returned by EventKernel.schedule, can be cancelled until it fires).
+    """
+    __slots__ = ("time", "seq", "callback", "args", "cancelled")
+
+    def __init__(self, time, seq, callback, args):
+        self.time = time
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __lt__(self, other):
+        # Same time: events fire in the order they were scheduled
+        return (self.time, self.seq) < (other.time, other.seq)
+
+    def __repr__(self):
+        return f"Event(time={self.time}, callback={getattr(self.callback, '__qualname__', self.callback)}, cancelled={self.cancelled})"
+
+class EventKernel:
+    def __init__(self, clock_hz=DEFAULT_CLOCK_HZ):
+        if clock_hz <= 0:
+            raise ValueError("Clock frequency must be positive")
+        self.clock_hz = clock_hz
+        self.now = 0              # current simulated time in cycles
+        self.queue = []           # heap of pending events
+        self.counter = itertools.count()
+        self.events_processed = 0
+
+    def schedule(self, delay, callback, *args):
+        """
+        Schedule callback(*args) to run delay cycles from now.
+        """
+        if delay < 0:
+            raise ValueError("Events cannot be scheduled in the past")
+        return self.schedule_at(self.now + delay, callback, *args)
+
+    def schedule_at(self, time, callback, *args):
+        """
+        Schedule callback(*args) to run at an absolute simulated time (cycles).
+        """
+        if time < self.now:
+            raise ValueError(f"Events cannot be scheduled in the past (time {time}, now {self.now})")
+        event = Event(time, next(self.counter), callback, args)
+        heapq.heappush(self.queue, event)
+        return event
+
+    def step(self):
+        """
+        Jump to the next event and run it. Returns False when no event is left.
+        """
+        while self.queue:
+            event = heapq.heappop(self.queue)
+            if event.cancelled:
+                continue
+            self.now = event.time
+            self.events_processed += 1
+            event.callback(*event.args)
+            return True
+        return False
+
+    def run(self, until=None, max_events=None):
+        """
+        Run events until the queue is empty, the next event is later than `until` (cycles, time then jumps to until)
+        or max_events events ran. Returns the simulated time.
+        """
+        processed = 0
+        while max_events is None or processed < max_events:
+            nextTime = self.peek_time()
+            if nextTime is None:
+                break
+            if until is not None and nextTime > until:
+                break
+            self.step()
+            processed += 1
+        if until is not None and until > self.now and (max_events is None or processed < max_events):
+            self.now = until
+        return self.now
+
+    def peek_time(self):
+        """
+        Get the time of the next pending event (None if there is none).
+        """
+        while self.queue and self.queue[0].cancelled:
+            heapq.heappop(self.queue)
+        return self.queue[0].time if self.queue else None
+
+    def pending(self):
+        return sum(1 for event in self.queue if not event.cancelled)
+
+    def to_seconds(self, cycles):
+        """
+        Convert a number of cycles to seconds at the kernel clock.
+        """
+        return cycles / self.clock_hz
+
+    def __repr__(self):
+        return f"EventKernel(now={self.now}, pending={self.pending()}, clock_hz={self.clock_hz})"
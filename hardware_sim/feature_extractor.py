@@ -0,0 +1,242 @@
+# This is the feature extractor block (the optional stage between the FFT engine and the classifier):
+# It turns an FFT frame (or a 2-D batch, one frame per row) into a compact feature vector,
+# so the classifier cost depends on the selected feature sets instead of the FFT size.
+# The same extract_features function is used by the dataset generator, so training and runtime features match.
+import numpy as np
+from hardware_sim.buffer import Buffer
+
+# FEATURE_SELECT register bits (the selected sets are concatenated in this order):
+FEATURE_MAGNITUDE     = 0x01 # |X| per bin (fft_size features, the legacy classifier input)
+FEATURE_LOG_MAGNITUDE = 0x02 # 20*log10|X| per bin (fft_size features)
+FEATURE_BAND_ENERGY   = 0x04 # share of the total energy in equal width bands, in dB (FEATURE_BANDS features)
+FEATURE_PEAK_STATS    = 0x08 # peak statistics, see PEAK_STATS (6 features)
+FEATURE_DECIMATED     = 0x10 # max |X| over groups of FEATURE_DECIMATION bins (fft_size // decimation features)
+FEATURE_SETS = {
+    FEATURE_MAGNITUDE: "magnitude",
+    FEATURE_LOG_MAGNITUDE: "log_magnitude",
+    FEATURE_BAND_ENERGY: "band_energy",
+    FEATURE_PEAK_STATS: "peak_stats",
+    FEATURE_DECIMATED: "decimated",
+}
+FEATURE_SELECT_MASK = sum(FEATURE_SETS)
+# A few tens of features whatever the FFT size:
+FEATURE_COMPACT = FEATURE_BAND_ENERGY | FEATURE_PEAK_STATS
+
+PEAK_STATS = ("peak_to_mean_db", "second_peak_db", "peak_count", "flatness", "centroid", "spread")
+# Bins within this power ratio of the largest one count as peaks:
+PEAK_THRESHOLD = 0.1
+DEFAULT_BANDS = 16
+DEFAULT_DECIMATION = 8
+# Floor added before taking logs (keeps empty bins finite):
+LOG_FLOOR = 1e-12
+
+def get_feature_count(fft_size, feature_select=FEATURE_MAGNITUDE, bands=DEFAULT_BANDS, decimation=DEFAULT_DECIMATION):
+    """
+    Get the length of the feature vector for an FFT size and a feature selection.
+    """
+    validate_features(fft_size, feature_select, bands, decimation)
+    count = 0
+    if feature_select & FEATURE_MAGNITUDE:
+        count += fft_size
+    if feature_select & FEATURE_LOG_MAGNITUDE:
+        count += fft_size
+    if feature_select & FEATURE_BAND_ENERGY:
+        count += bands
+    if feature_select & FEATURE_PEAK_STATS:
+        count += len(PEAK_STATS)
+    if feature_select & FEATURE_DECIMATED:
+        count += fft_size // decimation
+    return count
+
+def validate_features(fft_size, feature_select, bands, decimation):
+    """
+    Check a feature selection against an FFT size.
+    """
+    if feature_select == 0 or feature_select & ~FEATURE_SELECT_MASK:
+        raise ValueError(f"Invalid feature selection 0x{feature_select:02X}. Valid bits are: {[hex(bit) for bit in FEATURE_SETS]}")
+    if feature_select & FEATURE_BAND_ENERGY and not 1 <= bands <= fft_size:
+        raise ValueError(f"Number of bands {bands} must be between 1 and the FFT size {fft_size}")
+    if feature_select & FEATURE_DECIMATED and not 1 <= decimation <= fft_size:
+        raise ValueError(f"Decimation {decimation} must be between 1 and the FFT size {fft_size}")
+
+def extract_features(spectrum, feature_select=FEATURE_MAGNITUDE, bands=DEFAULT_BANDS, decimation=DEFAULT_DECIMATION):
+    """
+    Compute the selected features of an FFT frame (1-D) or of a batch of frames (2-D, one frame per row).
+    spectrum may be the complex FFT output or its magnitude. Every feature set is computed for all rows at once.
+    """
+    magnitude = np.abs(spectrum)
+    fft_size = magnitude.shape[-1]
+    validate_features(fft_size, feature_select, bands, decimation)
+    features = []
+    if feature_select & FEATURE_MAGNITUDE:
+        features.append(magnitude)
+    if feature_select & FEATURE_LOG_MAGNITUDE:
+        features.append(20 * np.log10(magnitude + LOG_FLOOR))
+    if feature_select & (FEATURE_BAND_ENERGY | FEATURE_PEAK_STATS):
+        power = magnitude * magnitude
+        total = power.sum(axis=-1, keepdims=True) + LOG_FLOOR
+        if feature_select & FEATURE_BAND_ENERGY:
+            edges = np.linspace(0, fft_size, bands + 1).astype(int)[:-1]
+            bandEnergy = np.add.reduceat(power, edges, axis=-1)
+            features.append(10 * np.log10(bandEnergy / total + LOG_FLOOR))
+        if feature_select & FEATURE_PEAK_STATS:
+            features.append(peak_statistics(power, total))
+    if feature_select & FEATURE_DECIMATED:
+        groups = fft_size // decimation
+        grouped = magnitude[..., :groups * decimation].reshape(magnitude.shape[:-1] + (groups, decimation))
+        features.append(grouped.max(axis=-1))
+    if len(features) == 1:
+        return features[0]
+    return np.concatenate(features, axis=-1)
+
+def peak_statistics(power, total):
+    """
+    Peak statistics of power spectra (last axis), in the order of PEAK_STATS.
+    """
+    fft_size = power.shape[-1]
+    mean = total / fft_size
+    # Largest and second largest bins (partition instead of a full sort):
+    top = np.partition(power, fft_size - 2, axis=-1)[..., -2:]
+    peak = top[..., 1:]
+    peakToMean = 10 * np.log10(peak / mean + LOG_FLOOR)
+    secondPeak = 10 * np.log10(top[..., :1] / (peak + LOG_FLOOR) + LOG_FLOOR)
+    peakCount = np.count_nonzero(power >= PEAK_THRESHOLD * peak, axis=-1)[..., None].astype(float)
+    # Spectral flatness: geometric over arithmetic mean (1 for white noise, close to 0 for tones)
+    flatness = np.exp(np.mean(np.log(power + LOG_FLOOR), axis=-1, keepdims=True)) / mean
+    # Normalized spectral centroid and spread
+    bins = np.arange(fft_size) / fft_size
+    centroid = (power @ bins)[..., None] / total
+    spread = np.sqrt(np.sum(power * (bins - centroid) ** 2, axis=-1, keepdims=True) / total)
+    return np.concatenate((peakToMean, secondPeak, peakCount, flatness, centroid, spread), axis=-1)
+
+class FeatureExtractorBlock:
+    def __init__(self, feature_select=FEATURE_MAGNITUDE, bands=DEFAULT_BANDS, decimation=DEFAULT_DECIMATION):
+        self.feature_select = feature_select # FEATURE_SELECT register
+        self.bands = bands                   # FEATURE_BANDS register
+        self.decimation = decimation         # FEATURE_DECIMATION register
+        self.done = 0
+        self.fft_block = None
+        self.input_buffer = None
+        self.output_data = None
+        self.output_registers = {}
+        self.check_config()
+
+    def bind_input(self, input_buffer):
+        """
+        Bind the input buffer (the FFT output buffer) to the feature extractor block.
+        """
+        if not isinstance(input_buffer, Buffer):
+            raise ValueError("Input buffer must be a Buffer object")
+        self.input_buffer = input_buffer
+
+    def bind_fft_block(self, fft_block):
+        """
+        Bind the FFT block feeding the extractor, so register writes are checked against its FFT size.
+        """
+        self.fft_block = fft_block
+        self.check_config()
+
+    def bind_registers(self, feature_done_reg, feature_count_reg=None):
+        """
+        Bind the done and feature count registers to the feature extractor block.
+        """
+        self.output_registers['done'] = feature_done_reg
+        self.output_registers['count'] = feature_count_reg
+        self.publish_count()
+
+    def handle_FEATURE_START(self, value):
+        """
+        Handle the feature extractor start register.
+        """
+        if value == 1:
+            self.run()
+
+    def handle_FEATURE_SELECT(self, value):
+        self.set_config(feature_select=value)
+
+    def handle_FEATURE_BANDS(self, value):
+        self.set_config(bands=value)
+
+    def handle_FEATURE_DECIMATION(self, value):
+        self.set_config(decimation=value)
+
+    def update(self, name, value):
+        """
+        Update the feature extractor block with the given register name and value.
+        """
+        # Registers without a handle_<name> method have no side effect on the feature extractor block
+        pass
+
+    def set_config(self, feature_select=None, bands=None, decimation=None):
+        """
+        Change the feature configuration, keeping the previous one if the new one is invalid.
+        """
+        previous = (self.feature_select, self.bands, self.decimation)
+        if feature_select is not None:
+            self.feature_select = feature_select
+        if bands is not None:
+            self.bands = bands
+        if decimation is not None:
+            self.decimation = decimation
+        try:
+            self.check_config()
+        except ValueError:
+            self.feature_select, self.bands, self.decimation = previous
+            raise
+        self.publish_count()
+
+    def check_config(self):
+        """
+        Check the feature configuration (against the FFT size once an FFT block is bound).
+        """
+        fft_size = self.fft_block.getFFTSize() if self.fft_block is not None else 0
+        if fft_size:
+            validate_features(fft_size, self.feature_select, self.bands, self.decimation)
+        elif self.feature_select == 0 or self.feature_select & ~FEATURE_SELECT_MASK:
+            raise ValueError(f"Invalid feature selection 0x{self.feature_select:02X}. Valid bits are: {[hex(bit) for bit in FEATURE_SETS]}")
+
+    def get_feature_size(self, fft_size=None):
+        """
+        Get the feature vector length for an FFT size (the bound FFT block's size by default, None if unknown).
+        """
+        if fft_size is None:
+            fft_size = self.fft_block.getFFTSize() if self.fft_block is not None else 0
+        if not fft_size:
+            return None
+        return get_feature_count(fft_size, self.feature_select, self.bands, self.decimation)
+
+    def extract(self, spectrum):
+        """
+        Compute the configured features of an FFT frame or a 2-D batch of frames.
+        """
+        return extract_features(spectrum, self.feature_select, self.bands, self.decimation)
+
+    def run(self):
+        """
+        Run the feature extractor on the input buffer.
+        """
+        if self.input_buffer is None:
+            raise ValueError("Feature extractor has no input buffer")
+        spectrum = self.input_buffer.getBuffer()
+        if spectrum is None or len(spectrum) == 0:
+            raise ValueError("Feature extractor input buffer is empty")
+        # Features are real valued, they are kept in the block instead of a (complex) Buffer
+        self.output_data = self.extract(spectrum)
+        self.publish_count()
+        self.done = 1
+        if self.output_registers.get('done'):
+            self.output_registers['done'].write(1) # this is direct access to register so it bypasses read only condition
+
+    def get_output(self):
+        """
+        Get the features computed by the last run.
+        """
+        return self.output_data
+
+    def publish_count(self):
+        count = self.get_feature_size()
+        if self.output_registers.get('count') and count is not None:
+            self.output_registers['count'].write(count) # this is direct access to register so it bypasses read only condition
+
+    def __repr__(self):
+        return f"FeatureExtractorBlock(feature_select=0x{self.feature_select:02X}, bands={self.bands}, decimation={self.decimation})"
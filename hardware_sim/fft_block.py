@@ -1,14 +1,102 @@
 # This is the fast fourier transform block:
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # This is The library for the hardware simulation:
-from hardware_sim.register_map import FFtRegisterMap
 from hardware_sim.buffer import Buffer
-from general.helper_functions import create_fft_config, generate_single_tone, get_fft_size
+from hardware_sim import profiler
+from general.helper_functions import get_fft_size
 import math
+from collections import OrderedDict
+from functools import lru_cache
 import numpy as np
 
+# Number of compiled plans kept per FFT block (switching between a few configs is free):
+PLAN_CACHE_SIZE = 8
+# np.fft can write straight into a preallocated output array from numpy 2.0 on:
+FFT_SUPPORTS_OUT = int(np.__version__.split(".")[0]) >= 2
+
+# WINDOW_TYPE register values:
+WINDOW_TYPES = {0: "rectangular", 1: "hann", 2: "hamming", 3: "blackman", 4: "kaiser"}
+KAISER_BETA = 8.6 # sidelobe level close to a Blackman window
+# WINDOW_SIZE holds log2 of the window length (0 means the window spans the whole FFT frame):
+MAX_WINDOW_SIZE_CODE = 12
+
+# Default latency model of a streaming (pipelined) FFT core, used with an event kernel:
+# one input sample per cycle, plus a fixed pipeline delay per radix-2 stage
+FFT_SAMPLES_PER_CYCLE = 1
+FFT_STAGE_CYCLES = 4
+# Profiled stages of a run (see hardware_sim/profiler.py), normalization and phase shift are fused in "scale":
+FFT_PROFILE_STAGES = ("fft.input", "fft.window", "fft.fft", "fft.scale", "fft.output")
+# Performance counter registers are 32 bits wide:
+PERF_COUNTER_WRAP = 2 ** 32
+# FFT_STATUS register values:
+FFT_STATUS_IDLE = 0
+FFT_STATUS_BUSY = 1
+
+@lru_cache(maxsize=64)
+def get_window(window_type, window_length):
+    """
+    Get the (read-only) coefficients of a window, cached per (type, length).
+    The windows are periodic (DFT-even), so overlapped frames add up evenly.
+    """
+    if window_type not in WINDOW_TYPES:
+        raise ValueError(f"Invalid window type {window_type}. Valid options are: {list(WINDOW_TYPES.keys())}")
+    if window_type == 0:
+        window = np.ones(window_length)
+    elif window_type == 1:
+        window = np.hanning(window_length + 1)[:-1]
+    elif window_type == 2:
+        window = np.hamming(window_length + 1)[:-1]
+    elif window_type == 3:
+        window = np.blackman(window_length + 1)[:-1]
+    else:
+        window = np.kaiser(window_length + 1, KAISER_BETA)[:-1]
+    window.setflags(write=False)
+    return window
+
+class FftPlan:
+    """
+    Immutable, precomputed form of an FFT_CONFIG word.
+    Holds the parsed fields, the window coefficients (None for rectangular), a single fused
+    complex scale factor (normalization and phase shift) and the preallocated work/output arrays.
+    Everything is in the plan's sample dtype (complex64 in single precision, complex128 otherwise).
+    """
+    __slots__ = ("config", "fft_size", "paddingBehaviour", "phaseValue", "phaseDirection",
+                 "normalization", "batchMode", "singlePrecision", "dtype", "window", "scale", "work", "output")
+
+    def __init__(self, config, fft_size, paddingBehaviour, phaseValue, phaseDirection, normalization, batchMode, window=None, singlePrecision=0):
+        dtype = np.dtype(np.complex64) if singlePrecision else np.dtype(complex)
+        scale = np.exp(1j * phaseDirection * phaseValue)
+        if normalization:
+            scale = scale / math.sqrt(fft_size)
+        # Real window coefficients in the matching precision (float32 for complex64):
+        windowDtype = np.float32 if singlePrecision else np.float64
+        if window is not None and window.dtype != windowDtype:
+            window = window.astype(windowDtype)
+            window.setflags(write=False)
+        values = {
+            "config": config,
+            "fft_size": fft_size,
+            "paddingBehaviour": paddingBehaviour,
+            "phaseValue": phaseValue,
+            "phaseDirection": phaseDirection,
+            "normalization": normalization,
+            "batchMode": batchMode,
+            "singlePrecision": singlePrecision,
+            "dtype": dtype,
+            "window": window,
+            # a numpy scalar of the plan dtype, so the in-place multiply never upcasts
+            "scale": dtype.type(scale),
+            "work": np.empty(fft_size, dtype=dtype),
+            "output": np.empty(fft_size, dtype=dtype),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FftPlan is immutable")
+
+    def __repr__(self):
+        return f"FftPlan(config=0x{self.config:08X}, fft_size={self.fft_size}, dtype={self.dtype}, scale={self.scale})"
+
 class FftBlock:
     def __init__(self):
         self.done = 0
@@ -17,12 +105,29 @@ class FftBlock:
         self.phaseValue = 0
         self.phaseDirection = 0
         self.normalization = 0
+        self.batchMode = 0
+        self.singlePrecision = 0
         self.reserved = 0
+        self.windowType = 0     # WINDOW_TYPE register
+        self.windowSizeCode = 0 # WINDOW_SIZE register
+        self.hop = 0            # WINDOW_HOP register, 0 disables the STFT streaming mode
         self.config = None
+        self.plan = None
+        self.plan_cache = OrderedDict() # LRU of compiled plans keyed by (config word, window type, window size)
         self.output_data = None
         self.input_data = None
         self.input_buffer = None
         self.output_buffer = None
+        # Event-driven timing (see bind_kernel), without a kernel a start runs synchronously
+        self.kernel = None
+        self.latency_cycles = None # None: default streaming FFT latency model
+        self.busy = 0
+        self.start_time = None
+        self.output_registers = {}
+        self.done_callbacks = []
+        # Performance counters (updated while profiling is enabled)
+        self.perf_frames = 0
+        self.perf_last_ns = 0
 
     def configure(self, config):
         """
@@ -48,6 +153,95 @@ class FftBlock:
         self.input_buffer = input_buffer
         self.output_buffer = output_buffer
 
+    def bind_registers(self, fft_done_reg, fft_status_reg=None):
+        """
+        Bind the done and status registers to the FFT block.
+        """
+        self.output_registers['done'] = fft_done_reg
+        self.output_registers['status'] = fft_status_reg
+
+    def bind_perf_registers(self, fft_perf_frames_reg, fft_perf_last_ns_reg=None):
+        """
+        Bind the performance counter registers (frames processed and last run time in ns, while profiling is enabled).
+        """
+        self.output_registers['perf_frames'] = fft_perf_frames_reg
+        self.output_registers['perf_last_ns'] = fft_perf_last_ns_reg
+
+    def bind_kernel(self, kernel):
+        """
+        Bind an event kernel: starts then complete (output, FFT_DONE, FFT_STATUS) after the block latency in simulated time.
+        """
+        self.kernel = kernel
+
+    def on_done(self, callback):
+        """
+        Register a callback(fft_block) called when a run completes (at the simulated completion time with a kernel).
+        """
+        self.done_callbacks.append(callback)
+
+    def get_latency_cycles(self):
+        """
+        Get the latency of a start in cycles: the fixed latency_cycles if set, the streaming FFT model otherwise
+        (every frame the start will process streams through at FFT_SAMPLES_PER_CYCLE, plus the pipeline delay).
+        """
+        if self.latency_cycles is not None:
+            return self.latency_cycles
+        if not self.fft_size:
+            return 0
+        numAvailable = len(self) if self.input_buffer is not None else (0 if self.input_data is None else len(self.input_data))
+        if self.hop:
+            numFrames = (numAvailable - self.fft_size) // self.hop + 1 if numAvailable >= self.fft_size else 0
+        elif self.batchMode:
+            numFrames = max(1, numAvailable // self.fft_size)
+        else:
+            numFrames = 1
+        return math.ceil(numFrames * self.fft_size / FFT_SAMPLES_PER_CYCLE) + FFT_STAGE_CYCLES * int(math.log2(self.fft_size))
+
+    def start(self):
+        """
+        Start the FFT block: runs right away without a kernel, otherwise the block is busy until the completion event.
+        The input must stay in place while the block is busy (it is read when the run completes).
+        """
+        if self.kernel is None:
+            # DONE is set again only if the run produces an output
+            self.done = 0
+            self.run()
+            self.complete_start()
+            return
+        if self.busy:
+            raise ValueError("FFT block is busy")
+        self.busy = 1
+        self.start_time = self.kernel.now
+        self.set_done(0)
+        self.set_status(FFT_STATUS_BUSY)
+        self.kernel.schedule(self.get_latency_cycles(), self.finish)
+
+    def finish(self):
+        """
+        Completion event of a start (event kernel mode).
+        """
+        try:
+            self.run()
+        finally:
+            self.busy = 0
+            self.set_status(FFT_STATUS_IDLE)
+        self.complete_start()
+
+    def complete_start(self):
+        if self.done:
+            self.set_done(1)
+        for callback in self.done_callbacks:
+            callback(self)
+
+    def set_done(self, value):
+        self.done = value
+        if self.output_registers.get('done'):
+            self.output_registers['done'].write(value) # this is direct access to register so it bypasses read only condition
+
+    def set_status(self, value):
+        if self.output_registers.get('status'):
+            self.output_registers['status'].write(value) # this is direct access to register so it bypasses read only condition
+
     def load_input(self, input_data):
         """
         Load the input data into the FFT block.
@@ -62,28 +256,53 @@ class FftBlock:
         """
         # Run the FFT block
         # This is a placeholder for actual hardware run code
-        inputBuffer = self.getBufferSamples()
+        if self.plan is None:
+            raise ValueError("FFT block is not configured")
+        # Stage timestamps are only taken while profiling is enabled:
+        prof = profiler.active
+        if prof is not None:
+            t0 = profiler.now_ns()
+        # In STFT mode all the overlapping frames available are processed in one go (2-D, one frame per row):
+        if self.hop:
+            inputBuffer = self.getBufferStftFrames()
+        # In batch mode every full frame in the input is processed in one go (2-D, one frame per row):
+        elif self.batchMode:
+            inputBuffer = self.getBufferFrames()
+        else:
+            inputBuffer = self.getBufferSamples()
         if inputBuffer is None:
             return; # this is when padding behaviour is 1 and input data is too short
         # Check if the input buffer is the right size:
-        if len(inputBuffer) != self.fft_size:
+        if np.shape(inputBuffer)[-1] != self.fft_size:
             raise ValueError("Input buffer was not the right size")
-        
+        plan = self.plan
+        # Single frames reuse the plan's preallocated arrays, batches are allocated per run:
+        singleFrame = np.ndim(inputBuffer) == 1
+        # Explicit conversion to the plan's sample dtype (no copy when the input already matches):
+        inputBuffer = np.asarray(inputBuffer, dtype=plan.dtype)
+        if prof is not None:
+            t1 = profiler.now_ns()
+
         # Perform Windowing:
         windowOutput = self.windowing(inputBuffer)
+        if prof is not None:
+            t2 = profiler.now_ns()
 
         # Perform FFT:
-        fftOutput = self.fft(windowOutput)
-
-        # Perform normalization:
-        if self.normalization:
-            fftOutput = self.normalize(fftOutput)
-
-        # Perform phase shifting:
-        if self.phaseDirection:
-            fftOutput = self.phaseShift(fftOutput, self.phaseValue)
+        if singleFrame and FFT_SUPPORTS_OUT and self.output_buffer is not None:
+            # The output buffer keeps its own copy, so the plan's output array can be reused
+            fftOutput = np.fft.fft(windowOutput, out=plan.output)
         else:
-            fftOutput = self.phaseShift(fftOutput, -self.phaseValue)
+            # np.fft keeps complex64 from numpy 2.0 on, older versions compute in double precision
+            fftOutput = self.fft(windowOutput).astype(plan.dtype, copy=False)
+        if prof is not None:
+            t3 = profiler.now_ns()
+
+        # Perform normalization and phase shifting (fused into a single in-place multiply):
+        if plan.scale != 1:
+            fftOutput *= plan.scale
+        if prof is not None:
+            t4 = profiler.now_ns()
 
         # Save to the output buffer:
         if self.output_buffer is not None:
@@ -93,6 +312,23 @@ class FftBlock:
 
         # Set the done flag
         self.done = 1
+        if prof is not None:
+            self.record_profile(prof, (t0, t1, t2, t3, t4, profiler.now_ns()), 1 if singleFrame else len(fftOutput))
+
+    def record_profile(self, prof, times, numFrames):
+        """
+        Record the stage spans of a run and update the performance registers.
+        """
+        args = {"frames": numFrames, "fft_size": self.fft_size}
+        for name, start, end in zip(FFT_PROFILE_STAGES, times, times[1:]):
+            prof.record(name, start, end, "fft", args)
+        prof.record("fft.run", times[0], times[-1], "fft", args)
+        self.perf_frames += numFrames
+        self.perf_last_ns = times[-1] - times[0]
+        if self.output_registers.get('perf_frames'):
+            self.output_registers['perf_frames'].write(self.perf_frames % PERF_COUNTER_WRAP) # this is direct access to register so it bypasses read only condition
+        if self.output_registers.get('perf_last_ns'):
+            self.output_registers['perf_last_ns'].write(min(self.perf_last_ns, PERF_COUNTER_WRAP - 1)) # this is direct access to register so it bypasses read only condition
 
     
     def get_output(self):
@@ -110,7 +346,7 @@ class FftBlock:
         Handle the FFT start register.
         """
         if value == 1:
-            self.run()
+            self.start()
 
     def handle_FFT_CONFIG(self, value):
         """
@@ -118,51 +354,122 @@ class FftBlock:
         """
         self.configure(value)
 
+    def handle_WINDOW_TYPE(self, value):
+        """
+        Handle the window type register.
+        """
+        if value not in WINDOW_TYPES:
+            raise ValueError(f"Invalid window type {value}. Valid options are: {list(WINDOW_TYPES.keys())}")
+        self.windowType = value
+        if self.config is not None:
+            self.parse_config(self.config)
+
+    def handle_WINDOW_SIZE(self, value):
+        """
+        Handle the window size register (log2 of the window length, 0 for the full frame).
+        """
+        if value > MAX_WINDOW_SIZE_CODE:
+            raise ValueError(f"Invalid window size code {value}")
+        previousCode = self.windowSizeCode
+        self.windowSizeCode = value
+        if self.config is not None:
+            try:
+                self.parse_config(self.config)
+            except ValueError:
+                # The window does not fit the current FFT size, keep the previous one
+                self.windowSizeCode = previousCode
+                raise
+
+    def handle_WINDOW_HOP(self, value):
+        """
+        Handle the window hop register (STFT hop in samples, 0 disables the STFT mode).
+        """
+        self.hop = value
+
     def update(self, name, value):
         """
         Update the FFT block with the given register name and value.
         """
-        print(f"Fallback update for {name} = {value}")
+        # Registers without a handle_<name> method have no side effect on the FFT block
+        pass
 
 
     def parse_config(self, config):
         """
         Parse the configuration for the FFT block.
         """
-        # Parse the configuration for the FFT block
+        # Compiled plans are cached by the config word and the window registers:
+        key = (config, self.windowType, self.windowSizeCode)
+        plan = self.plan_cache.get(key)
+        if plan is None:
+            plan = self.compile_plan(config)
+            self.plan_cache[key] = plan
+            if len(self.plan_cache) > PLAN_CACHE_SIZE:
+                self.plan_cache.popitem(last=False) # drop the least recently used plan
+        else:
+            self.plan_cache.move_to_end(key)
+        self.plan = plan
+        self.fft_size = plan.fft_size
+        self.paddingBehaviour = plan.paddingBehaviour
+        self.phaseValue = plan.phaseValue
+        self.phaseDirection = plan.phaseDirection
+        self.normalization = plan.normalization
+        self.batchMode = plan.batchMode
+        self.singlePrecision = plan.singlePrecision
+        self.reserved = 0
+        # Save the configuration
+        self.config = config
+
+    def compile_plan(self, config):
+        """
+        Parse and validate a configuration word into an FftPlan.
+        """
         # The first 4 bits are the fft size index:
         fftSizeIndex = config & 0x0F
-        print("FFT size index: ", fftSizeIndex)
         if fftSizeIndex > 11:
             raise ValueError("Invalid FFT size") #TODO: add other options (only zero for input, noise, etc)
         # Set the fft size
-        self.fft_size = get_fft_size(fftSizeIndex)
+        fft_size = get_fft_size(fftSizeIndex)
         # The next 2 bits are the padding information:
         paddingBehaviour = (config >> 4) & 0x03
-        self.paddingBehaviour = paddingBehaviour
         # The next 11 bits are the phase value:
         phaseValue = (config >> 6) & 0x7FF
-        self.phaseValue = phaseValue/ (2**11) * math.pi
-        self.phaseDirection = 1 - 2*((config >> 17) & 0x01) #if 0, phase is positive, if 1, phase is negative
+        phaseValue = phaseValue/ (2**11) * math.pi
+        phaseDirection = 1 - 2*((config >> 17) & 0x01) #if 0, phase is positive, if 1, phase is negative
         # The next bit is for normalization:
-        self.normalization = (config >> 18) & 0x01
+        normalization = (config >> 18) & 0x01
+        # The next bit is for batch mode (process all full frames in the input on one start):
+        batchMode = (config >> 19) & 0x01
+        # The next bit selects the single precision (complex64) data path:
+        singlePrecision = (config >> 20) & 0x01
         # The rest of the bits are reserved:
-        self.reserved = (config >> 19)
+        reserved = (config >> 21)
         # Check if the configuration is valid
-        if self.fft_size == 0:
+        if fft_size is None or fft_size == 0:
             raise ValueError("Invalid FFT size")
-        if self.paddingBehaviour > 3:
+        if paddingBehaviour > 3:
             raise ValueError("Invalid paddingBehaviour")
-        if self.phaseValue > 2*math.pi:
+        if phaseValue > 2*math.pi:
             raise ValueError("Invalid phase value")
-        if self.phaseDirection > 1:
+        if phaseDirection > 1:
             raise ValueError("Invalid phase direction")
-        if self.normalization > 1:
+        if normalization > 1:
             raise ValueError("Invalid normalization value")
-        if self.reserved > 0:
+        if batchMode > 1:
+            raise ValueError("Invalid batch mode value")
+        if reserved > 0:
             raise ValueError("Invalid reserved value")
-        # Save the configuration
-        self.config = config
+        # The window is centered in the frame, with zeros outside when it is shorter than the FFT:
+        window = None
+        if self.windowType != 0 or self.windowSizeCode != 0:
+            windowLength = fft_size if self.windowSizeCode == 0 else 2 ** self.windowSizeCode
+            if windowLength > fft_size:
+                raise ValueError(f"Window size {windowLength} cannot exceed the FFT size {fft_size}")
+            window = np.zeros(fft_size)
+            start = (fft_size - windowLength) // 2
+            window[start:start + windowLength] = get_window(self.windowType, windowLength)
+            window.setflags(write=False)
+        return FftPlan(config, fft_size, paddingBehaviour, phaseValue, phaseDirection, normalization, batchMode, window, singlePrecision)
 
     def getBufferSamples(self):
         """
@@ -177,56 +484,136 @@ class FftBlock:
         # But first, we get the input data:
         # if we have a buffer, we need to get the data from it
         # if we don't have a buffer, we need to get the data from the input data
+        # a ring buffer is only read once we know how many samples to consume
+        ringBuffer = self.input_buffer is not None and self.input_buffer.ring
         if self.input_buffer is None:
             bufferIn = self.input_data
+        elif ringBuffer:
+            bufferIn = None
         else:
             bufferIn = self.input_buffer.getBuffer()
+        if ringBuffer:
+            numAvailable = len(self.input_buffer)
+        else:
+            numAvailable = 0 if bufferIn is None else len(bufferIn)
         
         if self.paddingBehaviour == 0:
-            if len(bufferIn) < self.fft_size:
-                raise ValueError("Input data is too short, was expecting " + str(self.fft_size) + " samples, got " + str(len(bufferIn)) + " samples")
+            if numAvailable < self.fft_size:
+                raise ValueError("Input data is too short, was expecting " + str(self.fft_size) + " samples, got " + str(numAvailable) + " samples")
 
         elif self.paddingBehaviour == 1:
-            if len(bufferIn) < self.fft_size:
+            if numAvailable < self.fft_size:
                 return # this is when padding behaviour is 1 and input data is too short
-        elif self.paddingBehaviour == 2:
-            if len(bufferIn) < self.fft_size:
-                # we need to pad the input data with zeros
-                bufferIn = [0] * (self.fft_size - len(bufferIn)) + bufferIn
-
-        elif self.paddingBehaviour == 3:
-            if len(bufferIn) < self.fft_size:
-                # we need to pad the input data with zeros
-                bufferIn = bufferIn + [0] * (self.fft_size - len(bufferIn))
-
-        # Shared between all cases:
-        # we only need the first fft_size values
-        if self.input_buffer is not None:
+
+        if ringBuffer:
+            # Consume at most one frame, the rest of the ring is left untouched (no copy)
+            bufferIn = self.input_buffer.consume(min(numAvailable, self.fft_size))
+        elif self.input_buffer is not None:
             # if we have a buffer, we need to clear it
-            # and write the new data to it
+            # and write the remaining data to it
             self.input_buffer.clear()
             self.input_buffer.writeBuffer(bufferIn[self.fft_size:])
         # clean whatever samples are in bufferIn:
         bufferIn = bufferIn[:self.fft_size]
+
+        if numAvailable < self.fft_size:
+            padding = np.zeros(self.fft_size - numAvailable, dtype=self.plan.dtype)
+            if self.paddingBehaviour == 2:
+                # we need to pad the input data with zeros at the beginning
+                bufferIn = np.concatenate((padding, bufferIn))
+            elif self.paddingBehaviour == 3:
+                # we need to pad the input data with zeros at the end
+                bufferIn = np.concatenate((bufferIn, padding))
         return bufferIn
 
+    def getBufferFrames(self):
+        """
+        Get all the full frames in the input as an (n_frames, fft_size) view, for batch mode.
+        """
+        ringBuffer = self.input_buffer is not None and self.input_buffer.ring
+        if self.input_buffer is None:
+            bufferIn = self.input_data
+        elif ringBuffer:
+            bufferIn = None
+        else:
+            bufferIn = self.input_buffer.getBuffer()
+        if ringBuffer:
+            numFrames = len(self.input_buffer) // self.fft_size
+        else:
+            numFrames = 0 if bufferIn is None else len(bufferIn) // self.fft_size
+        # Less than a single frame: fall back to the single frame padding behaviour
+        if numFrames == 0:
+            frame = self.getBufferSamples()
+            if frame is None:
+                return None
+            return np.asarray(frame).reshape(1, self.fft_size)
+
+        numSamples = numFrames * self.fft_size
+        if ringBuffer:
+            # Only the consumed frames are read, the remainder stays in place in the ring
+            bufferIn = self.input_buffer.consume(numSamples)
+        else:
+            bufferIn = np.asarray(bufferIn)
+            # The remainder (less than a frame) stays in the input buffer for the next start:
+            if self.input_buffer is not None:
+                self.input_buffer.clear()
+                self.input_buffer.writeBuffer(bufferIn[numSamples:])
+        # Reshape is a view, no samples are copied:
+        return bufferIn[:numSamples].reshape(numFrames, self.fft_size)
+
+    def getBufferStftFrames(self):
+        """
+        Get all the overlapping frames (spaced by the hop) in the input as an (n_frames, fft_size) strided view, for STFT mode.
+        """
+        if self.hop > self.fft_size:
+            raise ValueError(f"STFT hop {self.hop} cannot exceed the FFT size {self.fft_size}")
+        ringBuffer = self.input_buffer is not None and self.input_buffer.ring
+        if self.input_buffer is None:
+            bufferIn = self.input_data
+        elif ringBuffer:
+            # A view, unless the stored samples wrap around the end of the ring
+            bufferIn = self.input_buffer.read()
+        else:
+            bufferIn = self.input_buffer.getBuffer()
+        numAvailable = 0 if bufferIn is None else len(bufferIn)
+        # Streaming: wait for more samples instead of padding
+        if numAvailable < self.fft_size:
+            return None
+
+        bufferIn = np.asarray(bufferIn)
+        numFrames = (numAvailable - self.fft_size) // self.hop + 1
+        # The frames overlap in memory, no samples are copied:
+        frames = np.lib.stride_tricks.sliding_window_view(bufferIn, self.fft_size)[::self.hop][:numFrames]
+        # The next frame starts right after the consumed hops:
+        numConsumed = numFrames * self.hop
+        if ringBuffer:
+            self.input_buffer.discard(numConsumed)
+        elif self.input_buffer is not None:
+            self.input_buffer.clear()
+            self.input_buffer.writeBuffer(bufferIn[numConsumed:])
+        return frames
+
     def windowing(self, inputBuffer):
         """
         Perform windowing on the input buffer.
         """
         # Perform windowing on the input buffer
         # This is a placeholder for actual hardware windowing code
-
-        # For now, we just return the input buffer (which is a rectangle)
-        return inputBuffer
+        window = self.plan.window if self.plan is not None else None
+        if window is None:
+            # Rectangular window, the input passes through untouched
+            return inputBuffer
+        if np.ndim(inputBuffer) == 1:
+            return np.multiply(inputBuffer, window, out=self.plan.work)
+        return inputBuffer * window
     
     def fft(self, inputBuffer):
         """
         Perform FFT on the input buffer.
         """
-        # Perform FFT on the input buffer
+        # Perform FFT on the input buffer (along the last axis, so batches of frames work as well)
         # This is a placeholder for actual hardware FFT code
-        fftOut = np.fft.fft(inputBuffer)
+        fftOut = np.fft.fft(inputBuffer, axis=-1)
         # For now, we just return the input buffer (which is a rectangle)
         return fftOut
     
@@ -257,9 +644,9 @@ class FftBlock:
         return self.fft_size
     
     def __repr__(self):
-        return f"FFTBlock(fft_size={self.fft_size}, paddingBehaviour={self.paddingBehaviour}, phaseValue={self.phaseValue}, phaseDirection={self.phaseDirection}, normalization={self.normalization}, reserved={self.reserved})"
+        return f"FFTBlock(fft_size={self.fft_size}, paddingBehaviour={self.paddingBehaviour}, phaseValue={self.phaseValue}, phaseDirection={self.phaseDirection}, normalization={self.normalization}, batchMode={self.batchMode}, singlePrecision={self.singlePrecision}, reserved={self.reserved}, windowType={self.windowType}, hop={self.hop})"
     def __str__(self):
-        return f"FFTBlock: fft_size={self.fft_size}, paddingBehaviour={self.paddingBehaviour}, phaseValue={self.phaseValue}, phaseDirection={self.phaseDirection}, normalization={self.normalization}, reserved={self.reserved}"
+        return f"FFTBlock: fft_size={self.fft_size}, paddingBehaviour={self.paddingBehaviour}, phaseValue={self.phaseValue}, phaseDirection={self.phaseDirection}, normalization={self.normalization}, batchMode={self.batchMode}, singlePrecision={self.singlePrecision}, reserved={self.reserved}, windowType={self.windowType}, hop={self.hop}"
     def __len__(self):
         if self.input_buffer is not None:
             return len(self.input_buffer)
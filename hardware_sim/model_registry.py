@@ -0,0 +1,160 @@
+# This is the model registry for the classifier block:
+# It keeps the classifier models for the CLASSIFY_MODEL_SELECT slots in a bounded LRU cache,
+# so that a model switch is a pointer swap instead of a load from disk in the data path.
+# Models are sklearn pickles (.joblib) or forests exported to flat node arrays (.npz, see model/rf_classifier.py).
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from model.rf_classifier import load_forest
+
+# Default CLASSIFY_MODEL_SELECT slots:
+DEFAULT_MODEL_PATHS = {
+    0: "ml_module/model_rf_classifier.joblib",
+    1: "ml_module/model_rf_snr_augmented.joblib",
+    2: "ml_module/model_rf_fft128.joblib",
+    3: "ml_module/model_rf_fft512.joblib"
+}
+
+class ModelRegistry:
+    def __init__(self, model_paths=None, cache_size=2, mmap_mode="r"):
+        """
+        Create a registry for the given model slots (slot -> path), keeping up to cache_size models loaded.
+        mmap_mode is passed to joblib.load, so the numpy arrays inside the models are memory mapped
+        (exported .npz forests are memory mapped unless mmap_mode is None).
+        """
+        if cache_size < 1:
+            raise ValueError("Cache size must be at least 1")
+        self.model_paths = dict(DEFAULT_MODEL_PATHS if model_paths is None else model_paths)
+        self.cache_size = cache_size
+        self.mmap_mode = mmap_mode
+        self.cache = OrderedDict()   # path -> model, least recently used first
+        self.validated_paths = set() # paths that already passed the file checks
+        self.pending = {}            # path -> future of a background load
+        self.lock = threading.Lock()
+        self.loader = None
+
+    def get(self, slot):
+        """
+        Get the model for a slot, loading it if it is not cached yet.
+        """
+        if slot not in self.model_paths:
+            raise ValueError(f"Invalid model selection {slot}. Valid options are: {list(self.model_paths.keys())}")
+        return self.load_path(self.model_paths[slot])
+
+    def load_path(self, path):
+        """
+        Get the model stored at a path, loading it if it is not cached yet.
+        """
+        with self.lock:
+            model = self.cache.get(path)
+            if model is not None:
+                self.cache.move_to_end(path)
+                return model
+            future = self.pending.get(path)
+        # A background load of this model is in flight, wait for it instead of loading twice
+        if future is not None:
+            future.result()
+            return self.load_path(path)
+        self.validate_path(path)
+        model = self.load_model(path)
+        self.store(path, model)
+        return model
+
+    def load_model(self, path):
+        """
+        Load a model file (no caching).
+        """
+        if path.endswith('.npz'):
+            return load_forest(path, mmap=self.mmap_mode is not None)
+        # joblib (and sklearn with the unpickled model) is only imported when a pickle is actually loaded
+        import joblib
+        return joblib.load(path, mmap_mode=self.mmap_mode)
+
+    def preload(self, slots=None, background=True):
+        """
+        Warm the cache with the models of the given slots (all slots by default).
+        In the background the loads run on a worker thread and a list of futures is returned.
+        """
+        if slots is None:
+            slots = list(self.model_paths.keys())
+        paths = []
+        for slot in slots:
+            if slot not in self.model_paths:
+                raise ValueError(f"Invalid model selection {slot}. Valid options are: {list(self.model_paths.keys())}")
+            paths.append(self.model_paths[slot])
+        if not background:
+            for path in paths:
+                self.load_path(path)
+            return []
+        futures = []
+        with self.lock:
+            if self.loader is None:
+                self.loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-preload")
+            for path in paths:
+                if path in self.cache or path in self.pending:
+                    continue
+                future = self.loader.submit(self._background_load, path)
+                self.pending[path] = future
+                futures.append(future)
+        return futures
+
+    def publish(self, slot, path, model=None):
+        """
+        Point a slot at a new model file (e.g. a retrained snapshot) while the simulator runs.
+        The model is cached right away (loaded from the path if not given), the next CLASSIFY_MODEL_SELECT write of the slot switches to it.
+        """
+        self.validate_path(path)
+        if model is None:
+            model = self.load_model(path)
+        with self.lock:
+            self.model_paths[slot] = path
+        self.store(path, model)
+        return model
+
+    def store(self, path, model):
+        """
+        Put a model in the cache, evicting the least recently used model when the cache is full.
+        """
+        with self.lock:
+            self.cache[path] = model
+            self.cache.move_to_end(path)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def validate_path(self, path):
+        """
+        Check that a model file exists and is readable (once per path).
+        """
+        if path in self.validated_paths:
+            return
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model file not found: {path}")
+        if not path.endswith(('.joblib', '.npz')):
+            raise ValueError("Model file must be a .joblib or .npz file")
+        if not os.path.isfile(path):
+            raise ValueError("Model path must be a file")
+        if not os.access(path, os.R_OK):
+            raise PermissionError(f"Model file is not readable: {path}")
+        self.validated_paths.add(path)
+
+    def is_cached(self, slot):
+        return self.model_paths.get(slot) in self.cache
+
+    def _background_load(self, path):
+        try:
+            self.validate_path(path)
+            model = self.load_model(path)
+            self.store(path, model)
+        finally:
+            with self.lock:
+                self.pending.pop(path, None)
+
+    def __repr__(self):
+        return f"ModelRegistry(slots={list(self.model_paths.keys())}, cache_size={self.cache_size}, cached={len(self.cache)})"
+
+def get_feature_size(model):
+    """
+    Get the number of input features a model expects (None if the model does not say).
+    """
+    return getattr(model, "n_features_in_", None)
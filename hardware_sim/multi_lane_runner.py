@@ -0,0 +1,185 @@
+# The multi-lane runner simulates many independent receiver channels (lanes).
+# Every lane gets its own FFtRegisterMap / FftBlock / ClassifierRegMap / ClassifierBlock and streams its own frames,
+# and the lanes are spread over a process pool (one lane per task, so the work scales with the number of cores).
+# The classifier model is loaded once in the parent and shared read-only with the workers:
+#   fork  : the workers inherit the loaded model (copy-on-write pages, nothing is pickled or reloaded)
+#   spawn : every worker loads it once at start-up (exported .npz forests are memory mapped, so the pages are shared)
+# The parent loads the model at the first run that needs it in-process (serial or fork), never for spawn pools.
+import os
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from hardware_sim.fft_block import FftBlock
+from hardware_sim.buffer import Buffer
+from hardware_sim.register_map import FFtRegisterMap, ClassifierRegMap
+from hardware_sim.classifier_block import ClassifierBlock
+from hardware_sim.model_registry import ModelRegistry
+from hardware_sim.capture_reader import CaptureReader
+from general.helper_functions import get_fft_size
+
+# State inherited by forked workers (set in the parent right before the pool starts):
+_shared = {"model": None, "lanes": None}
+
+class MultiLaneRunner:
+    def __init__(self, fft_config, model_path=None, n_workers=None, feature_extractor=None, start_method=None):
+        """
+        Build a runner for lanes configured with the same FFT_CONFIG word and classifier model (None: FFT only).
+        start_method is the multiprocessing start method (fork when the platform has it by default).
+        """
+        self.fft_config = fft_config
+        self.fft_size = get_fft_size(fft_config & 0x0F)
+        if self.fft_size is None:
+            raise ValueError("Invalid FFT size")
+        self.model_path = model_path
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count()
+        if self.n_workers < 1:
+            raise ValueError("Number of workers must be at least 1")
+        self.feature_extractor = feature_extractor
+        if start_method is None:
+            start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        self.start_method = start_method
+        # Loaded once, on first use (see the module header for how the workers share it)
+        self.registry = ModelRegistry()
+        self.model = None
+        if model_path is not None:
+            self.registry.validate_path(model_path)
+        self.stats = {}
+        self.elapsed = 0.0
+
+    def run(self, lanes):
+        """
+        Run the lanes (lane id -> frames, as a 2-D array of frames, a list of frames or a capture file path)
+        and return the per-lane results (lane id -> labels, or FFT outputs without a model).
+        """
+        lane_ids = list(lanes.keys())
+        start = time.perf_counter()
+        if self.n_workers == 1 or len(lane_ids) <= 1:
+            outputs = [run_lane(self.lane_task(lane_id, lanes[lane_id]), self.get_model()) for lane_id in lane_ids]
+        elif self.start_method == "fork":
+            # The workers inherit the model and the lane data, only the lane ids go through the pipes
+            _shared["model"] = self.get_model()
+            _shared["lanes"] = lanes
+            try:
+                with ProcessPoolExecutor(max_workers=min(self.n_workers, len(lane_ids)),
+                                         mp_context=multiprocessing.get_context("fork")) as pool:
+                    outputs = list(pool.map(run_shared_lane, [self.lane_task(lane_id, None) for lane_id in lane_ids]))
+            finally:
+                _shared["model"] = None
+                _shared["lanes"] = None
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.n_workers, len(lane_ids)),
+                                     mp_context=multiprocessing.get_context(self.start_method),
+                                     initializer=init_worker, initargs=(self.model_path,)) as pool:
+                outputs = list(pool.map(run_shared_lane, [self.lane_task(lane_id, lanes[lane_id]) for lane_id in lane_ids]))
+        self.elapsed = time.perf_counter() - start
+
+        results = {}
+        self.stats = {}
+        for lane_id, (lane_results, lane_stats) in zip(lane_ids, outputs):
+            results[lane_id] = lane_results
+            self.stats[lane_id] = lane_stats
+        return results
+
+    def get_model(self):
+        """
+        Get the classifier model, loading it on first use (None for FFT only lanes).
+        """
+        if self.model is None and self.model_path is not None:
+            self.model = self.registry.load_path(self.model_path)
+        return self.model
+
+    def lane_task(self, lane_id, frames):
+        return {"lane": lane_id, "frames": frames, "fft_config": self.fft_config, "fft_size": self.fft_size,
+                "has_model": self.model_path is not None, "feature_extractor": self.feature_extractor}
+
+    def get_stats(self):
+        """
+        Get the per-lane statistics of the last run, plus the totals over all lanes.
+        """
+        frames = sum(stats["frames"] for stats in self.stats.values())
+        return {
+            "lanes": dict(self.stats),
+            "total": {
+                "lanes": len(self.stats),
+                "frames": frames,
+                "frames_dropped": sum(stats["frames_dropped"] for stats in self.stats.values()),
+                "elapsed_s": self.elapsed,
+                "throughput_fps": frames / self.elapsed if self.elapsed > 0 else 0.0,
+                "workers": len(set(stats["pid"] for stats in self.stats.values())),
+            },
+        }
+
+    def __repr__(self):
+        return f"MultiLaneRunner(fft_size={self.fft_size}, model_path={self.model_path}, n_workers={self.n_workers}, start_method={self.start_method})"
+
+def init_worker(model_path):
+    """
+    Process pool initializer (spawn): load the shared model once per worker.
+    """
+    _shared["model"] = ModelRegistry().load_path(model_path) if model_path is not None else None
+
+def run_shared_lane(task):
+    """
+    Process pool entry point: run a lane with the worker's shared model (and the inherited lane data after a fork).
+    """
+    if task["frames"] is None:
+        task = dict(task, frames=_shared["lanes"][task["lane"]])
+    return run_lane(task, _shared["model"])
+
+def run_lane(task, model):
+    """
+    Build the register maps and blocks of a lane and stream its frames through them.
+    Returns the lane results and statistics.
+    """
+    fft_size = task["fft_size"]
+    frames = task["frames"]
+    if isinstance(frames, str):
+        frames = CaptureReader(frames, fft_size)
+
+    fft_reg_map = FFtRegisterMap()
+    fft_block = FftBlock()
+    fft_block.bind_input_output(Buffer(fft_size, fft_size), Buffer(fft_size, fft_size))
+    fft_reg_map.bind_module_to_register(fft_block, "FFT_START")
+    fft_reg_map.bind_module_to_register(fft_block, "FFT_CONFIG")
+    fft_reg_map.write_register("FFT_CONFIG", task["fft_config"])
+
+    classifier = None
+    if task["has_model"]:
+        classifier_reg_map = ClassifierRegMap()
+        classifier = ClassifierBlock(model=model)
+        classifier.bind_input(fft_block.output_buffer)
+        classifier.bind_fft_block(fft_block)
+        if task["feature_extractor"] is not None:
+            classifier.bind_feature_extractor(task["feature_extractor"])
+        classifier.bind_registers(classifier_reg_map.get_register("CLASSIFY_TRIGGER"), classifier_reg_map.get_register("CLASSIFY_RESULT"),
+                                  classifier_reg_map.get_register("CLASSIFY_DONE"))
+        classifier_reg_map.bind_module_to_register(classifier, "CLASSIFY_TRIGGER")
+
+    results = []
+    dropped = 0
+    start = time.perf_counter()
+    for frame in frames:
+        fft_block.input_buffer.writeBuffer(frame)
+        fft_reg_map.write_register("FFT_START", 1)
+        if not fft_block.done:
+            # Skipped frame (padding behaviour 1 with a short frame): the output buffer still holds the previous spectrum
+            dropped += 1
+            continue
+        if classifier is not None:
+            classifier_reg_map.write_register("CLASSIFY_TRIGGER", 1)
+            results.append(classifier_reg_map.read_register("CLASSIFY_RESULT"))
+        else:
+            results.append(np.array(fft_block.get_output()))
+    busy = time.perf_counter() - start
+
+    if classifier is not None:
+        results = np.array(results)
+    stats = {
+        "frames": len(results),
+        "frames_dropped": dropped,
+        "busy_s": busy,
+        "throughput_fps": len(results) / busy if busy > 0 else 0.0,
+        "pid": os.getpid(),
+    }
+    return results, stats
@@ -0,0 +1,170 @@
+# This is the hot-path profiler of the hardware blocks:
+# When enabled, the blocks time every stage of every frame (FFT input/window/fft/scale/output, classifier
+# features/predict, register dispatch) into per-stage counters and log2 latency histograms,
+# and optionally keep the individual spans for a Chrome trace (chrome://tracing or https://ui.perfetto.dev).
+# It is off by default: the blocks only test `profiler.active is not None` once per stage.
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# The enabled profiler (None when profiling is off), read by the instrumented blocks:
+active = None
+# Spans kept for the trace before the oldest ones are dropped from the export:
+DEFAULT_MAX_EVENTS = 1000000
+# Histogram buckets: bucket k counts durations in [2**k, 2**(k+1)) ns
+HISTOGRAM_BUCKETS = 40
+
+now_ns = time.perf_counter_ns
+
+class StageCounter:
+    __slots__ = ("count", "total_ns", "min_ns", "max_ns", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, duration):
+        self.count += 1
+        self.total_ns += duration
+        if self.min_ns is None or duration < self.min_ns:
+            self.min_ns = duration
+        if duration > self.max_ns:
+            self.max_ns = duration
+        self.histogram[min(max(duration, 1).bit_length() - 1, HISTOGRAM_BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        """
+        Approximate percentile (upper edge of the histogram bucket holding it), in ns.
+        """
+        if self.count == 0:
+            return 0
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target:
+                return min(2 ** (bucket + 1), self.max_ns)
+        return self.max_ns
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total_ns / 1e6,
+            "mean_us": self.total_ns / self.count / 1e3 if self.count else 0.0,
+            "min_us": (self.min_ns or 0) / 1e3,
+            "max_us": self.max_ns / 1e3,
+            "p50_us": self.percentile(0.5) / 1e3,
+            "p99_us": self.percentile(0.99) / 1e3,
+        }
+
+class Profiler:
+    def __init__(self, trace=True, max_events=DEFAULT_MAX_EVENTS):
+        """
+        Create a profiler. With trace=True the spans are also kept (the newest max_events) for the Chrome trace export.
+        """
+        self.trace = trace
+        self.max_events = max_events
+        self.stages = {}   # stage name -> StageCounter
+        self.events = deque(maxlen=max_events) # (name, category, start ns, duration ns, thread id, args), newest spans kept
+        self.dropped_events = 0
+        self.origin_ns = now_ns()
+        self.lock = threading.Lock()
+
+    def record(self, name, start_ns, end_ns, category="block", args=None):
+        """
+        Record a span of a stage.
+        """
+        duration = end_ns - start_ns
+        with self.lock:
+            counter = self.stages.get(name)
+            if counter is None:
+                counter = self.stages[name] = StageCounter()
+            counter.add(duration)
+            if self.trace:
+                if len(self.events) == self.max_events:
+                    self.dropped_events += 1 # the oldest span is pushed out
+                self.events.append((name, category, start_ns, duration, threading.get_ident(), args))
+
+    @contextmanager
+    def span(self, name, category="user", args=None):
+        """
+        Time a block of code as a stage (for driver code, the blocks record their stages directly).
+        """
+        start = now_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start, now_ns(), category, args)
+
+    def summary(self):
+        """
+        Get the per-stage counters (count, total, mean/min/max and p50/p99 from the histogram).
+        """
+        with self.lock:
+            return {name: counter.summary() for name, counter in sorted(self.stages.items())}
+
+    def histogram(self, name):
+        """
+        Get the log2 histogram of a stage as {bucket lower bound in ns: count} (non-empty buckets).
+        """
+        counter = self.stages.get(name)
+        if counter is None:
+            raise ValueError(f"No profiled stage named {name}")
+        return {2 ** bucket: count for bucket, count in enumerate(counter.histogram) if count}
+
+    def chrome_trace(self):
+        """
+        Build the Chrome trace-event document of the recorded spans (complete "X" events, microseconds).
+        """
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+        traceEvents = []
+        for name, category, start, duration, tid, args in events:
+            event = {"name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+                     "ts": (start - self.origin_ns) / 1e3, "dur": duration / 1e3}
+            if args:
+                event["args"] = args
+            traceEvents.append(event)
+        return {"traceEvents": traceEvents, "displayTimeUnit": "ns",
+                "otherData": {"dropped_events": self.dropped_events}}
+
+    def export_chrome_trace(self, path):
+        """
+        Write the recorded spans to a Chrome trace JSON file.
+        """
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+            self.events.clear()
+            self.dropped_events = 0
+            self.origin_ns = now_ns()
+
+    def __repr__(self):
+        return f"Profiler(stages={len(self.stages)}, events={len(self.events)}, trace={self.trace})"
+
+def enable(trace=True, max_events=DEFAULT_MAX_EVENTS):
+    """
+    Turn profiling on for all the blocks and return the (new) active profiler.
+    """
+    global active
+    active = Profiler(trace=trace, max_events=max_events)
+    return active
+
+def disable():
+    """
+    Turn profiling off, returning the profiler that was active (its data stays readable).
+    """
+    global active
+    profiler, active = active, None
+    return profiler
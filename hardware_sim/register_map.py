@@ -2,6 +2,8 @@
 # This file contains the register map for the hardware simulation.
 # The register map is a dictionary that maps register names to their addresses and sizes.
 # To access the register map use the registerEntry class:
+from functools import partial
+from hardware_sim import profiler
 
 class RegisterEntry:
     def __init__(self, name, address, size, access_type="rw", bind = None):
@@ -21,6 +23,7 @@ class RegisterEntry:
         self.access_type = access_type
         self.bind = bind
         self.value = 0 # Default value
+        self.max_value = 2 ** (size * 8) # Values must be below this (precomputed for the write path)
 
     def read(self):
         """
@@ -42,6 +45,36 @@ class RegisterEntry:
     def __str__(self):
         return f"RegisterEntry: {self.name} at address {self.address} with size {self.size} and access type {self.access_type}, bund {self.bind}"
 
+## This is a compiled dispatch entry of a register:
+# The write handler of the bound module is resolved once (at bind time) instead of on every write.
+# The same entry object is shared by the name and the address lookup tables.
+# The values stay on the RegisterEntry objects rather than in a flat numpy/array register file: the blocks hold and
+# write their output registers directly, and in CPython an attribute read is cheaper than indexing a numpy or
+# array buffer (which boxes a new scalar on every read).
+class DispatchEntry:
+    __slots__ = ("reg", "module", "handler")
+
+    def __init__(self, reg):
+        self.reg = reg
+        self.resolve()
+
+    def resolve(self):
+        """
+        Resolve the handler of the module bound to the register.
+        """
+        module = self.reg.bind
+        self.module = module
+        if module is None:
+            self.handler = None
+        elif hasattr(module, f"handle_{self.reg.name}"):
+            self.handler = getattr(module, f"handle_{self.reg.name}")
+        else:
+            # Fallback: the generic update(name, value) of the module
+            self.handler = partial(module.update, self.reg.name)
+
+    def __repr__(self):
+        return f"DispatchEntry(reg={self.reg.name}, module={type(self.module).__name__}, handler={self.handler})"
+
 ## This is the base class for the register map:
 # This class is used to read and write registers, and to bind modules to registers.
 # It is a base class and should be inherited by other register maps.
@@ -49,6 +82,8 @@ class BaseRegisterMap:
     def __init__(self):
         self.register_map = {}
         self.bound_modules = {}
+        self.dispatch = {}         # name -> DispatchEntry
+        self.address_table = None  # flat list indexed by register (base) address -> DispatchEntry
 
     def read_register(self, name):
         """
@@ -67,25 +102,108 @@ class BaseRegisterMap:
         """
         Write a value to a register.
         """
-        # Check if the register exists
-        if name not in self.register_map:
-            raise ValueError(f"Register {name} does not exist")
+        entry = self.dispatch.get(name)
+        if entry is None:
+            entry = self.compile_register(name)
+        self.write_entry(entry, value)
+
+    def write_entry(self, entry, value):
+        """
+        Write a value through a compiled dispatch entry.
+        """
+        reg = entry.reg
+        prof = profiler.active
+        if prof is not None:
+            start = profiler.now_ns()
         # Check if the value is within the range of the register size
-        reg = self.register_map[name]
-        if value < 0 or value >= 2 ** (reg.size * 8):
-            raise ValueError(f"Value {value} is out of range for register {name}")
+        if value < 0 or value >= reg.max_value:
+            raise ValueError(f"Value {value} is out of range for register {reg.name}")
         # Write the value to the register
         if reg.access_type == "r":
-            raise PermissionError(f"Register {name} is read-only")
+            raise PermissionError(f"Register {reg.name} is read-only")
         
         reg.value = value
-        
-        if reg.bind is not None:
-            if hasattr(reg.bind, f"handle_{name}"):
-                handler = getattr(reg.bind, f"handle_{name}")
-                handler(value)
-            else:
-                reg.bind.update(name, value)
+
+        # The module may have been bound by setting reg.bind directly, re-resolve in that case
+        if entry.module is not reg.bind:
+            entry.resolve()
+        if entry.handler is not None:
+            entry.handler(value)
+        if prof is not None:
+            # The span includes the handler (e.g. a whole FFT run for FFT_START)
+            prof.record(f"register.{reg.name}", start, profiler.now_ns(), "register")
+
+    def write_registers(self, values):
+        """
+        Burst write: write many registers in one call, in order.
+        values is a dict or an iterable of (name, value) pairs (write the start/trigger register last).
+        """
+        if isinstance(values, dict):
+            values = values.items()
+        dispatch = self.dispatch
+        for name, value in values:
+            entry = dispatch.get(name)
+            if entry is None:
+                entry = self.compile_register(name)
+            self.write_entry(entry, value)
+
+    def read_address(self, address):
+        """
+        Read a register value by its (base) address.
+        """
+        table = self.address_table
+        entry = table[address] if table is not None and 0 <= address < len(table) else None
+        if entry is None:
+            entry = self.get_address_entry(address)
+        reg = entry.reg
+        if reg.access_type == "w":
+            raise PermissionError(f"Register {reg.name} is write-only")
+        return reg.value
+
+    def write_address(self, address, value):
+        """
+        Write a value to a register by its (base) address.
+        """
+        table = self.address_table
+        entry = table[address] if table is not None and 0 <= address < len(table) else None
+        if entry is None:
+            entry = self.get_address_entry(address)
+        self.write_entry(entry, value)
+
+    def get_address_entry(self, address):
+        """
+        Get the dispatch entry of the register at an address (rebuilding the address table if needed).
+        """
+        table = self.build_address_table()
+        if 0 <= address < len(table) and table[address] is not None:
+            return table[address]
+        raise ValueError(f"No register at address 0x{address:02X}")
+
+    def compile_register(self, name):
+        """
+        Build the dispatch entry of a register.
+        """
+        # Check if the register exists
+        if name not in self.register_map:
+            raise ValueError(f"Register {name} does not exist")
+        entry = DispatchEntry(self.register_map[name])
+        self.dispatch[name] = entry
+        return entry
+
+    def build_address_table(self):
+        """
+        Build the flat address -> dispatch entry table (multi-byte registers are indexed by their base address),
+        so an address access is one list index plus the entry's register value.
+        """
+        for name in self.register_map:
+            if name not in self.dispatch:
+                self.compile_register(name)
+        size = max((reg.address for reg in self.register_map.values()), default=-1) + 1
+        table = [None] * size
+        for entry in self.dispatch.values():
+            table[entry.reg.address] = entry
+        self.address_table = table
+        return table
 
     def bind_module_to_register(self, module, register_name):
         """
@@ -96,6 +214,12 @@ class BaseRegisterMap:
             raise ValueError(f"Register {register_name} does not exist")
         # Bind the module to the register
         self.register_map[register_name].bind = module
+        # Resolve the write handler now, not on every write
+        entry = self.dispatch.get(register_name)
+        if entry is None:
+            self.compile_register(register_name)
+        else:
+            entry.resolve()
 
     def update(self):
         for reg in self.register_map.values():
@@ -123,6 +247,9 @@ class FFtRegisterMap(BaseRegisterMap):
             "FFT_STATUS":   RegisterEntry("FFT_STATUS", 0x0E, 1, "r"),   # Status register
             "WINDOW_SIZE":  RegisterEntry("WINDOW_SIZE", 0x0F, 1, "rw"), # Window size
             "WINDOW_TYPE":  RegisterEntry("WINDOW_TYPE", 0x10, 1, "rw"), # Window type
+            "WINDOW_HOP":   RegisterEntry("WINDOW_HOP", 0x11, 2, "rw"),  # STFT hop in samples (0 - STFT off)
+            "FFT_PERF_FRAMES":  RegisterEntry("FFT_PERF_FRAMES", 0x13, 4, "r"),  # Frames processed (while profiling)
+            "FFT_PERF_LAST_NS": RegisterEntry("FFT_PERF_LAST_NS", 0x17, 4, "r"), # Duration of the last run in ns (while profiling)
         }
 
     def __repr__(self):
@@ -144,10 +271,60 @@ class ClassifierRegMap(BaseRegisterMap):
             "CLASSIFY_RESULT":       RegisterEntry("CLASSIFY_RESULT", 0x21, 1, "r"),
             "CLASSIFY_DONE":         RegisterEntry("CLASSIFY_DONE", 0x22, 1, "r"), 
             "CLASSIFY_MODEL_SELECT": RegisterEntry("CLASSIFY_MODEL_SELECT", 0x23, 1, "rw"), # Model select
+            "CLASSIFY_BATCH_SIZE":   RegisterEntry("CLASSIFY_BATCH_SIZE", 0x24, 1, "rw"),   # Micro-batch size (0/1 - off)
+            "CLASSIFY_PERF_FRAMES":  RegisterEntry("CLASSIFY_PERF_FRAMES", 0x25, 4, "r"),  # Frames classified (while profiling)
+            "CLASSIFY_PERF_LAST_NS": RegisterEntry("CLASSIFY_PERF_LAST_NS", 0x29, 4, "r"), # Duration of the last predict in ns (while profiling)
         }
 
     def __repr__(self):
         return f"ClassifierRegMap(register_map={self.register_map})"
     
     def __str__(self):
-        return f"ClassifierRegMap: {self.register_map}"
\ No newline at end of file
+        return f"ClassifierRegMap: {self.register_map}"
+
+class DmaRegMap(BaseRegisterMap):
+    def __init__(self):
+        """
+        This is the DmaRegMap class:
+        """
+        super().__init__()
+        # Initialize the register map:
+        # Register map
+        self.register_map = {
+            "DMA_SRC":        RegisterEntry("DMA_SRC", 0x30, 1, "rw"),        # Source endpoint id
+            "DMA_DST":        RegisterEntry("DMA_DST", 0x31, 1, "rw"),        # Destination endpoint id
+            "DMA_SRC_OFFSET": RegisterEntry("DMA_SRC_OFFSET", 0x32, 4, "rw"), # Sample offset in a host array source
+            "DMA_DST_OFFSET": RegisterEntry("DMA_DST_OFFSET", 0x36, 4, "rw"), # Sample offset in a host array destination
+            "DMA_LENGTH":     RegisterEntry("DMA_LENGTH", 0x3A, 4, "rw"),     # Transfer length in samples
+            "DMA_START":      RegisterEntry("DMA_START", 0x3E, 1, "rw"),      # Start the transfer
+            "DMA_DONE":       RegisterEntry("DMA_DONE", 0x3F, 1, "r"),        # Done signal
+        }
+
+    def __repr__(self):
+        return f"DmaRegMap(register_map={self.register_map})"
+    
+    def __str__(self):
+        return f"DmaRegMap: {self.register_map}"
+
+class FeatureRegMap(BaseRegisterMap):
+    def __init__(self):
+        """
+        This is the FeatureRegMap class:
+        """
+        super().__init__()
+        # Initialize the register map:
+        # Register map
+        self.register_map = {
+            "FEATURE_START":      RegisterEntry("FEATURE_START", 0x40, 1, "rw"),      # Start the feature extraction
+            "FEATURE_DONE":       RegisterEntry("FEATURE_DONE", 0x41, 1, "r"),        # Done signal
+            "FEATURE_SELECT":     RegisterEntry("FEATURE_SELECT", 0x42, 1, "rw"),     # Feature set bitmask
+            "FEATURE_BANDS":      RegisterEntry("FEATURE_BANDS", 0x43, 1, "rw"),      # Number of energy bands
+            "FEATURE_DECIMATION": RegisterEntry("FEATURE_DECIMATION", 0x44, 1, "rw"), # Bins per decimated feature
+            "FEATURE_COUNT":      RegisterEntry("FEATURE_COUNT", 0x45, 2, "r"),       # Feature vector length
+        }
+
+    def __repr__(self):
+        return f"FeatureRegMap(register_map={self.register_map})"
+    
+    def __str__(self):
+        return f"FeatureRegMap: {self.register_map}"
@@ -0,0 +1,165 @@
+# This is the result sink block (the append-only columnar log of the classifier results):
+# Every classified frame appends one row (frame index, timestamp, label, FFT config, model id and optionally the
+# class probabilities) to preallocated column chunks. A full chunk is written to disk as an uncompressed .npz
+# segment and the same arrays are reused, so the memory stays bounded however long the run is.
+# ResultReader memory maps the segments back for analysis (nothing is read until it is used).
+import os
+import numpy as np
+from general.helper_functions import load_npz_mmap
+
+# Rows kept in memory before a segment is written:
+DEFAULT_CHUNK_SIZE = 65536
+# Column name -> dtype (probabilities is an extra (rows, classes) float32 column when enabled)
+RESULT_COLUMNS = {
+    "frame": np.int64,       # frame index of the classifier
+    "timestamp": np.float64, # seconds (simulated time with an event kernel, time.perf_counter() otherwise)
+    "label": np.int32,       # predicted class
+    "fft_config": np.uint32, # FFT_CONFIG word the frame was processed with
+    "model_id": np.int16,    # CLASSIFY_MODEL_SELECT slot (-1: model given by path)
+}
+SEGMENT_PREFIX = "results_"
+SEGMENT_SUFFIX = ".npz"
+
+def get_segment_paths(directory):
+    """
+    Get the segment files of a result log directory, in write order.
+    """
+    if not os.path.isdir(directory):
+        return []
+    names = [name for name in os.listdir(directory) if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)]
+    return [os.path.join(directory, name) for name in sorted(names)]
+
+class ResultSink:
+    def __init__(self, directory, chunk_size=DEFAULT_CHUNK_SIZE, num_classes=None):
+        """
+        Create a sink writing segments of chunk_size rows to directory (appending after the segments already there).
+        With num_classes the class probabilities of every frame are logged as well.
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1")
+        if num_classes is not None and num_classes < 1:
+            raise ValueError("Number of classes must be at least 1")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.num_classes = num_classes
+        # Preallocated once, reused after every flush
+        self.columns = {name: np.zeros(chunk_size, dtype=dtype) for name, dtype in RESULT_COLUMNS.items()}
+        if num_classes is not None:
+            self.columns["probabilities"] = np.zeros((chunk_size, num_classes), dtype=np.float32)
+        self.fill = 0              # rows in the current chunk
+        self.rows_flushed = 0      # rows already written to segments
+        self.segment_index = len(get_segment_paths(directory))
+        self.segments_written = 0
+        self.closed = False
+
+    def append(self, frame, label, timestamp, fft_config=0, model_id=-1, probabilities=None):
+        """
+        Append the result of a single frame.
+        """
+        self.append_batch([frame], [label], timestamp, fft_config, model_id,
+                          None if probabilities is None else np.reshape(probabilities, (1, -1)))
+
+    def append_batch(self, frames, labels, timestamp, fft_config=0, model_id=-1, probabilities=None):
+        """
+        Append the results of a batch of frames (timestamp, fft_config and model_id are per batch or per frame).
+        """
+        if self.closed:
+            raise ValueError("Result sink is closed")
+        frames = np.asarray(frames)
+        numRows = len(frames)
+        if len(labels) != numRows:
+            raise ValueError(f"Got {len(labels)} labels for {numRows} frames")
+        if self.num_classes is not None:
+            if probabilities is None:
+                raise ValueError("This result sink logs probabilities, but none were given")
+            probabilities = np.asarray(probabilities)
+            if probabilities.shape != (numRows, self.num_classes):
+                raise ValueError(f"Probabilities must have shape {(numRows, self.num_classes)}, got {probabilities.shape}")
+        values = {"frame": frames, "label": labels, "timestamp": timestamp, "fft_config": fft_config, "model_id": model_id}
+
+        # Copy into the current chunk, writing a segment every time it fills up
+        done = 0
+        while done < numRows:
+            count = min(numRows - done, self.chunk_size - self.fill)
+            rows = slice(self.fill, self.fill + count)
+            for name, value in values.items():
+                self.columns[name][rows] = value[done:done + count] if np.ndim(value) else value
+            if probabilities is not None:
+                self.columns["probabilities"][rows] = probabilities[done:done + count]
+            self.fill += count
+            done += count
+            if self.fill == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        """
+        Write the rows of the current chunk to a new segment (nothing is written for an empty chunk).
+        Returns the segment path, or None.
+        """
+        if self.fill == 0:
+            return None
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{self.segment_index:06d}{SEGMENT_SUFFIX}")
+        # Written under a temporary name, so a reader never sees a partial segment
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(f, **{name: column[:self.fill] for name, column in self.columns.items()})
+        os.replace(temp_path, path)
+        self.segment_index += 1
+        self.segments_written += 1
+        self.rows_flushed += self.fill
+        self.fill = 0
+        return path
+
+    def close(self):
+        """
+        Flush the last partial chunk and close the sink.
+        """
+        if not self.closed:
+            self.flush()
+            self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.rows_flushed + self.fill
+
+    def __repr__(self):
+        return f"ResultSink(directory={self.directory}, rows={len(self)}, segments={self.segments_written}, chunk_size={self.chunk_size})"
+
+class ResultReader:
+    def __init__(self, directory):
+        """
+        Open a result log directory written by a ResultSink (the segments are memory mapped).
+        """
+        self.directory = directory
+        self.segment_paths = get_segment_paths(directory)
+        if not self.segment_paths:
+            raise FileNotFoundError(f"No result segments found in {directory}")
+        with np.load(self.segment_paths[0]) as segment:
+            self.column_names = list(segment.files)
+
+    def segments(self):
+        """
+        Iterate over the segments, as dicts of memory mapped columns.
+        """
+        for path in self.segment_paths:
+            yield load_npz_mmap(path, self.column_names)
+
+    def column(self, name):
+        """
+        Get a whole column, concatenated over all the segments.
+        """
+        if name not in self.column_names:
+            raise ValueError(f"Invalid result column {name}. Valid options are: {self.column_names}")
+        return np.concatenate([load_npz_mmap(path, [name])[name] for path in self.segment_paths])
+
+    def __len__(self):
+        return sum(len(segment["frame"]) for segment in self.segments())
+
+    def __repr__(self):
+        return f"ResultReader(directory={self.directory}, segments={len(self.segment_paths)}, columns={self.column_names})"
@@ -1 +1,184 @@
 # The system runner file orchestrates the full pipeline
+# I/Q input -> FFT block -> feature extraction -> classifier block -> result registers
+# Every stage runs on its own worker thread, and the stages are linked by bounded queues (backpressure).
+# NumPy FFTs and sklearn predictions release the GIL, so consecutive frames overlap across the stages.
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# End of stream marker passed down the queues:
+STOP = object()
+# How often (seconds) a blocked stage checks whether the pipeline was aborted:
+POLL_INTERVAL = 0.1
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.busy_time = 0.0
+        self.max_queue_depth = 0
+        self.queue_depth_total = 0
+
+    def record(self, busy_time, queue_depth):
+        self.frames += 1
+        self.busy_time += busy_time
+        self.queue_depth_total += queue_depth
+        self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+    def summary(self, elapsed):
+        return {
+            "frames": self.frames,
+            "busy_s": self.busy_time,
+            "throughput_fps": self.frames / elapsed if elapsed > 0 else 0.0,
+            "utilization": self.busy_time / elapsed if elapsed > 0 else 0.0,
+            "max_queue_depth": self.max_queue_depth,
+            "mean_queue_depth": self.queue_depth_total / self.frames if self.frames else 0.0,
+        }
+
+    def __repr__(self):
+        return f"StageStats(name={self.name}, frames={self.frames}, busy_time={self.busy_time:.6f})"
+
+class SystemRunner:
+    def __init__(self, fft_block, fft_reg_map, classifier_block=None, queue_depth=8, feature_extractor=None):
+        """
+        Build a pipelined runner around an FFT block (bound to FFT_START in fft_reg_map) and an optional classifier block.
+        The feature stage uses the feature extractor block if given (magnitude spectrum otherwise).
+        """
+        if queue_depth < 1:
+            raise ValueError("Queue depth must be at least 1")
+        self.fft_block = fft_block
+        self.fft_reg_map = fft_reg_map
+        self.classifier_block = classifier_block
+        self.feature_extractor = feature_extractor
+        self.queue_depth = queue_depth
+        self.stats = {}
+        self.elapsed = 0.0
+        self._abort = threading.Event()
+        self._error = None
+
+    def run(self, frames):
+        """
+        Stream the I/Q frames through the pipeline and return the per-frame results in order
+        (classifier labels, or FFT outputs when no classifier block is attached).
+        """
+        stages = [("fft", self.fft_stage), ("features", self.feature_stage)]
+        if self.classifier_block is not None:
+            stages.append(("classify", self.classify_stage))
+        queues = [queue.Queue(maxsize=self.queue_depth) for _ in range(len(stages) + 1)]
+        self.stats = {"input": StageStats("input")}
+        self.stats.update({name: StageStats(name) for name, _ in stages})
+        self._abort.clear()
+        self._error = None
+        results = []
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(stages) + 1) as pool:
+            pool.submit(self._run_source, frames, queues[0])
+            for index, (name, work) in enumerate(stages):
+                pool.submit(self._run_stage, name, work, queues[index], queues[index + 1])
+            # The caller's thread drains the last queue (the result registers side):
+            while True:
+                item = queues[-1].get()
+                if item is STOP:
+                    break
+                results.append(item[1])
+        self.elapsed = time.perf_counter() - start
+
+        if self._error is not None:
+            raise self._error
+        return results
+
+    def fft_stage(self, frame):
+        """
+        Load a frame into the FFT block and trigger it through the FFT_START register.
+        """
+        if self.fft_block.input_buffer is not None:
+            self.fft_block.input_buffer.writeBuffer(frame)
+        else:
+            self.fft_block.load_input(frame)
+        self.fft_reg_map.write_register("FFT_START", 1)
+        # No new spectrum when the FFT block skipped the frame (e.g. a short frame without padding),
+        # the output buffer still holds the previous one
+        if not self.fft_block.done:
+            return None
+        output = self.fft_block.get_output()
+        # The output buffer is reused by the next frame, so the next stage gets its own copy
+        return None if output is None else np.array(output)
+
+    def feature_stage(self, spectrum):
+        """
+        Extract the classifier features (magnitude spectrum without a feature extractor block).
+        """
+        if self.feature_extractor is not None:
+            return self.feature_extractor.extract(spectrum)
+        return np.abs(spectrum)
+
+    def classify_stage(self, features):
+        """
+        Classify the features and update the classifier result registers.
+        """
+        return self.classifier_block.classify(features)
+
+    def get_stats(self):
+        """
+        Get the per-stage throughput and queue depth statistics of the last run.
+        """
+        return {name: stats.summary(self.elapsed) for name, stats in self.stats.items()}
+
+    def _run_source(self, frames, out_queue):
+        stats = self.stats["input"]
+        try:
+            for index, frame in enumerate(frames):
+                if self._abort.is_set():
+                    break
+                stats.record(0.0, out_queue.qsize())
+                self._put(out_queue, (index, frame))
+        except Exception as e:
+            self._fail(e)
+        self._put(out_queue, STOP, force=True)
+
+    def _run_stage(self, name, work, in_queue, out_queue):
+        stats = self.stats[name]
+        try:
+            while True:
+                queue_depth = in_queue.qsize()
+                item = in_queue.get()
+                if item is STOP:
+                    break
+                if self._abort.is_set():
+                    continue # drain until the end of stream marker
+                index, data = item
+                begin = time.perf_counter()
+                result = work(data)
+                stats.record(time.perf_counter() - begin, queue_depth)
+                if result is not None: # e.g. the FFT block waiting for more samples
+                    self._put(out_queue, (index, result))
+        except Exception as e:
+            self._fail(e)
+        self._put(out_queue, STOP, force=True)
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+        self._abort.set()
+
+    def _put(self, out_queue, item, force=False):
+        # Blocks while the downstream queue is full (backpressure), unless the pipeline was aborted
+        while True:
+            if self._abort.is_set() and not force:
+                return
+            try:
+                out_queue.put(item, timeout=POLL_INTERVAL)
+                return
+            except queue.Full:
+                if self._abort.is_set():
+                    # Make room for the end of stream marker so the consumer can finish
+                    try:
+                        out_queue.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def __repr__(self):
+        return f"SystemRunner(fft_block={self.fft_block}, classifier_block={self.classifier_block}, queue_depth={self.queue_depth})"
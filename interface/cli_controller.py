@@ -6,10 +6,38 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from hardware_sim.register_map import FFtRegisterMap
 from hardware_sim.fft_block import FftBlock
 from hardware_sim.buffer import Buffer
+from hardware_sim.capture_reader import CaptureReader
 from general.helper_functions import create_fft_config, generate_single_tone, get_fft_size
+import argparse
+import contextlib
+import json
 import math
+import time
 import numpy as np
 
+# Commands accepted in batch mode, with their (min, max) number of arguments:
+BATCH_COMMANDS = {
+    "set_reg": (2, 2),
+    "get_reg": (1, 1),
+    "dump_reg": (0, 0),
+    "run_fft": (0, 0),
+    "run_pipeline": (1, 4),
+}
+
+def parse_value(text):
+    """
+    Parse a register value typed in the CLI or a script: 0x hex, 0b binary or decimal (zero padded decimals such as 010 included).
+    """
+    try:
+        return int(text, 0)
+    except ValueError:
+        pass
+    try:
+        # int(text, 0) rejects leading zeros, those are read as decimal
+        return int(text, 10)
+    except ValueError:
+        raise ValueError(f"Invalid value {text}, expected a decimal or 0x hex number")
+
 def cli_controller(register_map, fft_block):
     """
     Command-line interface to control the FFT block and register map.
@@ -20,14 +48,18 @@ def cli_controller(register_map, fft_block):
         print("2. Read Register - get_reg")
         print("3. View All Registers - dump_reg")
         print("4. Run FFT Flow - run_fft")
-        print("5. Exit - exit")
+        print("5. Run Capture Pipeline - run_pipeline <file> [frames] [offset] [loop]")
+        print("6. Exit - exit")
         
         choice = input("Enter your choice: ")
         choice = choice.split(" ")
         if choice[0] == "set_reg":
+            if len(choice) < 3:
+                print("Usage: set_reg <register> <value>")
+                continue
             reg_name = choice[1]
-            value = int(choice[2])
             try:
+                value = parse_value(choice[2])
                 register_map.write_register(reg_name, value)
                 print(f"Written {value} to {reg_name}")
             except Exception as e:
@@ -48,6 +80,18 @@ def cli_controller(register_map, fft_block):
         elif choice[0] == "run_fft":
             run_fft_flow(register_map, fft_block)
             # Load input data into the FFT block
+
+        elif choice[0] == "run_pipeline":
+            if len(choice) < 2:
+                print("Usage: run_pipeline <file> [frames] [offset] [loop]")
+                continue
+            try:
+                frame_count = int(choice[2]) if len(choice) > 2 else None
+                start_offset = int(choice[3]) if len(choice) > 3 else 0
+                loop = len(choice) > 4 and choice[4] == "1"
+                run_pipeline_flow(register_map, fft_block, choice[1], frame_count=frame_count, start_offset=start_offset, loop=loop)
+            except Exception as e:
+                print(f"Error: {e}")
                     
         elif choice[0] == 'exit':
             print("Exiting...")
@@ -59,6 +103,26 @@ def cli_controller(register_map, fft_block):
 def run_fft_flow(register_map, fft_block):
     print("Running FFT flow...")
 
+    # 1-2. Make sure FFT_CONFIG is set and get the FFT size from it
+    fft_size = ensure_fft_config(register_map)
+
+    # 3. Generate a signal
+    input_signal = generate_single_tone(frequency_bin=5, fft_size=fft_size)
+
+    # 4. Write input to buffer
+    if fft_block.input_buffer is not None:
+        fft_block.input_buffer.writeBuffer(input_signal)
+    else:
+        print("Warning: No input buffer bound to FFTBlock.")
+
+    # 5. Start FFT
+    register_map.write_register("FFT_START", 1)
+    print("FFT triggered.")
+
+def ensure_fft_config(register_map):
+    """
+    Apply the default FFT_CONFIG if none is set, and return the FFT size it selects.
+    """
     # 1. Check if FFT_CONFIG is already set
     try:
         config_value = register_map.read_register("FFT_CONFIG")
@@ -85,17 +149,170 @@ def run_fft_flow(register_map, fft_block):
     if fft_size is None:
         print("Unknown FFT size code. Defaulting to 64.")
         fft_size = 64
+    return fft_size
 
-    # 3. Generate a signal
-    input_signal = generate_single_tone(frequency_bin=5, fft_size=fft_size)
+def run_pipeline_flow(register_map, fft_block, path, fmt=None, frame_count=None, start_offset=0, loop=False):
+    """
+    Stream a capture file (memory mapped, frame by frame) through the FFT block.
+    """
+    print(f"Running pipeline on {path}...")
+    if fft_block.input_buffer is None:
+        raise ValueError("No input buffer bound to FFTBlock")
+    fft_size = ensure_fft_config(register_map)
+    reader = CaptureReader(path, fft_size, fmt=fmt, start_offset=start_offset, frame_count=frame_count, loop=loop)
 
-    # 4. Write input to buffer
-    if fft_block.input_buffer:
-        fft_block.input_buffer.writeBuffer(input_signal)
-    else:
-        print("Warning: No input buffer bound to FFTBlock.")
+    frames = 0
+    start = time.perf_counter()
+    for frame in reader:
+        reader.feed(fft_block.input_buffer, frame)
+        register_map.write_register("FFT_START", 1)
+        frames += 1
+    elapsed = time.perf_counter() - start
+    rate = frames / elapsed if elapsed > 0 else 0.0
+    print(f"Processed {frames} frames of {fft_size} samples in {elapsed:.3f} s ({rate:.1f} frames/s)")
+    return frames
 
-    # 5. Start FFT
-    register_map.write_register("FFT_START", 1)
-    print("FFT triggered.")
+class ScriptCommand:
+    """
+    A parsed batch command (register names are resolved to dispatch entries at parse time).
+    """
+    __slots__ = ("line", "name", "args", "entry")
+
+    def __init__(self, line, name, args, entry=None):
+        self.line = line
+        self.name = name
+        self.args = args
+        self.entry = entry
+
+    def __repr__(self):
+        return f"ScriptCommand(line={self.line}, name={self.name}, args={self.args})"
+
+def parse_script(lines, register_map):
+    """
+    Parse batch commands up front (one per line, '#' starts a comment, values are decimal or 0x hex).
+    Raises ValueError with the line number on the first invalid command, before anything runs.
+    """
+    commands = []
+    for line_number, line in enumerate(lines, start=1):
+        tokens = line.split("#", 1)[0].split()
+        if not tokens:
+            continue
+        name, args = tokens[0], tokens[1:]
+        if name not in BATCH_COMMANDS:
+            raise ValueError(f"Line {line_number}: unknown command {name}. Valid options are: {list(BATCH_COMMANDS.keys())}")
+        minArgs, maxArgs = BATCH_COMMANDS[name]
+        if not minArgs <= len(args) <= maxArgs:
+            raise ValueError(f"Line {line_number}: {name} takes {minArgs} to {maxArgs} arguments, got {len(args)}")
+        entry = None
+        try:
+            if name in ("set_reg", "get_reg"):
+                # Resolved once, the run loop writes through the compiled dispatch entry
+                entry = register_map.dispatch.get(args[0]) or register_map.compile_register(args[0])
+            if name == "set_reg":
+                args = [args[0], parse_value(args[1])]
+            elif name == "run_pipeline":
+                args = [args[0]] + [parse_value(arg) for arg in args[1:]]
+        except ValueError as e:
+            raise ValueError(f"Line {line_number}: {e}")
+        commands.append(ScriptCommand(line_number, name, args, entry))
+    return commands
+
+def run_script(commands, register_map, fft_block, out, stop_on_error=False):
+    """
+    Run parsed batch commands, writing one JSON line per command and a final summary line to `out`.
+    The menu and the per-command prints of the flows are suppressed. Returns the summary.
+    """
+    errors = 0
+    executed = 0
+    start = time.perf_counter()
+    # The flows print progress for the interactive mode, batch output is the JSON lines only
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for command in commands:
+            record = {"line": command.line, "cmd": command.name}
+            try:
+                record.update(run_command(command, register_map, fft_block))
+                record["ok"] = True
+            except Exception as e:
+                record["ok"] = False
+                record["error"] = str(e)
+                errors += 1
+            executed += 1
+            out.write(json.dumps(record) + "\n")
+            if errors and stop_on_error:
+                break
+    elapsed = time.perf_counter() - start
+    summary = {
+        "commands": executed,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "commands_per_s": executed / elapsed if elapsed > 0 else 0.0,
+    }
+    out.write(json.dumps({"summary": summary}) + "\n")
+    return summary
+
+def run_command(command, register_map, fft_block):
+    """
+    Run a single parsed batch command and return its result fields.
+    """
+    if command.name == "set_reg":
+        register_map.write_entry(command.entry, command.args[1])
+        return {"reg": command.args[0], "value": command.args[1]}
+    if command.name == "get_reg":
+        reg = command.entry.reg
+        if reg.access_type == "w":
+            raise PermissionError(f"Register {reg.name} is write-only")
+        return {"reg": reg.name, "value": reg.value}
+    if command.name == "dump_reg":
+        return {"registers": {reg_name: reg.value for reg_name, reg in register_map.register_map.items()}}
+    if command.name == "run_fft":
+        run_fft_flow(register_map, fft_block)
+        output = fft_block.get_output()
+        return {"fft_size": fft_block.getFFTSize(), "peak_bin": None if output is None else int(np.argmax(np.abs(output)))}
+    # run_pipeline <file> [frames] [offset] [loop]
+    args = command.args
+    frames = run_pipeline_flow(register_map, fft_block, args[0], frame_count=args[1] if len(args) > 1 else None,
+                               start_offset=args[2] if len(args) > 2 else 0, loop=len(args) > 3 and args[3] == 1)
+    return {"frames": frames}
+
+def build_system():
+    """
+    Build the default FFT system the CLI controls (buffers and register bindings).
+    """
+    fft_block = FftBlock()
+    fft_block.bind_input_output(Buffer(max_size=4096), Buffer(max_size=4096))
+    register_map = FFtRegisterMap()
+    register_map.bind_module_to_register(fft_block, "FFT_START")
+    register_map.bind_module_to_register(fft_block, "FFT_CONFIG")
+    return register_map, fft_block
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Control the simulated FFT block through its registers")
+    parser.add_argument("--script", help="Run the commands of a script file ('-' for stdin) in batch mode instead of the interactive menu")
+    parser.add_argument("--output", help="Write the batch JSON lines to this file (default: stdout)")
+    parser.add_argument("--stop-on-error", action="store_true", help="Stop the batch at the first failing command")
+    args = parser.parse_args(argv)
+
+    register_map, fft_block = build_system()
+    if args.script is None:
+        cli_controller(register_map, fft_block)
+        return 0
+    if args.script == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(args.script) as f:
+            lines = f.read().splitlines()
+    try:
+        commands = parse_script(lines, register_map)
+    except ValueError as e:
+        # Nothing is run when the script does not parse
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.output:
+        with open(args.output, "w") as out:
+            summary = run_script(commands, register_map, fft_block, out, args.stop_on_error)
+    else:
+        summary = run_script(commands, register_map, fft_block, sys.stdout, args.stop_on_error)
+    return 1 if summary["errors"] else 0
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+# This is the on-disk dataset cache of the training scripts:
+# A generated dataset is stored as X.npy / y.npy under a key hashed from everything that determines its content
+# (generator parameters, seed, feature extractor configuration and generator version), and memory mapped on reuse,
+# so runs that only change the classifier hyperparameters skip the generation.
+# The cache is bounded in size: the least recently used entries are evicted first.
+import os
+import hashlib
+import json
+import shutil
+import time
+import numpy as np
+from ml_module.dataset_generator import generate_dataset_batched, GENERATOR_VERSION, BATCH_ELEMENTS
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), "dataset_cache")
+# Total size of the cached datasets before the oldest ones are evicted:
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+META_FILE = "meta.json"
+
+def dataset_params(num_samples, fft_size=64, noise_ratio=0.33, possible_tones=2, seed=None, feature_extractor=None):
+    """
+    Get the parameters identifying a generated dataset (the content of its cache key).
+    """
+    features = None
+    if feature_extractor is not None:
+        features = {"feature_select": feature_extractor.feature_select, "bands": feature_extractor.bands,
+                    "decimation": feature_extractor.decimation}
+    return {
+        "generator": "generate_dataset_batched",
+        "generator_version": GENERATOR_VERSION,
+        "batch_elements": BATCH_ELEMENTS, # the batch size changes how the random draws are split
+        "num_samples": int(num_samples),
+        "fft_size": int(fft_size),
+        "noise_ratio": float(noise_ratio),
+        "possible_tones": int(possible_tones),
+        "seed": seed,
+        "features": features,
+    }
+
+def dataset_key(params):
+    """
+    Hash dataset parameters into a cache key.
+    """
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:32]
+
+class DatasetCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Open (or create) a dataset cache folder holding up to max_bytes of datasets.
+        """
+        if max_bytes <= 0:
+            raise ValueError("Cache size must be positive")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, key):
+        """
+        Get the cached (X, y) of a key, memory mapped read-only (None if it is not cached).
+        """
+        entryDir = os.path.join(self.cache_dir, key)
+        metaPath = os.path.join(entryDir, META_FILE)
+        # meta.json is written last, an entry without it is incomplete
+        if not os.path.isfile(metaPath):
+            return None
+        X = np.load(os.path.join(entryDir, "X.npy"), mmap_mode="r")
+        y = np.load(os.path.join(entryDir, "y.npy"), mmap_mode="r")
+        # The modification time of meta.json is the last use time (for the eviction)
+        os.utime(metaPath)
+        return X, y
+
+    def put(self, key, X, y, params=None):
+        """
+        Store a dataset under a key, evicting old entries if the cache grows over its size.
+        Returns the stored arrays memory mapped.
+        """
+        entryDir = os.path.join(self.cache_dir, key)
+        # Written to a temporary folder and renamed, so a concurrent reader never sees a partial entry
+        tempDir = os.path.join(self.cache_dir, f".{key}.{os.getpid()}.tmp")
+        os.makedirs(tempDir, exist_ok=True)
+        np.save(os.path.join(tempDir, "X.npy"), X)
+        np.save(os.path.join(tempDir, "y.npy"), y)
+        with open(os.path.join(tempDir, META_FILE), "w") as f:
+            json.dump({"params": params, "created": time.time(), "shape": list(np.shape(X))}, f, indent=2)
+        try:
+            os.rename(tempDir, entryDir)
+        except OSError:
+            # Another process stored the same dataset first
+            shutil.rmtree(tempDir, ignore_errors=True)
+        self.evict(keep=key)
+        return self.get(key)
+
+    def get_or_generate(self, num_samples, fft_size=64, noise_ratio=0.33, possible_tones=2, seed=None, feature_extractor=None):
+        """
+        Get a dataset of generate_dataset_batched from the cache, generating and storing it on a miss.
+        Returns (X, y, hit). Unseeded datasets are random, so they are generated every time and never cached.
+        """
+        if seed is None:
+            X, y = generate_dataset_batched(num_samples, fft_size, noise_ratio, possible_tones, feature_extractor=feature_extractor)
+            return X, y, False
+        params = dataset_params(num_samples, fft_size, noise_ratio, possible_tones, seed, feature_extractor)
+        key = dataset_key(params)
+        cached = self.get(key)
+        if cached is not None:
+            return cached[0], cached[1], True
+        X, y = generate_dataset_batched(num_samples, fft_size, noise_ratio, possible_tones, seed=seed, feature_extractor=feature_extractor)
+        X, y = self.put(key, X, y, params)
+        return X, y, False
+
+    def entries(self):
+        """
+        Get the complete cache entries as (key, size in bytes, last use time), least recently used first.
+        """
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            entryDir = os.path.join(self.cache_dir, key)
+            metaPath = os.path.join(entryDir, META_FILE)
+            if key.startswith(".") or not os.path.isfile(metaPath):
+                continue
+            size = sum(os.path.getsize(os.path.join(entryDir, name)) for name in os.listdir(entryDir))
+            entries.append((key, size, os.path.getmtime(metaPath)))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        """
+        Remove the least recently used entries until the cache fits in max_bytes (the `keep` entry is never removed).
+        Returns the evicted keys.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+            total -= size
+            evicted.append(key)
+        return evicted
+
+    def clear(self):
+        for key, _, _ in self.entries():
+            shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+
+    def __repr__(self):
+        return f"DatasetCache(cache_dir={self.cache_dir}, max_bytes={self.max_bytes})"
@@ -6,6 +6,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from general.helper_functions import generate_single_tone, generate_mixed_tones, generate_noise
 import math
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
 def generate_dataset(num_samples, fft_size=64, noise_ratio=0.33):
@@ -29,6 +30,127 @@ def generate_dataset(num_samples, fft_size=64, noise_ratio=0.33):
     y = np.array(y)
     return X, y
 
+# Number of signal samples (rows * fft_size) synthesized at once by the batched generator:
+BATCH_ELEMENTS = 1 << 20
+# Version of the batched generator output, part of the dataset cache keys (bump it when generate_batch changes what a seed produces):
+GENERATOR_VERSION = 2
+
+def generate_dataset_batched(num_samples, fft_size=64, noise_ratio=0.33, possible_tones=2, seed=None, feature_extractor=None):
+    """
+    Vectorized version of generate_dataset, driven by a seeded np.random.Generator.
+    Labels, tone bins and noise are drawn for a whole batch of rows at once and one batched FFT is run per batch.
+    The output follows the same distribution as generate_dataset.
+    With a feature extractor block the rows are its features instead of the magnitude spectra (same features as at runtime).
+    """
+    check_tone_bins(fft_size, possible_tones)
+    rng = np.random.default_rng(seed)
+    X = np.empty((num_samples, get_row_size(fft_size, feature_extractor)))
+    y = np.empty(num_samples, dtype=np.int64)
+    batchRows = max(1, BATCH_ELEMENTS // fft_size)
+    for start in range(0, num_samples, batchRows):
+        stop = min(start + batchRows, num_samples)
+        X[start:stop], y[start:stop] = generate_batch(rng, stop - start, fft_size, noise_ratio, possible_tones, feature_extractor)
+    return X, y
+
+def check_tone_bins(fft_size, possible_tones):
+    """
+    Check that the FFT size has enough bins (1..fft_size//2-1) for possible_tones distinct tones.
+    """
+    numBins = fft_size // 2 - 1
+    if possible_tones < 1 or numBins < possible_tones:
+        raise ValueError(f"FFT size {fft_size} has {max(numBins, 0)} tone bins, {possible_tones} distinct tones do not fit")
+
+def get_row_size(fft_size, feature_extractor=None):
+    """
+    Number of columns of the dataset: the FFT size, or the feature vector length with a feature extractor.
+    """
+    if feature_extractor is None:
+        return fft_size
+    return feature_extractor.get_feature_size(fft_size)
+
+def generate_batch(rng, num_samples, fft_size, noise_ratio=0.33, possible_tones=2, feature_extractor=None):
+    """
+    Generate one batch of magnitude spectra (or extracted features) and labels with the given random generator.
+    """
+    check_tone_bins(fft_size, possible_tones)
+    # Labels: noise with probability noise_ratio, otherwise 1..possible_tones tones (label = tones - 1)
+    isNoise = rng.random(num_samples) < noise_ratio
+    numTones = rng.integers(1, possible_tones + 1, size=num_samples)
+    labels = np.where(isNoise, 2, numTones - 1)
+
+    signals = np.zeros((num_samples, fft_size), dtype=complex)
+    # Noise rows: complex Gaussian noise with unit average power
+    noiseRows = np.flatnonzero(isNoise)
+    signals[noiseRows] = (rng.standard_normal((len(noiseRows), fft_size)) + 1j * rng.standard_normal((len(noiseRows), fft_size))) / np.sqrt(2)
+
+    # Tone rows: distinct random bins out of 1..fft_size//2-1, summed with broadcasting
+    toneRows = np.flatnonzero(~isNoise)
+    numBins = fft_size // 2 - 1
+    if len(toneRows) > 0:
+        # The smallest possible_tones of a row of random keys is a uniformly drawn set of distinct bins
+        bins = rng.random((len(toneRows), numBins)).argpartition(possible_tones - 1, axis=1)[:, :possible_tones] + 1
+        active = np.arange(possible_tones) < numTones[toneRows, None]
+        n = np.arange(fft_size)
+        toneSignals = np.zeros((len(toneRows), fft_size), dtype=complex)
+        for k in range(possible_tones):
+            tone = np.exp(1j * 2 * np.pi * bins[:, k, None] * n / fft_size)
+            toneSignals += tone * active[:, k, None]
+        signals[toneRows] = toneSignals
+
+    fft_result = np.fft.fft(signals, axis=-1)
+    if feature_extractor is not None:
+        return feature_extractor.extract(fft_result), labels
+    return np.abs(fft_result), labels
+
+
+# Rows per chunk of the parallel generator, every chunk gets its own random stream:
+PARALLEL_CHUNK_ROWS = 16384
+
+def generate_dataset_to_npy(out_dir, num_samples, fft_size=64, noise_ratio=0.33, possible_tones=2, seed=None,
+                            n_jobs=None, dtype=np.float32, chunk_rows=PARALLEL_CHUNK_ROWS, feature_extractor=None):
+    """
+    Generate a dataset straight into X.npy / y.npy files in out_dir, in chunks spread over a process pool.
+    Every chunk draws from its own SeedSequence-spawned stream, so the result only depends on the seed
+    (and chunk_rows), not on the number of workers. Returns the arrays memory mapped read-only.
+    """
+    check_tone_bins(fft_size, possible_tones)
+    os.makedirs(out_dir, exist_ok=True)
+    xPath = os.path.join(out_dir, "X.npy")
+    yPath = os.path.join(out_dir, "y.npy")
+    # Create the files with their final shape, the workers fill them in place
+    X = np.lib.format.open_memmap(xPath, mode="w+", dtype=dtype, shape=(num_samples, get_row_size(fft_size, feature_extractor)))
+    y = np.lib.format.open_memmap(yPath, mode="w+", dtype=np.int64, shape=(num_samples,))
+    del X, y
+
+    starts = range(0, num_samples, chunk_rows)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    tasks = [(xPath, yPath, start, min(start + chunk_rows, num_samples), fft_size, noise_ratio, possible_tones, chunkSeed, feature_extractor)
+             for start, chunkSeed in zip(starts, seeds)]
+    if n_jobs == 1 or len(tasks) <= 1:
+        for task in tasks:
+            generate_chunk_to_npy(task)
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            list(pool.map(generate_chunk_to_npy, tasks))
+
+    return np.load(xPath, mmap_mode="r"), np.load(yPath, mmap_mode="r")
+
+def generate_chunk_to_npy(task):
+    """
+    Generate the rows [start, stop) of a dataset into its memory mapped X/y files (process pool worker).
+    """
+    xPath, yPath, start, stop, fft_size, noise_ratio, possible_tones, chunkSeed, feature_extractor = task
+    X = np.load(xPath, mmap_mode="r+")
+    y = np.load(yPath, mmap_mode="r+")
+    rng = np.random.default_rng(chunkSeed)
+    batchRows = max(1, BATCH_ELEMENTS // fft_size)
+    for batchStart in range(start, stop, batchRows):
+        batchStop = min(batchStart + batchRows, stop)
+        X[batchStart:batchStop], y[batchStart:batchStop] = generate_batch(rng, batchStop - batchStart, fft_size, noise_ratio, possible_tones, feature_extractor)
+    X.flush()
+    y.flush()
+    return stop - start
+
 
 def main():
     # Example usage
@@ -0,0 +1,182 @@
+# This is the incremental trainer of the classifier:
+# Instead of regenerating the whole dataset and refitting the forest, the model is updated chunk by chunk:
+#   forest                 : warm_start growth, every chunk fits new trees on that chunk only (old trees are kept)
+#   sgd / naive_bayes / mlp: partial_fit models, every chunk updates the model in place
+# so an update costs the new data, not the total dataset size. Snapshots of the model can be published to
+# the ModelRegistry slots while the simulator runs (the next CLASSIFY_MODEL_SELECT write switches to them).
+# sklearn and joblib are only imported when a model is built or published, not when this module is imported.
+import os
+import copy
+import time
+import numpy as np
+from ml_module.dataset_generator import generate_batch
+from model.rf_classifier import export_forest
+
+# Models the trainer can build, by name:
+MODEL_TYPES = ("forest", "sgd", "naive_bayes", "mlp")
+# Labels of the generated datasets (single tone, two tones, noise):
+DEFAULT_CLASSES = (0, 1, 2)
+DEFAULT_CHUNK_SIZE = 4096
+DEFAULT_ESTIMATORS_PER_CHUNK = 10
+
+def stream_chunks(num_samples, chunk_size=DEFAULT_CHUNK_SIZE, fft_size=64, noise_ratio=0.33, possible_tones=2, seed=None, feature_extractor=None):
+    """
+    Generate a dataset chunk by chunk, yielding (X, y) chunks of up to chunk_size rows (only one chunk is in memory).
+    """
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be at least 1")
+    rng = np.random.default_rng(seed)
+    for start in range(0, num_samples, chunk_size):
+        yield generate_batch(rng, min(chunk_size, num_samples - start), fft_size, noise_ratio, possible_tones, feature_extractor)
+
+def iter_array_chunks(X, y, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream captured features (e.g. memory mapped X.npy / y.npy) chunk by chunk.
+    """
+    if len(X) != len(y):
+        raise ValueError(f"Got {len(y)} labels for {len(X)} rows")
+    for start in range(0, len(X), chunk_size):
+        yield np.asarray(X[start:start + chunk_size]), np.asarray(y[start:start + chunk_size])
+
+def build_model(model_type, estimators_per_chunk=DEFAULT_ESTIMATORS_PER_CHUNK, random_state=None):
+    """
+    Build an untrained model of a type of MODEL_TYPES.
+    """
+    if model_type == "forest":
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(n_estimators=estimators_per_chunk, warm_start=True, random_state=random_state)
+    if model_type == "sgd":
+        from sklearn.linear_model import SGDClassifier
+        return SGDClassifier(loss="log_loss", random_state=random_state)
+    if model_type == "naive_bayes":
+        from sklearn.naive_bayes import GaussianNB
+        return GaussianNB()
+    if model_type == "mlp":
+        from sklearn.neural_network import MLPClassifier
+        return MLPClassifier(hidden_layer_sizes=(64,), random_state=random_state)
+    raise ValueError(f"Invalid model type {model_type}. Valid options are: {list(MODEL_TYPES)}")
+
+class IncrementalTrainer:
+    def __init__(self, model=None, model_type="forest", estimators_per_chunk=DEFAULT_ESTIMATORS_PER_CHUNK,
+                 max_estimators=None, classes=DEFAULT_CLASSES, random_state=None):
+        """
+        Create a trainer updating `model` (a RandomForestClassifier to grow, or any partial_fit model),
+        or a new model of model_type. A forest gets estimators_per_chunk new trees per chunk and keeps
+        the newest max_estimators trees (None: all of them).
+        """
+        if estimators_per_chunk < 1:
+            raise ValueError("Estimators per chunk must be at least 1")
+        if max_estimators is not None and max_estimators < estimators_per_chunk:
+            raise ValueError("Max estimators cannot be less than the estimators per chunk")
+        if model is None:
+            model = build_model(model_type, estimators_per_chunk, random_state)
+        from sklearn.ensemble import RandomForestClassifier
+        if isinstance(model, RandomForestClassifier):
+            # Growing an existing forest: the trees it has are kept, new ones are added per chunk
+            model.set_params(warm_start=True)
+            self.warm_start = True
+        elif hasattr(model, "partial_fit"):
+            self.warm_start = False
+        else:
+            raise TypeError("Model must be a RandomForestClassifier or have a partial_fit method")
+        self.model = model
+        self.estimators_per_chunk = estimators_per_chunk
+        self.max_estimators = max_estimators
+        self.classes = np.asarray(classes)
+        self.random_state = random_state
+        self.chunks_seen = 0
+        self.samples_seen = 0
+        self.version = 0   # published snapshots
+        self.history = []  # per-chunk update statistics
+
+    def is_fitted(self):
+        if self.warm_start:
+            return len(getattr(self.model, "estimators_", [])) > 0
+        return hasattr(self.model, "classes_")
+
+    def update(self, X, y):
+        """
+        Update the model with a chunk of data and return the update statistics.
+        """
+        X = np.asarray(X)
+        y = np.asarray(y)
+        start = time.perf_counter()
+        if self.warm_start:
+            # The new trees only see this chunk, so it must hold every class (the forest averages per-class probabilities)
+            chunkClasses = np.unique(y)
+            if not np.array_equal(chunkClasses, self.classes):
+                raise ValueError(f"Chunk has the classes {chunkClasses.tolist()}, a forest chunk needs all of {self.classes.tolist()}")
+            grown = len(self.model.estimators_) + self.estimators_per_chunk if self.is_fitted() else self.estimators_per_chunk
+            # A new seed per chunk, the new trees do not repeat the bootstrap draws of the previous chunks
+            if self.random_state is not None:
+                self.model.random_state = self.random_state + self.chunks_seen
+            self.model.set_params(n_estimators=grown)
+            self.model.fit(X, y)
+            if self.max_estimators is not None and len(self.model.estimators_) > self.max_estimators:
+                # Sliding window: the oldest trees are dropped
+                self.model.estimators_ = self.model.estimators_[-self.max_estimators:]
+                self.model.set_params(n_estimators=self.max_estimators)
+        else:
+            self.model.partial_fit(X, y, classes=self.classes)
+        elapsed = time.perf_counter() - start
+        self.chunks_seen += 1
+        self.samples_seen += len(y)
+        stats = {"chunk": self.chunks_seen, "rows": len(y), "seconds": elapsed, "samples_seen": self.samples_seen}
+        if self.warm_start:
+            stats["n_estimators"] = len(self.model.estimators_)
+        self.history.append(stats)
+        return stats
+
+    def fit_stream(self, chunks, registry=None, slot=None, publish_dir=None, publish_every=1):
+        """
+        Train on a stream of (X, y) chunks. With a registry, a snapshot is published to the slot every publish_every chunks
+        (and after the last one). Returns the update statistics of the chunks.
+        """
+        if registry is not None and (slot is None or publish_dir is None):
+            raise ValueError("Publishing needs a slot and a publish folder")
+        stats = []
+        for X, y in chunks:
+            stats.append(self.update(X, y))
+            if registry is not None and self.chunks_seen % publish_every == 0:
+                self.publish(registry, slot, publish_dir)
+        if registry is not None and self.chunks_seen % publish_every != 0:
+            self.publish(registry, slot, publish_dir)
+        return stats
+
+    def snapshot(self):
+        """
+        Get a copy of the current model that later updates do not change.
+        """
+        if not self.is_fitted():
+            raise ValueError("The model has not been trained yet")
+        if self.warm_start:
+            # The fitted trees are never modified, only the list of trees grows: copying the list is enough
+            model = copy.copy(self.model)
+            model.estimators_ = list(self.model.estimators_)
+            return model
+        return copy.deepcopy(self.model)
+
+    def publish(self, registry, slot, directory, name="incremental"):
+        """
+        Save a snapshot to a new versioned file and point a registry slot at it (no restart needed).
+        Forests are exported to .npz node arrays (memory mapped by the registry), other models to .joblib.
+        Returns the snapshot path.
+        """
+        snapshot = self.snapshot()
+        os.makedirs(directory, exist_ok=True)
+        self.version += 1
+        if self.warm_start:
+            path = export_forest(snapshot, os.path.join(directory, f"{name}_v{self.version:04d}.npz"))
+            registry.publish(slot, path)
+        else:
+            import joblib
+            path = os.path.join(directory, f"{name}_v{self.version:04d}.joblib")
+            joblib.dump(snapshot, path)
+            registry.publish(slot, path, model=snapshot)
+        return path
+
+    def score(self, X, y):
+        return self.model.score(X, y)
+
+    def __repr__(self):
+        return f"IncrementalTrainer(model={type(self.model).__name__}, chunks_seen={self.chunks_seen}, samples_seen={self.samples_seen}, version={self.version})"
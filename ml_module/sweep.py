@@ -0,0 +1,210 @@
+# This is the hyperparameter and FFT size sweep of the classifier:
+# Models are trained over a grid of FFT sizes, tree counts and depths in a process pool, then every model is
+# measured for accuracy and inference latency (a single frame on the array engine the simulator runs .npz forests on,
+# and a batch of frames on sklearn). The report holds the latency/accuracy Pareto front, and the most accurate
+# model within a latency budget is written for every CLASSIFY_MODEL_SELECT slot of the registry.
+#
+#   python ml_module/sweep.py --fft-sizes 64 128 512 --n-estimators 10 50 100 --max-depths 0 8 16 --n-jobs 4 --latency-budget-us 500 --write-slots
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import argparse
+import itertools
+import json
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+from ml_module.dataset_cache import DatasetCache, DEFAULT_CACHE_DIR
+from hardware_sim.model_registry import DEFAULT_MODEL_PATHS
+from model.rf_classifier import ArrayForest, export_forest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "sweep")
+# FFT size of the model of each CLASSIFY_MODEL_SELECT slot the sweep builds
+# (slot 1, the SNR augmented model, needs an augmented dataset and is not built here):
+SLOT_FFT_SIZES = {0: 64, 2: 128, 3: 512}
+# Fraction of every dataset kept for the accuracy and latency measurements:
+TEST_FRACTION = 0.3
+# Frames per predict call of the batched latency:
+LATENCY_BATCH = 256
+
+def build_grid(fft_sizes, n_estimators, max_depths):
+    """
+    Get the sweep points, one dict per (fft size, tree count, depth) combination (depth None: unlimited).
+    """
+    return [{"fft_size": fft_size, "n_estimators": trees, "max_depth": depth}
+            for fft_size, trees, depth in itertools.product(fft_sizes, n_estimators, max_depths)]
+
+def load_dataset(cache_dir, num_samples, fft_size, seed):
+    """
+    Get the (cached, memory mapped) dataset of an FFT size, split into train and test rows.
+    The rows are i.i.d., so a contiguous split keeps both sets as memory mapped views.
+    """
+    X, y, _ = DatasetCache(cache_dir).get_or_generate(num_samples, fft_size, seed=seed)
+    split = int(num_samples * (1 - TEST_FRACTION))
+    return X[:split], y[:split], X[split:], y[split:]
+
+def train_point(task):
+    """
+    Train the model of a sweep point and save it (process pool worker). Returns the point with its accuracy and paths.
+    """
+    point = task["point"]
+    X_train, y_train, X_test, y_test = load_dataset(task["cache_dir"], task["num_samples"], point["fft_size"], task["seed"])
+    clf = RandomForestClassifier(n_estimators=point["n_estimators"], max_depth=point["max_depth"], random_state=task["seed"])
+    start = time.perf_counter()
+    clf.fit(X_train, y_train)
+    trainTime = time.perf_counter() - start
+    name = f"rf_fft{point['fft_size']}_t{point['n_estimators']}_d{point['max_depth'] or 0}"
+    modelPath = os.path.join(task["output_dir"], name + ".joblib")
+    joblib.dump(clf, modelPath)
+    forestPath = export_forest(clf, os.path.join(task["output_dir"], name + ".npz"))
+    return dict(point, name=name, accuracy=float(clf.score(X_test, y_test)), train_s=trainTime,
+                model_path=modelPath, forest_path=forestPath)
+
+def time_predict(predict, X, repeat=5, min_time=0.02):
+    """
+    Median seconds of a predict call over `repeat` rounds (each round runs for at least min_time seconds).
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            predict(X)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            predict(X)
+        rounds.append((time.perf_counter() - start) / number)
+    return float(np.median(rounds))
+
+def measure_latency(result, X_test):
+    """
+    Measure the per-frame latency (array engine, one frame) and the batched latency per frame (sklearn, LATENCY_BATCH frames).
+    """
+    forest = ArrayForest.load(result["forest_path"])
+    clf = joblib.load(result["model_path"])
+    frame = np.asarray(X_test[:1])
+    batch = np.asarray(X_test[:LATENCY_BATCH])
+    result["frame_latency_us"] = time_predict(forest.predict, frame) * 1e6
+    result["batch_latency_us"] = time_predict(clf.predict, batch, repeat=3) / len(batch) * 1e6
+    return result
+
+def pareto_front(results, latency_key="frame_latency_us"):
+    """
+    Get the results no other result beats on both latency and accuracy, fastest first.
+    """
+    front = []
+    for result in sorted(results, key=lambda r: (r[latency_key], -r["accuracy"])):
+        # Sorted by latency: a result is on the front if it is more accurate than every faster one
+        if not front or result["accuracy"] > front[-1]["accuracy"]:
+            front.append(result)
+    return front
+
+def select_models(results, latency_budget_us=None, latency_key="frame_latency_us"):
+    """
+    Pick the model of every slot: the most accurate one of its FFT size within the latency budget
+    (the fastest one when none fits the budget). Returns slot -> result.
+    """
+    selection = {}
+    for slot, fft_size in SLOT_FFT_SIZES.items():
+        candidates = [r for r in results if r["fft_size"] == fft_size]
+        if not candidates:
+            continue
+        within = [r for r in candidates if latency_budget_us is None or r[latency_key] <= latency_budget_us]
+        if within:
+            selection[slot] = max(within, key=lambda r: (r["accuracy"], -r[latency_key]))
+        else:
+            selection[slot] = min(candidates, key=lambda r: r[latency_key])
+    return selection
+
+def write_slot_models(selection, slot_dir=ROOT):
+    """
+    Copy the selected models to the registry slot paths (DEFAULT_MODEL_PATHS, under slot_dir), with their .npz forests.
+    Returns slot -> path.
+    """
+    paths = {}
+    for slot, result in selection.items():
+        path = os.path.join(slot_dir, DEFAULT_MODEL_PATHS[slot])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(result["model_path"], path)
+        shutil.copyfile(result["forest_path"], os.path.splitext(path)[0] + ".npz")
+        paths[slot] = path
+    return paths
+
+def run_sweep(grid, num_samples=20000, seed=42, n_jobs=None, output_dir=DEFAULT_OUTPUT_DIR, cache_dir=DEFAULT_CACHE_DIR,
+              latency_budget_us=None):
+    """
+    Train the grid in a process pool, measure every model and build the report (results, Pareto front, slot selection).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    # The datasets are generated once here, the workers memory map them from the cache
+    datasets = {fft_size: load_dataset(cache_dir, num_samples, fft_size, seed) for fft_size in sorted(set(p["fft_size"] for p in grid))}
+    tasks = [{"point": point, "num_samples": num_samples, "seed": seed, "output_dir": output_dir, "cache_dir": cache_dir}
+             for point in grid]
+    start = time.perf_counter()
+    if n_jobs == 1 or len(tasks) <= 1:
+        results = [train_point(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            results = list(pool.map(train_point, tasks))
+    trainTime = time.perf_counter() - start
+    # Latency is measured after the pool is done, one model at a time, so the timings do not compete for the cores
+    for result in results:
+        measure_latency(result, datasets[result["fft_size"]][2])
+
+    selection = select_models(results, latency_budget_us)
+    return {
+        "meta": {"num_samples": num_samples, "seed": seed, "n_jobs": n_jobs, "train_s": trainTime,
+                 "latency_budget_us": latency_budget_us, "latency_batch": LATENCY_BATCH},
+        "results": results,
+        "pareto_front": [r["name"] for r in pareto_front(results)],
+        "pareto_front_batch": [r["name"] for r in pareto_front(results, "batch_latency_us")],
+        "selection": {slot: result["name"] for slot, result in selection.items()},
+    }
+
+def print_report(report):
+    front = set(report["pareto_front"])
+    selected = {name: slot for slot, name in report["selection"].items()}
+    print(f"{'model':28s} {'accuracy':>9s} {'frame us':>10s} {'batch us/frame':>15s} {'train s':>8s}")
+    for r in sorted(report["results"], key=lambda r: r["frame_latency_us"]):
+        marks = ("*" if r["name"] in front else " ") + (f" slot {selected[r['name']]}" if r["name"] in selected else "")
+        print(f"{r['name']:28s} {r['accuracy'] * 100:8.2f}% {r['frame_latency_us']:10.1f} {r['batch_latency_us']:15.2f} {r['train_s']:8.2f} {marks}")
+    print("* Pareto front (frame latency vs accuracy)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep the classifier over FFT sizes, tree counts and depths")
+    parser.add_argument("--fft-sizes", type=int, nargs="+", default=list(SLOT_FFT_SIZES.values()), help="FFT sizes of the datasets")
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=[10, 50, 100], help="Tree counts")
+    parser.add_argument("--max-depths", type=int, nargs="+", default=[0, 8, 16], help="Tree depths (0: unlimited)")
+    parser.add_argument("--num-samples", type=int, default=20000, help="Samples per dataset")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the datasets and the forests")
+    parser.add_argument("--n-jobs", type=int, default=None, help="Worker processes for the training")
+    parser.add_argument("--latency-budget-us", type=float, default=None, help="Per-frame latency budget of the slot models")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="Folder of the trained models and the report")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Dataset cache folder")
+    parser.add_argument("--write-slots", action="store_true", help="Write the selected models to the registry slot paths")
+    args = parser.parse_args(argv)
+
+    grid = build_grid(args.fft_sizes, args.n_estimators, [depth or None for depth in args.max_depths])
+    report = run_sweep(grid, args.num_samples, args.seed, args.n_jobs, args.output_dir, args.cache_dir, args.latency_budget_us)
+    print_report(report)
+    reportPath = os.path.join(args.output_dir, "report.json")
+    with open(reportPath, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to {reportPath}")
+    if args.write_slots:
+        results = {r["name"]: r for r in report["results"]}
+        for slot, path in write_slot_models({slot: results[name] for slot, name in report["selection"].items()}).items():
+            print(f"Slot {slot}: {report['selection'][slot]} -> {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,9 +3,14 @@
 
 import os
 import sys
+import argparse
 import numpy as np
-from dataset_generator import generate_dataset
+from dataset_generator import generate_dataset_batched, generate_dataset_to_npy
+from dataset_cache import DatasetCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+from incremental_trainer import IncrementalTrainer, stream_chunks, MODEL_TYPES, DEFAULT_CHUNK_SIZE, DEFAULT_ESTIMATORS_PER_CHUNK
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from hardware_sim.feature_extractor import FeatureExtractorBlock, DEFAULT_BANDS, DEFAULT_DECIMATION
+from model.rf_classifier import export_forest
 # These are the libraries for the ML:
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
@@ -14,19 +19,82 @@ from sklearn.metrics import classification_report, accuracy_score
 import joblib
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the RandomForest signal classifier")
+    parser.add_argument("--num-samples", type=int, default=40000, help="Number of generated samples")
+    parser.add_argument("--fft-size", type=int, default=64, help="FFT size of the generated spectra")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the dataset generator")
+    parser.add_argument("--n-estimators", type=int, default=100, help="Trees of the forest (see ml_module/sweep.py to pick them by latency)")
+    parser.add_argument("--max-depth", type=int, default=0, help="Depth limit of the trees (0: unlimited)")
+    parser.add_argument("--dataset-dir", default=None,
+                        help="Generate the dataset into memory mapped .npy files in this folder (for datasets larger than RAM)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Dataset cache folder (generated datasets are reused across runs)")
+    parser.add_argument("--cache-max-bytes", type=int, default=DEFAULT_MAX_BYTES, help="Size of the dataset cache before old entries are evicted")
+    parser.add_argument("--no-cache", action="store_true", help="Always generate the dataset, without the cache")
+    parser.add_argument("--n-jobs", type=int, default=None, help="Worker processes for the dataset generation")
+    parser.add_argument("--feature-select", type=lambda value: int(value, 0), default=None,
+                        help="FEATURE_SELECT bitmask of the feature extractor (default: magnitude spectrum, no extractor)")
+    parser.add_argument("--feature-bands", type=int, default=DEFAULT_BANDS, help="FEATURE_BANDS of the feature extractor")
+    parser.add_argument("--feature-decimation", type=int, default=DEFAULT_DECIMATION, help="FEATURE_DECIMATION of the feature extractor")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Train chunk by chunk on streamed data (a warm started forest or a partial_fit model)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk of the incremental mode")
+    parser.add_argument("--model-type", choices=MODEL_TYPES, default="forest", help="Model of the incremental mode")
+    parser.add_argument("--estimators-per-chunk", type=int, default=DEFAULT_ESTIMATORS_PER_CHUNK, help="Trees added per chunk to the forest")
+    parser.add_argument("--max-estimators", type=int, default=None, help="Keep only the newest trees of the forest")
+    parser.add_argument("--warm-start-from", default=None, help="Keep growing (or updating) this .joblib model instead of a new one")
+    return parser.parse_args(argv)
+
+def train_incremental(args, feature_extractor=None):
+    """
+    Incremental mode: update the model chunk by chunk on streamed data, then evaluate it on a held-out set.
+    """
+    model = joblib.load(args.warm_start_from) if args.warm_start_from else None
+    trainer = IncrementalTrainer(model, model_type=args.model_type, estimators_per_chunk=args.estimators_per_chunk,
+                                 max_estimators=args.max_estimators, random_state=42)
+    chunks = stream_chunks(args.num_samples, args.chunk_size, args.fft_size, seed=args.seed, feature_extractor=feature_extractor)
+    for stats in trainer.fit_stream(chunks):
+        print(f"Chunk {stats['chunk']}: {stats['rows']} rows in {stats['seconds']:.2f} s")
+    # Held-out set from another seed (30% of the training size, as in the full training)
+    X_test, y_test = generate_dataset_batched(max(1, int(args.num_samples * 0.3)), args.fft_size, seed=args.seed + 1,
+                                              feature_extractor=feature_extractor)
+    return trainer.model, X_test, y_test
+
+def main(argv=None):
     # Parameters:
-    num_samples = 40000
-    fft_size = 64
-    # Generate Dataset
-    X, y = generate_dataset(num_samples, fft_size)
+    args = parse_args(argv)
+    num_samples = args.num_samples
+    fft_size = args.fft_size
+    # The model is trained on the same features the feature extractor block computes at runtime:
+    feature_extractor = None
+    if args.feature_select is not None:
+        feature_extractor = FeatureExtractorBlock(args.feature_select, args.feature_bands, args.feature_decimation)
+        print(f"Training on {feature_extractor.get_feature_size(fft_size)} features ({feature_extractor})")
+    if args.incremental:
+        clf, X_test, y_test = train_incremental(args, feature_extractor)
+    elif args.dataset_dir:
+        # Generate the dataset on disk across a process pool:
+        X, y = generate_dataset_to_npy(args.dataset_dir, num_samples, fft_size, seed=args.seed, n_jobs=args.n_jobs,
+                                       feature_extractor=feature_extractor)
+        # The rows are i.i.d., so a contiguous split keeps both sets as memory mapped views (no copies):
+        split = int(num_samples * 0.7)
+        X_train, X_test, y_train, y_test = X[:split], X[split:], y[:split], y[split:]
+    else:
+        # Generate Dataset (vectorized and seeded, so runs are reproducible, and cached on disk by its parameters)
+        if args.no_cache:
+            X, y = generate_dataset_batched(num_samples, fft_size, seed=args.seed, feature_extractor=feature_extractor)
+        else:
+            cache = DatasetCache(args.cache_dir, args.cache_max_bytes)
+            X, y, hit = cache.get_or_generate(num_samples, fft_size, seed=args.seed, feature_extractor=feature_extractor)
+            print(f"Dataset {'loaded from' if hit else 'generated into'} the cache {args.cache_dir}")
 
-    # Split the dataset into training and testing sets
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+        # Split the dataset into training and testing sets
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
 
-    # Train the RandomForestClassifier:
-    clf = RandomForestClassifier(n_estimators=100, random_state=42)
-    clf.fit(X_train, y_train)
+    if not args.incremental:
+        # Train the RandomForestClassifier:
+        clf = RandomForestClassifier(n_estimators=args.n_estimators, max_depth=args.max_depth or None, random_state=42)
+        clf.fit(X_train, y_train)
 
     # Make predictions on the test set
     y_pred = clf.predict(X_test)
@@ -40,7 +108,11 @@ def main():
     model_path = os.path.join(os.path.dirname(__file__), 'trained_rf_classifier.joblib')
     joblib.dump(clf, model_path)
     print(f"Model saved to {model_path}")
+    # Flat node arrays for the array-backed inference engine (memory mapped at load, no unpickling)
+    if isinstance(clf, RandomForestClassifier):
+        forest_path = export_forest(clf, os.path.splitext(model_path)[0] + '.npz')
+        print(f"Forest arrays exported to {forest_path}")
 
 if __name__ == "__main__":
     main()
-    print("Training and saving the model...")
\ No newline at end of file
+    print("Training and saving the model...")
@@ -1 +1,183 @@
 # This is the RF Classifier:
+# An array-backed inference engine for the trained RandomForest.
+# export_forest flattens all the trees of a fitted sklearn forest into one set of node arrays
+# (feature, threshold, left, right, value) saved in an uncompressed .npz file.
+# ArrayForest memory maps those arrays back (no unpickling) and walks every tree for a whole batch of
+# frames at once with NumPy index arithmetic. Predictions match sklearn's predict/predict_proba exactly.
+# It is built for single frames and small batches (no validation or per estimator overhead),
+# sklearn's compiled tree walk is still faster on batches of thousands of frames.
+import os
+import numpy as np
+from general.helper_functions import load_npz_mmap
+
+# Version of the .npz layout written by export_forest:
+FOREST_FORMAT_VERSION = 1
+FOREST_ARRAYS = ("feature", "threshold", "left", "right", "value", "roots", "classes")
+# sklearn marks leaves with this child index:
+TREE_LEAF = -1
+
+def export_forest(model, path):
+    """
+    Export a fitted sklearn RandomForestClassifier (or DecisionTreeClassifier) to an .npz file of flat node arrays.
+    """
+    if not path.endswith(".npz"):
+        raise ValueError("Forest file must be a .npz file")
+    arrays = flatten_forest(model)
+    # Uncompressed (stored) members, so they can be memory mapped straight from the file
+    np.savez(path, **arrays)
+    return path
+
+def flatten_forest(model):
+    """
+    Concatenate the nodes of all the trees of a fitted forest into flat arrays (child indices are global).
+    Leaves point to themselves, so walking a fixed number of levels always ends on a leaf.
+    """
+    trees = getattr(model, "estimators_", None)
+    if trees is None:
+        if not hasattr(model, "tree_"):
+            raise TypeError("Model must be a fitted RandomForestClassifier or DecisionTreeClassifier")
+        trees = [model]
+    if getattr(model, "n_outputs_", 1) != 1:
+        raise ValueError("Only single output classifiers can be exported")
+    n_classes = len(model.classes_)
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset = 0
+    maxDepth = 0
+    for estimator in trees:
+        tree = estimator.tree_
+        nodes = np.arange(tree.node_count)
+        isLeaf = tree.children_left == TREE_LEAF
+        roots.append(offset)
+        feature.append(np.where(isLeaf, 0, tree.feature))
+        threshold.append(np.where(isLeaf, 0.0, tree.threshold))
+        left.append(np.where(isLeaf, nodes, tree.children_left) + offset)
+        right.append(np.where(isLeaf, nodes, tree.children_right) + offset)
+        # Per tree class probabilities of every node, as returned by DecisionTreeClassifier.predict_proba
+        # (sklearn < 1.4 stores weighted class counts in tree_.value, so the rows are normalized here)
+        nodeValue = tree.value[:, 0, :n_classes].astype(np.float64)
+        nodeTotal = nodeValue.sum(axis=1, keepdims=True)
+        value.append(np.divide(nodeValue, nodeTotal, out=np.zeros_like(nodeValue), where=nodeTotal > 0))
+        offset += tree.node_count
+        maxDepth = max(maxDepth, tree.max_depth)
+    return {
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "value": np.concatenate(value).astype(np.float64),
+        "roots": np.array(roots, dtype=np.int32),
+        "classes": np.asarray(model.classes_),
+        "meta": np.array([FOREST_FORMAT_VERSION, model.n_features_in_, maxDepth], dtype=np.int64),
+    }
+
+class ArrayForest:
+    """
+    RandomForest inference on flat node arrays.
+    Exposes the parts of the sklearn classifier API the simulator uses (predict, predict_proba,
+    classes_, n_features_in_), so it can replace the sklearn model in the ClassifierBlock.
+    """
+    __slots__ = ("feature", "threshold", "left", "right", "value", "roots", "classes_",
+                 "n_features_in_", "max_depth", "path")
+
+    def __init__(self, arrays, path=None):
+        version, n_features, max_depth = (int(v) for v in arrays["meta"])
+        if version != FOREST_FORMAT_VERSION:
+            raise ValueError(f"Unsupported forest format version {version}")
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.classes_ = arrays["classes"]
+        self.n_features_in_ = n_features
+        self.max_depth = max_depth
+        self.path = path
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        Build the array forest of a fitted sklearn forest in memory.
+        """
+        return cls(flatten_forest(model))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load a forest exported by export_forest, memory mapping its arrays by default.
+        """
+        if mmap:
+            arrays = load_npz_mmap(path, FOREST_ARRAYS + ("meta",))
+        else:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in FOREST_ARRAYS + ("meta",)}
+        return cls(arrays, path=os.path.abspath(path))
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def n_classes_(self):
+        return len(self.classes_)
+
+    def apply(self, X):
+        """
+        Get the leaf index (global) reached in every tree, as an (n_samples, n_trees) array.
+        All the trees are walked in lockstep, one level per step, on the (sample, tree) pairs that are not on a leaf yet.
+        """
+        X = self.check_input(X)
+        numTrees = len(self.roots)
+        nodes = np.tile(self.roots.astype(np.intp), len(X))
+        # Offset of every pair's sample row in the flattened features:
+        offsets = np.repeat(np.arange(len(X), dtype=np.intp) * X.shape[1], numTrees)
+        flatX = X.ravel()
+        active = np.arange(len(nodes))
+        current = nodes
+        for _ in range(self.max_depth):
+            # Same test as sklearn: the float32 feature value against the float64 threshold
+            goLeft = flatX[offsets + self.feature[current]] <= self.threshold[current]
+            current = np.where(goLeft, self.left[current], self.right[current])
+            nodes[active] = current
+            # Leaves point to themselves, drop the pairs that reached one
+            walking = self.left[current] != current
+            active = active[walking]
+            if len(active) == 0:
+                break
+            current = current[walking]
+            offsets = offsets[walking]
+        return nodes.reshape(len(X), numTrees)
+
+    def predict_proba(self, X):
+        """
+        Class probabilities, identical to RandomForestClassifier.predict_proba.
+        """
+        leaves = self.apply(X)
+        # sklearn adds the trees up one after the other, accumulate keeps that summation order
+        proba = np.add.accumulate(self.value[leaves], axis=1)[:, -1]
+        proba /= len(self.roots)
+        return proba
+
+    def predict(self, X):
+        """
+        Class labels, identical to RandomForestClassifier.predict.
+        """
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def check_input(self, X):
+        # sklearn runs the trees on float32 features
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, but the forest expects {self.n_features_in_} features")
+        return X
+
+    def __repr__(self):
+        return f"ArrayForest(trees={self.n_estimators}, nodes={len(self.feature)}, features={self.n_features_in_}, classes={list(self.classes_)})"
+
+def load_forest(path, mmap=True):
+    """
+    Load an exported forest (.npz) as an ArrayForest.
+    """
+    return ArrayForest.load(path, mmap=mmap)
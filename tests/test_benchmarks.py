@@ -0,0 +1,34 @@
+# This script tests the benchmark suite helpers (not the timings themselves)
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+from benchmarks.run_benchmarks import run_benchmarks, compare_results, DEFAULT_BASELINE
+
+def test_run_benchmarks_document():
+    document = run_benchmarks(["registers", "buffer"])
+    assert "numpy" in document["meta"]
+    assert "register_map.write_register[handler]" in document["results"]
+    assert all(result["seconds"] > 0 for result in document["results"].values())
+    # The results document is plain JSON
+    json.dumps(document)
+
+def test_compare_results():
+    baseline = {"results": {"a": {"seconds": 1.0, "unit": "call"}, "b": {"seconds": 2.0, "unit": "call"}}}
+    current = {"results": {"a": {"seconds": 1.2, "unit": "call"}, "b": {"seconds": 3.0, "unit": "call"}, "new": {"seconds": 5.0, "unit": "call"}}}
+    regressions = compare_results(current, baseline, threshold=0.25)
+    # Only b slowed down by more than 25%, the new benchmark has no baseline
+    assert [name for name, _, _, _ in regressions] == ["b"]
+    assert regressions[0][3] == 1.5
+
+def test_stored_baseline():
+    with open(DEFAULT_BASELINE) as f:
+        baseline = json.load(f)
+    names = baseline["results"].keys()
+    assert sum(name.startswith("fft_block.run[") for name in names) == 12 * 4
+
+if __name__ == "__main__":
+    test_run_benchmarks_document()
+    test_compare_results()
+    test_stored_baseline()
+    print("All tests passed!")
@@ -2,7 +2,9 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # This is The library for the hardware simulation:
-from hardware_sim.buffer import Buffer
+from hardware_sim.buffer import Buffer, IQ16, IQ16_SCALE
+from hardware_sim.fft_block import FftBlock
+from general.helper_functions import create_fft_config, generate_single_tone
 import numpy as np
 import math
 
@@ -60,9 +62,119 @@ def test_buffer_errors():
     except ValueError as e:
         assert str(e) == "Buffer max size cannot exceed buffer full size"
     
+def test_ring_buffer():
+    buffer = Buffer(max_size=8, bufferFullSize=6, ring=True)
+    assert buffer.isEmpty() == True
+    # Append, then consume part of the data to move the head forward
+    buffer.append([1, 2, 3, 4, 5])
+    assert len(buffer) == 5
+    assert buffer.isFull() == False
+    data_out = buffer.consume(3)
+    assert np.array_equal(data_out, np.array([1, 2, 3], dtype=complex))
+    # This append wraps around the end of the storage
+    buffer.append([6, 7, 8, 9, 10])
+    assert len(buffer) == 7
+    assert buffer.isFull() == True
+    segments = buffer.getSegments()
+    assert len(segments) == 2
+    assert np.shares_memory(segments[0], buffer.buffer) and np.shares_memory(segments[1], buffer.buffer)
+    assert np.array_equal(buffer.getBuffer(), np.array([4, 5, 6, 7, 8, 9, 10], dtype=complex))
+    # Contiguous reads are views, not copies
+    assert np.shares_memory(buffer.read(2), buffer.buffer)
+
+def test_ring_buffer_errors():
+    buffer = Buffer(max_size=4, ring=True)
+    buffer.append([1, 2, 3])
+    # Overflow is defined by the fill level, not the write size
+    try:
+        buffer.append([4, 5])
+        assert False, "Expected an overflow error"
+    except ValueError as e:
+        assert str(e) == "Buffer overflow: 2 samples written with 1 free"
+    try:
+        buffer.consume(4)
+        assert False, "Expected an underflow error"
+    except ValueError as e:
+        assert str(e) == "Buffer underflow: 4 samples requested with 3 stored"
+    # Ring buffers need a fixed capacity
+    try:
+        Buffer(ring=True)
+        assert False, "Expected a missing max size error"
+    except ValueError as e:
+        assert str(e) == "Ring buffer requires a max size"
+
+def test_ring_buffer_rejects_batches():
+    ring = Buffer(max_size=16, ring=True)
+    try:
+        ring.writeBuffer(np.ones((2, 4), dtype=complex))
+        assert False, "Expected a batch error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+    # Packed int16 I/Q pairs are still a 1-D stream of samples
+    packed = Buffer(max_size=16, ring=True, dtype=IQ16)
+    packed.writeBuffer(np.zeros((4, 2), dtype=np.int16))
+    assert len(packed) == 4
+
+    # FFT batch mode (FFT_CONFIG bit 19) needs a linear output buffer: one frame per row
+    fft_block = FftBlock()
+    fft_block.bind_input_output(Buffer(64, 64), Buffer(64, ring=True))
+    fft_block.configure(create_fft_config(fft_size_code=3, zero_padding=0, normalization=0, phase_correction=0, phase_sign=0, batch_mode=1))
+    frames = np.concatenate([generate_single_tone(frequency_bin=1, fft_size=16), generate_single_tone(frequency_bin=2, fft_size=16)])
+    fft_block.input_buffer.writeBuffer(frames)
+    try:
+        fft_block.run()
+        assert False, "Expected a batch error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+    linear = Buffer(64, 64)
+    fft_block.bind_input_output(fft_block.input_buffer, linear)
+    fft_block.input_buffer.writeBuffer(frames)
+    fft_block.run()
+    assert linear.getBuffer().shape == (2, 16)
+    assert list(np.argmax(np.abs(linear.getBuffer()), axis=1)) == [1, 2]
+
+def test_buffer_reduced_precision():
+    data = np.array([0.5 + 0.25j, -0.5 - 1j, 0.125j, 1.0])
+    # complex64 storage, handed out as complex64
+    buffer = Buffer(max_size=8, dtype=np.complex64)
+    buffer.writeBuffer(data)
+    assert buffer.getBuffer().dtype == np.complex64
+    assert np.allclose(buffer.getBuffer(), data)
+    # Packed int16 I/Q storage (quantized with the scale, clipped to the int16 range)
+    packed = Buffer(max_size=8, dtype=IQ16)
+    packed.writeBuffer(data)
+    assert packed.getRaw().dtype == np.int16 and packed.getRaw().shape == (4, 2)
+    assert packed.getRaw()[3, 0] == 32767
+    assert len(packed) == 4
+    assert packed.getBuffer().dtype == np.complex64
+    assert np.allclose(packed.getBuffer(), data, atol=IQ16_SCALE)
+    # Raw int16 pairs are stored as they are
+    packed.writeBuffer(np.array([[16384, -16384], [0, 8192]], dtype=np.int16))
+    assert len(packed) == 2
+    assert np.allclose(packed.getBuffer(), [0.5 - 0.5j, 0.25j])
+    # Packed ring buffer, wrapping around the end of the storage
+    ring = Buffer(max_size=6, ring=True, dtype=IQ16)
+    ring.append(data)
+    ring.discard(3)
+    ring.append(data)
+    assert len(ring) == 5
+    segments = ring.getSegments()
+    assert len(segments) == 2 and segments[0].dtype == np.int16
+    assert np.allclose(ring.consume(5), np.concatenate((data[3:], data)), atol=IQ16_SCALE)
+    # Only complex sample formats are supported
+    try:
+        Buffer(max_size=8, dtype=np.float32)
+        assert False, "Expected a dtype error"
+    except ValueError as e:
+        assert str(e) == "Buffer dtype must be complex64, complex128 or iq16"
+
 if __name__ == "__main__":
     test_buffer_basic()
     test_buffer_full_and_empty()
     test_buffer_clear()
     test_buffer_errors()
+    test_ring_buffer()
+    test_ring_buffer_errors()
+    test_ring_buffer_rejects_batches()
+    test_buffer_reduced_precision()
     print("All Buffer Tests Passed!")
\ No newline at end of file
@@ -0,0 +1,74 @@
+# This script tests the memory mapped I/Q capture reader and the run_pipeline CLI flow
+import numpy as np
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from hardware_sim.capture_reader import CaptureReader
+from hardware_sim.fft_block import FftBlock
+from hardware_sim.buffer import Buffer
+from hardware_sim.register_map import FFtRegisterMap
+from interface.cli_controller import run_pipeline_flow
+from general.helper_functions import generate_single_tone
+
+def make_capture(num_frames, fft_size=64):
+    return np.concatenate([generate_single_tone(frequency_bin=k % 31 + 1, fft_size=fft_size) for k in range(num_frames)])
+
+def test_capture_reader_npy(tmp_path):
+    samples = make_capture(10)
+    path = str(tmp_path / "capture.npy")
+    np.save(path, samples)
+
+    reader = CaptureReader(path, 64)
+    assert isinstance(reader.data, np.memmap)
+    frames = list(reader)
+    assert len(frames) == len(reader) == 10
+    assert np.allclose(frames[3], samples[3 * 64:4 * 64])
+
+    # Start offset, frame count and looping
+    reader = CaptureReader(path, 64, start_offset=8 * 64, frame_count=5, loop=True)
+    frames = list(reader)
+    assert len(frames) == 5
+    assert np.allclose(frames[2], samples[8 * 64:9 * 64])
+    # A partial frame at the end is not streamed
+    reader = CaptureReader(path, 64, start_offset=32)
+    assert len(reader) == 9
+    # Single precision frames
+    reader = CaptureReader(path, 64, dtype=np.complex64)
+    assert reader.read_frame(1).dtype == np.complex64
+    assert np.allclose(reader.read_frame(1), samples[64:128], atol=1e-6)
+
+def test_capture_reader_raw_int16(tmp_path):
+    samples = make_capture(4) * 0.5
+    interleaved = np.empty(2 * len(samples), dtype=np.int16)
+    interleaved[0::2] = np.round(samples.real * 32767)
+    interleaved[1::2] = np.round(samples.imag * 32767)
+    path = str(tmp_path / "capture.cs16")
+    interleaved.tofile(path)
+
+    reader = CaptureReader(path, 64)
+    assert reader.fmt == "int16"
+    frames = list(reader)
+    assert len(frames) == 4
+    assert np.allclose(frames[1], samples[64:128], atol=1e-3)
+
+    try:
+        CaptureReader(str(tmp_path / "capture.bin"), 64)
+        assert False, "Expected a missing file error"
+    except FileNotFoundError as e:
+        print(f"Caught expected error: {e}")
+
+def test_run_pipeline_flow(tmp_path):
+    path = str(tmp_path / "capture.npy")
+    np.save(path, make_capture(20))
+
+    register_map = FFtRegisterMap()
+    fft_block = FftBlock()
+    fft_block.bind_input_output(Buffer(4096, 4096), Buffer(4096, 4096))
+    register_map.bind_module_to_register(fft_block, "FFT_START")
+    register_map.bind_module_to_register(fft_block, "FFT_CONFIG")
+
+    frames = run_pipeline_flow(register_map, fft_block, path, frame_count=25, loop=True)
+    assert frames == 25
+    # The 25th frame is frame 4 of the capture again
+    assert np.argmax(np.abs(fft_block.get_output())) == 5
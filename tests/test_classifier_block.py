@@ -1,6 +1,7 @@
 import numpy as np
 import sys
 import os
+import time
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from hardware_sim.fft_block import FftBlock
@@ -9,6 +10,7 @@ from hardware_sim.register_map import FFtRegisterMap, ClassifierRegMap
 from interface.cli_controller import run_fft_flow
 from general.helper_functions import create_fft_config, generate_single_tone, get_fft_size_code
 from hardware_sim.classifier_block import ClassifierBlock
+from hardware_sim.event_kernel import EventKernel
 
 # This is a test for the ClassifierBlock class:
 # To do this we first need to create a quick classifier and save it to a file (if it doesn't exist)
@@ -95,3 +97,84 @@ print(f"Classifier result: {result}")
 # Now we check the done flag:
 done = classifier_block_reg_map.get_register("CLASSIFY_DONE").read()
 print(f"Classifier done flag: {done}")  
+
+def test_classifier_micro_batching():
+    """
+    Test that micro-batching classifies several frames with one predict call, with a result per frame.
+    """
+    classifier = ClassifierBlock(model_path, batch_timeout=60)
+    reg_map = ClassifierRegMap()
+    reg_map.bind_module_to_register(classifier, "CLASSIFY_TRIGGER")
+    reg_map.bind_module_to_register(classifier, "CLASSIFY_BATCH_SIZE")
+    classifier.bind_registers(reg_map.get_register("CLASSIFY_TRIGGER"), reg_map.get_register("CLASSIFY_RESULT"),
+                              reg_map.get_register("CLASSIFY_DONE"))
+    spectrum_buffer = Buffer(64, 64)
+    classifier.bind_input(spectrum_buffer)
+
+    # Count the predict calls
+    predict_calls = []
+    model_predict = classifier.model.predict
+    def counting_predict(features):
+        predict_calls.append(len(features))
+        return model_predict(features)
+    classifier.model.predict = counting_predict
+
+    reg_map.write_register("CLASSIFY_BATCH_SIZE", 4)
+    spectra = [np.fft.fft(generate_single_tone(k + 1, 64)) for k in range(10)]
+    for spectrum in spectra:
+        spectrum_buffer.writeBuffer(spectrum)
+        reg_map.write_register("CLASSIFY_TRIGGER", 1)
+    # Two full batches, two frames still pending
+    assert predict_calls == [4, 4]
+    assert reg_map.read_register("CLASSIFY_DONE") == 0
+    # The pending frames are flushed once the deadline has passed
+    classifier.batch_timeout = 0
+    classifier.update()
+    assert predict_calls == [4, 4, 2]
+    assert reg_map.read_register("CLASSIFY_DONE") == 1
+
+    results = classifier.read_results()
+    expected = model_predict(np.abs(np.array(spectra)))
+    assert [frame for frame, _ in results] == list(range(10))
+    assert np.array_equal([label for _, label in results], expected)
+    assert reg_map.read_register("CLASSIFY_RESULT") == expected[-1]
+    assert classifier.read_results() == []
+
+def test_classifier_batch_deadline():
+    """
+    Test that a single pending frame is flushed at its deadline without any later submit or update call.
+    """
+    spectrum = np.fft.fft(generate_single_tone(5, 64))
+    # Event kernel: the flush is an event batch_timeout later in simulated time
+    kernel = EventKernel(clock_hz=1e6)
+    classifier = ClassifierBlock(model_path, batch_timeout=1e-3)
+    reg_map = ClassifierRegMap()
+    reg_map.bind_module_to_register(classifier, "CLASSIFY_TRIGGER")
+    classifier.bind_registers(reg_map.get_register("CLASSIFY_TRIGGER"), reg_map.get_register("CLASSIFY_RESULT"),
+                              reg_map.get_register("CLASSIFY_DONE"))
+    spectrum_buffer = Buffer(64, 64)
+    classifier.bind_input(spectrum_buffer)
+    classifier.bind_kernel(kernel)
+    classifier.latency_cycles = 10
+    classifier.batch_size = 4
+    spectrum_buffer.writeBuffer(spectrum)
+    reg_map.write_register("CLASSIFY_TRIGGER", 1)
+    kernel.run(until=500)
+    assert classifier.read_results() == [] and reg_map.read_register("CLASSIFY_DONE") == 0
+    kernel.run()
+    assert kernel.now == 1010
+    assert [frame for frame, _ in classifier.read_results()] == [0]
+    assert reg_map.read_register("CLASSIFY_DONE") == 1
+
+    # Without a kernel a timer thread flushes the batch
+    classifier = ClassifierBlock(model_path, batch_timeout=0.02)
+    classifier.batch_size = 4
+    classifier.submit(np.abs(spectrum))
+    assert classifier.read_results() == []
+    for _ in range(200):
+        if classifier.result_fifo:
+            break
+        time.sleep(0.01)
+    assert [frame for frame, _ in classifier.read_results()] == [0]
+    assert classifier.deadline_timer is None
+
@@ -1,5 +1,7 @@
 # This script tests the cli controller for the FFT block
 # TODO - add user input to the test (using unittest.mock)
+import io
+import json
 import numpy as np
 import sys
 import os
@@ -8,7 +10,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from hardware_sim.fft_block import FftBlock
 from hardware_sim.buffer import Buffer
 from hardware_sim.register_map import FFtRegisterMap
-from interface.cli_controller import run_fft_flow
+from interface.cli_controller import run_fft_flow, parse_script, run_script, build_system, main, cli_controller, parse_value
 from general.helper_functions import create_fft_config, generate_single_tone
 
 def test_run_fft_flow():
@@ -46,6 +48,106 @@ def test_run_fft_flow():
     assert len(output) == fft_size, f"Expected {fft_size} output samples, got {len(output)}"
     print("CLI run_fft_flow() basic test passed!")
 
+def test_batch_script():
+    register_map, fft_block = build_system()
+    script = """
+    # comments and blank lines are skipped
+    set_reg FFT_CONFIG 0x205
+    run_fft
+
+    get_reg FFT_CONFIG   # trailing comment
+    set_reg FFT_START 300
+    get_reg FFT_DONE
+    dump_reg
+    """
+    commands = parse_script(script.splitlines(), register_map)
+    assert [command.name for command in commands] == ["set_reg", "run_fft", "get_reg", "set_reg", "get_reg", "dump_reg"]
+    assert commands[0].line == 3 and commands[0].args == ["FFT_CONFIG", 0x205]
+
+    out = io.StringIO()
+    summary = run_script(commands, register_map, fft_block, out)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert len(records) == len(commands) + 1
+    assert records[1] == {"line": 4, "cmd": "run_fft", "fft_size": 64, "peak_bin": 5, "ok": True}
+    assert records[2]["value"] == 0x205
+    # The out of range write fails, the script goes on
+    assert records[3]["ok"] is False and "out of range" in records[3]["error"]
+    assert records[4]["ok"] is True
+    assert records[5]["registers"]["FFT_CONFIG"] == 0x205
+    assert records[-1]["summary"] == summary and summary["commands"] == 6 and summary["errors"] == 1
+
+    # Stop at the first error
+    out = io.StringIO()
+    summary = run_script(commands[2:], register_map, fft_block, out, stop_on_error=True)
+    assert summary["commands"] == 2 and summary["errors"] == 1
+
+def test_batch_script_validation():
+    register_map, _ = build_system()
+    for script, message in [("get_reg FFT_CONFIG\nset_reg NOT_A_REG 1", "Line 2"),
+                            ("run_fft\nfrobnicate", "unknown command"),
+                            ("set_reg FFT_CONFIG", "arguments"),
+                            ("set_reg FFT_CONFIG twelve", "Line 1")]:
+        try:
+            parse_script(script.splitlines(), register_map)
+            assert False, "Expected a parse error"
+        except ValueError as e:
+            assert message in str(e), e
+
+def test_value_parsing(monkeypatch, capsys):
+    assert parse_value("0x1F") == 31 and parse_value("12") == 12 and parse_value("010") == 10 and parse_value("0b11") == 3
+    try:
+        parse_value("twelve")
+        assert False, "Expected a value error"
+    except ValueError as e:
+        assert "twelve" in str(e)
+    register_map, fft_block = build_system()
+    # Batch and interactive modes parse the values the same way
+    commands = parse_script(["set_reg WINDOW_HOP 010"], register_map)
+    assert commands[0].args[1] == 10
+    entries = iter(["set_reg WINDOW_HOP 010", "set_reg WINDOW_HOP twelve", "set_reg WINDOW_HOP", "exit"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(entries))
+    cli_controller(register_map, fft_block)
+    output = capsys.readouterr().out
+    assert register_map.read_register("WINDOW_HOP") == 10
+    assert "Written 10 to WINDOW_HOP" in output
+    assert "Error: Invalid value twelve" in output and "Usage: set_reg" in output
+
+def test_batch_throughput():
+    # Tens of thousands of register operations run in well under a few seconds
+    register_map, fft_block = build_system()
+    lines = []
+    for k in range(10000):
+        lines.append(f"set_reg WINDOW_HOP {k}")
+        lines.append("get_reg WINDOW_HOP")
+    commands = parse_script(lines, register_map)
+    out = io.StringIO()
+    summary = run_script(commands, register_map, fft_block, out)
+    assert summary["commands"] == 20000 and summary["errors"] == 0
+    assert json.loads(out.getvalue().splitlines()[-2])["value"] == 9999
+    print(f"Batch throughput: {summary['commands_per_s']:.0f} commands/s")
+    assert summary["elapsed_s"] < 5.0
+
+def test_batch_main(tmp_path):
+    script_path = tmp_path / "script.txt"
+    script_path.write_text("set_reg FFT_CONFIG 0x205\nrun_fft\nget_reg FFT_START\n")
+    output_path = tmp_path / "results.jsonl"
+    assert main(["--script", str(script_path), "--output", str(output_path)]) == 0
+    records = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert records[-1]["summary"]["errors"] == 0
+    assert records[2]["value"] == 1
+
+def test_batch_main_parse_error(tmp_path, capsys):
+    script_path = tmp_path / "script.txt"
+    script_path.write_text("get_reg FFT_CONFIG\nset_reg NOT_A_REG 1\n")
+    output_path = tmp_path / "results.jsonl"
+    assert main(["--script", str(script_path), "--output", str(output_path)]) == 1
+    captured = capsys.readouterr()
+    assert "Line 2" in captured.err and "NOT_A_REG" in captured.err
+    assert not output_path.exists()
+
 if __name__ == "__main__":
     test_run_fft_flow()
+    test_batch_script()
+    test_batch_script_validation()
+    test_batch_throughput()
     print("All tests passed!")
\ No newline at end of file
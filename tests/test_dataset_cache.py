@@ -0,0 +1,56 @@
+# This script tests the content-addressed dataset cache of the training scripts
+import numpy as np
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ml_module.dataset_cache import DatasetCache, dataset_params, dataset_key
+from ml_module.dataset_generator import generate_dataset_batched
+from hardware_sim.feature_extractor import FeatureExtractorBlock, FEATURE_COMPACT
+
+def test_dataset_cache_hit(tmp_path):
+    cache = DatasetCache(str(tmp_path / "cache"))
+    X, y, hit = cache.get_or_generate(500, 64, seed=3)
+    assert not hit
+    X2, y2, hit = cache.get_or_generate(500, 64, seed=3)
+    assert hit and isinstance(X2, np.memmap) and isinstance(y2, np.memmap)
+    # Same content as a fresh generation
+    expectedX, expectedY = generate_dataset_batched(500, 64, seed=3)
+    assert np.array_equal(X2, expectedX) and np.array_equal(y2, expectedY)
+
+    # Every generator parameter is part of the key
+    keys = {dataset_key(dataset_params(500, 64, seed=3)),
+            dataset_key(dataset_params(500, 64, seed=4)),
+            dataset_key(dataset_params(500, 128, seed=3)),
+            dataset_key(dataset_params(501, 64, seed=3)),
+            dataset_key(dataset_params(500, 64, noise_ratio=0.5, seed=3)),
+            dataset_key(dataset_params(500, 64, possible_tones=3, seed=3)),
+            dataset_key(dataset_params(500, 64, seed=3, feature_extractor=FeatureExtractorBlock(FEATURE_COMPACT)))}
+    assert len(keys) == 7
+    _, _, hit = cache.get_or_generate(500, 64, seed=3, feature_extractor=FeatureExtractorBlock(FEATURE_COMPACT))
+    assert not hit and len(cache.entries()) == 2
+    # Unseeded datasets are never cached
+    _, _, hit = cache.get_or_generate(100, 64)
+    assert not hit and len(cache.entries()) == 2
+
+def test_dataset_cache_eviction(tmp_path):
+    # Room for about two 500x64 datasets
+    entrySize = 500 * 64 * 8 + 500 * 8
+    cache = DatasetCache(str(tmp_path / "cache"), max_bytes=int(2.5 * entrySize))
+    keys = []
+    for seed in range(3):
+        cache.get_or_generate(500, 64, seed=seed)
+        keys.append(dataset_key(dataset_params(500, 64, seed=seed)))
+        os.utime(os.path.join(cache.cache_dir, keys[-1], "meta.json"), (seed, seed))
+    # The oldest entry was evicted when the third one was stored
+    cached = [key for key, _, _ in cache.entries()]
+    assert cached == keys[1:]
+    assert cache.size() <= cache.max_bytes
+
+    # A hit refreshes the entry, so the next eviction removes the other one
+    cache.get(keys[1])
+    cache.get_or_generate(500, 64, seed=10)
+    assert keys[1] in [key for key, _, _ in cache.entries()]
+    assert keys[2] not in [key for key, _, _ in cache.entries()]
+    cache.clear()
+    assert cache.entries() == []
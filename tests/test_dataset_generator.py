@@ -30,6 +30,69 @@ def test_generate_dataset():
 
     print("Dataset generation test passed!")
 
+
+def test_generate_dataset_batched():
+    from ml_module.dataset_generator import generate_dataset_batched
+    num_samples = 6000
+    fft_size = 64
+
+    X, y = generate_dataset_batched(num_samples, fft_size, seed=1)
+    assert X.shape == (num_samples, fft_size)
+    assert y.shape == (num_samples,)
+    assert set(np.unique(y)) == {0, 1, 2}
+    assert np.isfinite(X).all()
+
+    # The same seed gives the same dataset
+    X2, y2 = generate_dataset_batched(num_samples, fft_size, seed=1)
+    assert np.array_equal(X, X2) and np.array_equal(y, y2)
+
+    # Tone spectra have exactly one (label 0) or two (label 1) distinct peaks of height fft_size
+    peaks = np.sum(np.isclose(X, fft_size), axis=1)
+    assert np.all(peaks[y == 0] == 1)
+    assert np.all(peaks[y == 1] == 2)
+    # Tones only use bins 1..fft_size//2-1
+    assert np.all(X[y != 2][:, fft_size // 2:] < 1e-6)
+
+    # Same statistics as the loop generator
+    np.random.seed(1)
+    X_ref, y_ref = generate_dataset(num_samples, fft_size)
+    assert np.allclose(np.bincount(y, minlength=3) / num_samples, np.bincount(y_ref, minlength=3) / num_samples, atol=0.03)
+    assert np.isclose(X[y == 2].mean(), X_ref[y_ref == 2].mean(), rtol=0.03)
+
+def test_generate_dataset_tiny_fft():
+    from ml_module.dataset_generator import generate_dataset_batched
+    # 8 points: bins 1..3 hold the two distinct tones
+    X, y = generate_dataset_batched(200, 8, seed=0)
+    assert np.isfinite(X).all() and X.max() <= 8 + 1e-9
+    tones = X[y < 2] > 1e-6
+    assert np.array_equal(tones.sum(axis=1), y[y < 2] + 1)
+    # 2 and 4 points cannot hold two distinct tones
+    for fft_size in (2, 4):
+        try:
+            generate_dataset_batched(10, fft_size, seed=0)
+            assert False, "Expected an FFT size error"
+        except ValueError as e:
+            print(f"Caught expected error: {e}")
+
+def test_generate_dataset_to_npy(tmp_path):
+    from ml_module.dataset_generator import generate_dataset_to_npy
+    num_samples = 1000
+    fft_size = 32
+
+    X1, y1 = generate_dataset_to_npy(str(tmp_path / "serial"), num_samples, fft_size, seed=7, n_jobs=1, chunk_rows=128)
+    X4, y4 = generate_dataset_to_npy(str(tmp_path / "parallel"), num_samples, fft_size, seed=7, n_jobs=4, chunk_rows=128)
+
+    # Memory mapped results, identical for any number of workers
+    assert isinstance(X1, np.memmap) and isinstance(y1, np.memmap)
+    assert X1.shape == (num_samples, fft_size) and y1.shape == (num_samples,)
+    assert np.array_equal(X1, X4) and np.array_equal(y1, y4)
+    assert set(np.unique(y1)) == {0, 1, 2}
+    # Every chunk was written (a zero row would mean a chunk was skipped)
+    assert np.all(X1.max(axis=1) > 0)
+    assert os.path.exists(tmp_path / "parallel" / "X.npy")
+
 if __name__ == "__main__":
     test_generate_dataset()
+    test_generate_dataset_batched()
+    test_generate_dataset_tiny_fft()
     print("All tests passed.")
@@ -0,0 +1,102 @@
+# This script tests the DMA block and the burst register writes
+import numpy as np
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from hardware_sim.dma_block import DmaBlock
+from hardware_sim.fft_block import FftBlock
+from hardware_sim.buffer import Buffer
+from hardware_sim.register_map import DmaRegMap, FFtRegisterMap
+from general.helper_functions import create_fft_config, generate_single_tone
+
+def build_dma():
+    dma = DmaBlock()
+    dma_reg_map = DmaRegMap()
+    for name in dma_reg_map.register_map:
+        if name != "DMA_DONE":
+            dma_reg_map.bind_module_to_register(dma, name)
+    dma.bind_registers(dma_reg_map.get_register("DMA_DONE"))
+    return dma, dma_reg_map
+
+def test_dma_fft_round_trip():
+    fft_size = 64
+    input_buffer = Buffer(4096, ring=True)
+    output_buffer = Buffer(4096, 4096)
+    fft_block = FftBlock()
+    fft_block.bind_input_output(input_buffer, output_buffer)
+    fft_reg_map = FFtRegisterMap()
+    fft_reg_map.bind_module_to_register(fft_block, "FFT_START")
+    fft_reg_map.bind_module_to_register(fft_block, "FFT_CONFIG")
+    fft_reg_map.write_register("FFT_CONFIG", create_fft_config(fft_size_code=5, zero_padding=0, normalization=0, phase_correction=0, phase_sign=0, batch_mode=1))
+
+    host_in = np.concatenate([generate_single_tone(frequency_bin=k + 1, fft_size=fft_size) for k in range(8)])
+    host_out = np.zeros(8 * fft_size, dtype=complex)
+    dma, dma_reg_map = build_dma()
+    dma.bind_endpoint(0, host_in)
+    dma.bind_endpoint(1, input_buffer)
+    dma.bind_endpoint(2, output_buffer)
+    dma.bind_endpoint(3, host_out)
+
+    # Host -> FFT input buffer (second half of the capture), in one burst
+    dma_reg_map.write_registers([("DMA_SRC", 0), ("DMA_DST", 1), ("DMA_SRC_OFFSET", 4 * fft_size), ("DMA_LENGTH", 4 * fft_size), ("DMA_START", 1)])
+    assert dma_reg_map.read_register("DMA_DONE") == 1
+    assert len(input_buffer) == 4 * fft_size
+    fft_reg_map.write_register("FFT_START", 1)
+
+    # FFT output buffer -> host
+    dma_reg_map.write_registers({"DMA_SRC": 2, "DMA_DST": 3, "DMA_DST_OFFSET": fft_size, "DMA_LENGTH": 4 * fft_size, "DMA_START": 1})
+    expected = np.fft.fft(host_in[4 * fft_size:].reshape(4, fft_size), axis=-1).ravel()
+    assert np.allclose(host_out[fft_size:5 * fft_size], expected)
+    assert np.all(host_out[:fft_size] == 0)
+    assert dma.transfers == 2 and dma.samples_moved == 8 * fft_size
+
+def test_dma_errors():
+    dma, dma_reg_map = build_dma()
+    dma.bind_endpoint(0, np.zeros(16, dtype=complex))
+    dma.bind_endpoint(1, Buffer(8, ring=True))
+    try:
+        dma_reg_map.write_registers({"DMA_SRC": 0, "DMA_DST": 5, "DMA_LENGTH": 4, "DMA_START": 1})
+        assert False, "Expected an unbound endpoint error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+    assert dma_reg_map.read_register("DMA_DONE") == 0
+    try:
+        dma_reg_map.write_registers({"DMA_DST": 1, "DMA_SRC_OFFSET": 14, "DMA_START": 1})
+        assert False, "Expected an out of range read error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+    try:
+        dma.bind_endpoint(2, [1, 2, 3])
+        assert False, "Expected an endpoint type error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+
+def test_dma_ring_overflow_keeps_source():
+    source = Buffer(512, ring=True)
+    destination = Buffer(600, ring=True)
+    samples = generate_single_tone(frequency_bin=3, fft_size=512)
+    source.append(samples)
+    destination.append(np.zeros(200, dtype=complex))
+    dma, dma_reg_map = build_dma()
+    dma.bind_endpoint(0, source)
+    dma.bind_endpoint(1, destination)
+    try:
+        dma_reg_map.write_registers({"DMA_SRC": 0, "DMA_DST": 1, "DMA_LENGTH": 512, "DMA_START": 1})
+        assert False, "Expected a destination overflow error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+    # The failed burst is still in the source
+    assert len(source) == 512 and len(destination) == 200
+    assert dma_reg_map.read_register("DMA_DONE") == 0
+    destination.discard(200)
+    dma_reg_map.write_register("DMA_START", 1)
+    assert len(source) == 0
+    assert np.allclose(destination.read(), samples)
+    assert dma.transfers == 1
+
+if __name__ == "__main__":
+    test_dma_fft_round_trip()
+    test_dma_errors()
+    test_dma_ring_overflow_keeps_source()
+    print("All tests passed!")
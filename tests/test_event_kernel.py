@@ -0,0 +1,148 @@
+# This script tests the discrete-event simulation kernel and the block latencies
+import numpy as np
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from hardware_sim.event_kernel import EventKernel
+from hardware_sim.fft_block import FftBlock, FFT_STAGE_CYCLES, FFT_STATUS_BUSY, FFT_STATUS_IDLE
+from hardware_sim.dma_block import DmaBlock, DMA_SETUP_CYCLES
+from hardware_sim.buffer import Buffer
+from hardware_sim.register_map import FFtRegisterMap, ClassifierRegMap, DmaRegMap
+from hardware_sim.classifier_block import ClassifierBlock
+from general.helper_functions import create_fft_config, generate_single_tone, generate_noise
+
+def build_fft(kernel, fft_size_code=7):
+    fft_reg_map = FFtRegisterMap()
+    fft_block = FftBlock()
+    fft_block.bind_input_output(Buffer(4096, ring=True), Buffer(4096, 4096))
+    fft_block.bind_registers(fft_reg_map.get_register("FFT_DONE"), fft_reg_map.get_register("FFT_STATUS"))
+    fft_block.bind_kernel(kernel)
+    fft_reg_map.bind_module_to_register(fft_block, "FFT_START")
+    fft_reg_map.bind_module_to_register(fft_block, "FFT_CONFIG")
+    fft_reg_map.write_register("FFT_CONFIG", create_fft_config(fft_size_code=fft_size_code, zero_padding=1, normalization=0, phase_correction=0, phase_sign=0))
+    return fft_reg_map, fft_block
+
+def test_event_kernel_ordering():
+    kernel = EventKernel()
+    fired = []
+    kernel.schedule(50, fired.append, "b")
+    kernel.schedule(10, fired.append, "a")
+    kernel.schedule(50, fired.append, "c") # same time: scheduling order
+    cancelled = kernel.schedule(20, fired.append, "x")
+    cancelled.cancel()
+    kernel.schedule(10**12, fired.append, "late")
+
+    assert kernel.run(until=100) == 100
+    assert fired == ["a", "b", "c"]
+    assert kernel.pending() == 1
+    # Idle time is skipped: one event, whatever the gap
+    kernel.run()
+    assert kernel.now == 10**12 and fired[-1] == "late"
+    assert kernel.events_processed == 4
+    assert kernel.to_seconds(kernel.clock_hz) == 1.0
+    try:
+        kernel.schedule_at(0, fired.append, "past")
+        assert False, "Expected a scheduling error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+
+def test_fft_done_at_simulated_time():
+    kernel = EventKernel()
+    fft_reg_map, fft_block = build_fft(kernel)
+    latency = 256 + FFT_STAGE_CYCLES * 8
+    assert fft_block.get_latency_cycles() == latency
+
+    fft_block.input_buffer.append(generate_single_tone(frequency_bin=9, fft_size=256))
+    fft_reg_map.write_register("FFT_START", 1)
+    # Busy until the completion event
+    assert fft_reg_map.read_register("FFT_DONE") == 0
+    assert fft_reg_map.read_register("FFT_STATUS") == FFT_STATUS_BUSY
+    try:
+        fft_reg_map.write_register("FFT_START", 1)
+        assert False, "Expected a busy error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+    kernel.run(until=latency - 1)
+    assert fft_reg_map.read_register("FFT_DONE") == 0
+    assert fft_block.get_output() is None
+    kernel.run()
+    assert kernel.now == latency
+    assert fft_reg_map.read_register("FFT_DONE") == 1
+    assert fft_reg_map.read_register("FFT_STATUS") == FFT_STATUS_IDLE
+    assert np.argmax(np.abs(fft_block.get_output())) == 9
+
+def test_dma_done_at_simulated_time():
+    kernel = EventKernel()
+    dma = DmaBlock()
+    dma_reg_map = DmaRegMap()
+    for name in dma_reg_map.register_map:
+        if name != "DMA_DONE":
+            dma_reg_map.bind_module_to_register(dma, name)
+    dma.bind_registers(dma_reg_map.get_register("DMA_DONE"))
+    dma.bind_kernel(kernel)
+    destination = Buffer(1024, ring=True)
+    dma.bind_endpoint(0, np.arange(1024, dtype=complex))
+    dma.bind_endpoint(1, destination)
+
+    dma_reg_map.write_registers([("DMA_SRC", 0), ("DMA_DST", 1), ("DMA_LENGTH", 512), ("DMA_START", 1)])
+    assert dma_reg_map.read_register("DMA_DONE") == 0 and len(destination) == 0
+    kernel.run()
+    assert kernel.now == DMA_SETUP_CYCLES + 512
+    assert dma_reg_map.read_register("DMA_DONE") == 1 and len(destination) == 512
+
+def test_streaming_schedule(tmp_path):
+    from sklearn.ensemble import RandomForestClassifier
+    from ml_module.dataset_generator import generate_dataset_batched
+    import joblib
+
+    fft_size = 256
+    X, y = generate_dataset_batched(600, fft_size, seed=0)
+    model_path = str(tmp_path / "model.joblib")
+    joblib.dump(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y), model_path)
+
+    kernel = EventKernel()
+    fft_reg_map, fft_block = build_fft(kernel)
+    classifier_reg_map = ClassifierRegMap()
+    classifier = ClassifierBlock(model_path)
+    classifier.latency_cycles = 100
+    classifier.bind_input(fft_block.output_buffer)
+    classifier.bind_registers(classifier_reg_map.get_register("CLASSIFY_TRIGGER"), classifier_reg_map.get_register("CLASSIFY_RESULT"),
+                              classifier_reg_map.get_register("CLASSIFY_DONE"))
+    classifier.bind_kernel(kernel)
+    classifier_reg_map.bind_module_to_register(classifier, "CLASSIFY_TRIGGER")
+
+    # A frame arrives every 400 cycles: FFT as soon as it is idle, then classify, and record the latency per frame
+    period = 400
+    num_frames = 500
+    arrivals = []
+    latencies = []
+    def arrive(index):
+        arrivals.append(kernel.now)
+        fft_block.input_buffer.append(generate_single_tone(frequency_bin=5, fft_size=fft_size) if index % 2 == 0 else generate_noise(fft_size))
+        if not fft_block.busy:
+            fft_reg_map.write_register("FFT_START", 1)
+        if index + 1 < num_frames:
+            kernel.schedule(period, arrive, index + 1)
+    def fft_done(block):
+        classifier_reg_map.write_register("CLASSIFY_TRIGGER", 1)
+        if len(block.input_buffer) >= fft_size:
+            fft_reg_map.write_register("FFT_START", 1)
+    def classify_done(block):
+        latencies.append(kernel.now - arrivals[len(latencies)])
+    fft_block.on_done(fft_done)
+    classifier.on_done(classify_done)
+
+    kernel.schedule(0, arrive, 0)
+    kernel.run()
+
+    fftLatency = fft_block.get_latency_cycles()
+    assert len(latencies) == num_frames
+    assert latencies == [fftLatency + 100] * num_frames
+    assert kernel.now == (num_frames - 1) * period + fftLatency + 100
+    # 3 events per frame for 200k simulated cycles
+    assert kernel.events_processed == 3 * num_frames
+    results = classifier.read_results()
+    assert [int(label) for _, label in results[:2]] == [0, 2]
+    throughput = num_frames / kernel.to_seconds(kernel.now)
+    print(f"Simulated throughput: {throughput:.0f} frames/s")
@@ -0,0 +1,124 @@
+# This script tests the feature extractor block and its use in training and at runtime
+import numpy as np
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from hardware_sim.feature_extractor import (FeatureExtractorBlock, extract_features, get_feature_count, PEAK_STATS,
+                                            FEATURE_MAGNITUDE, FEATURE_LOG_MAGNITUDE, FEATURE_BAND_ENERGY,
+                                            FEATURE_PEAK_STATS, FEATURE_DECIMATED, FEATURE_COMPACT)
+from hardware_sim.fft_block import FftBlock
+from hardware_sim.buffer import Buffer
+from hardware_sim.register_map import FFtRegisterMap, ClassifierRegMap, FeatureRegMap
+from hardware_sim.classifier_block import ClassifierBlock
+from general.helper_functions import create_fft_config, generate_single_tone, generate_noise
+
+def test_extract_features():
+    fft_size = 256
+    tone = np.fft.fft(generate_single_tone(frequency_bin=10, fft_size=fft_size))
+    two_tones = np.fft.fft(generate_single_tone(frequency_bin=10, fft_size=fft_size) + generate_single_tone(frequency_bin=40, fft_size=fft_size))
+    noise = np.fft.fft(generate_noise(fft_size))
+
+    # The default selection is the legacy magnitude spectrum
+    assert np.array_equal(extract_features(tone), np.abs(tone))
+    # Every set on its own, and all of them concatenated
+    assert extract_features(tone, FEATURE_LOG_MAGNITUDE).shape == (fft_size,)
+    assert extract_features(tone, FEATURE_BAND_ENERGY, bands=16).shape == (16,)
+    assert extract_features(tone, FEATURE_PEAK_STATS).shape == (len(PEAK_STATS),)
+    assert extract_features(tone, FEATURE_DECIMATED, decimation=8).shape == (32,)
+    allSets = FEATURE_MAGNITUDE | FEATURE_LOG_MAGNITUDE | FEATURE_BAND_ENERGY | FEATURE_PEAK_STATS | FEATURE_DECIMATED
+    assert extract_features(tone, allSets).shape == (get_feature_count(fft_size, allSets),)
+
+    # Batches are computed row by row in one go
+    batch = np.array([tone, two_tones, noise])
+    features = extract_features(batch, FEATURE_COMPACT)
+    assert features.shape == (3, get_feature_count(fft_size, FEATURE_COMPACT))
+    for row in range(3):
+        assert np.allclose(features[row], extract_features(batch[row], FEATURE_COMPACT))
+    # Peak count tells tones and noise apart, flatness is high for noise only
+    stats = extract_features(batch, FEATURE_PEAK_STATS)
+    assert list(stats[:2, PEAK_STATS.index("peak_count")]) == [1, 2]
+    assert stats[2, PEAK_STATS.index("peak_count")] > 2
+    assert stats[2, PEAK_STATS.index("flatness")] > 10 * stats[0, PEAK_STATS.index("flatness")]
+    # Band energies: all the energy of the tone is in the first band
+    bands = extract_features(tone, FEATURE_BAND_ENERGY, bands=4)
+    assert np.argmax(bands) == 0 and abs(bands[0]) < 1e-6
+
+    # Invalid selections
+    for select, bands, decimation in ((0, 16, 8), (0x20, 16, 8), (FEATURE_BAND_ENERGY, 512, 8), (FEATURE_DECIMATED, 16, 0)):
+        try:
+            extract_features(tone, select, bands, decimation)
+            assert False, "Expected a feature selection error"
+        except ValueError as e:
+            print(f"Caught expected error: {e}")
+
+def test_feature_extractor_registers():
+    fft_size = 4096
+    fft_reg_map = FFtRegisterMap()
+    fft_block = FftBlock()
+    fft_output = Buffer(fft_size, fft_size)
+    fft_block.bind_input_output(Buffer(fft_size, fft_size), fft_output)
+    fft_reg_map.bind_module_to_register(fft_block, "FFT_START")
+    fft_reg_map.bind_module_to_register(fft_block, "FFT_CONFIG")
+    fft_reg_map.write_register("FFT_CONFIG", create_fft_config(fft_size_code=11, zero_padding=0, normalization=1, phase_correction=0, phase_sign=0))
+
+    feature_reg_map = FeatureRegMap()
+    extractor = FeatureExtractorBlock()
+    extractor.bind_input(fft_output)
+    extractor.bind_fft_block(fft_block)
+    for name in ("FEATURE_START", "FEATURE_SELECT", "FEATURE_BANDS", "FEATURE_DECIMATION"):
+        feature_reg_map.bind_module_to_register(extractor, name)
+    extractor.bind_registers(feature_reg_map.get_register("FEATURE_DONE"), feature_reg_map.get_register("FEATURE_COUNT"))
+    assert feature_reg_map.read_register("FEATURE_COUNT") == fft_size
+
+    feature_reg_map.write_registers([("FEATURE_BANDS", 32), ("FEATURE_SELECT", FEATURE_COMPACT)])
+    assert feature_reg_map.read_register("FEATURE_COUNT") == 32 + len(PEAK_STATS)
+
+    fft_block.input_buffer.writeBuffer(generate_single_tone(frequency_bin=100, fft_size=fft_size))
+    fft_reg_map.write_register("FFT_START", 1)
+    feature_reg_map.write_register("FEATURE_START", 1)
+    assert feature_reg_map.read_register("FEATURE_DONE") == 1
+    assert extractor.get_output().shape == (32 + len(PEAK_STATS),)
+
+    # An invalid write is rejected and the previous configuration is kept
+    try:
+        feature_reg_map.write_register("FEATURE_SELECT", 0)
+        assert False, "Expected a feature selection error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+    assert extractor.feature_select == FEATURE_COMPACT
+
+def test_classifier_with_feature_extractor(tmp_path):
+    from sklearn.ensemble import RandomForestClassifier
+    from ml_module.dataset_generator import generate_dataset_batched
+    import joblib
+
+    fft_size = 1024
+    extractor = FeatureExtractorBlock(FEATURE_COMPACT)
+    # The training set goes through the same extractor as the runtime frames
+    X, y = generate_dataset_batched(1500, fft_size, seed=3, feature_extractor=extractor)
+    assert X.shape == (1500, extractor.get_feature_size(fft_size))
+    model_path = str(tmp_path / "compact.joblib")
+    joblib.dump(RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y), model_path)
+
+    fft_block = FftBlock()
+    fft_output = Buffer(fft_size, fft_size)
+    fft_block.bind_input_output(Buffer(fft_size, fft_size), fft_output)
+    fft_block.configure(create_fft_config(fft_size_code=9, zero_padding=0, normalization=0, phase_correction=0, phase_sign=0))
+    classifier_reg_map = ClassifierRegMap()
+    classifier = ClassifierBlock(model_path)
+    classifier.bind_input(fft_output)
+    classifier.bind_fft_block(fft_block)
+    classifier.bind_feature_extractor(extractor)
+    classifier.bind_registers(classifier_reg_map.get_register("CLASSIFY_TRIGGER"), classifier_reg_map.get_register("CLASSIFY_RESULT"),
+                              classifier_reg_map.get_register("CLASSIFY_DONE"))
+    classifier_reg_map.bind_module_to_register(classifier, "CLASSIFY_TRIGGER")
+    assert classifier.get_feature_size() == len(X[0])
+
+    labels = []
+    for signal in (generate_single_tone(frequency_bin=7, fft_size=fft_size), generate_noise(fft_size)):
+        fft_block.input_buffer.writeBuffer(signal)
+        fft_block.run()
+        classifier_reg_map.write_register("CLASSIFY_TRIGGER", 1)
+        labels.append(classifier_reg_map.read_register("CLASSIFY_RESULT"))
+    assert labels == [0, 2]
@@ -3,7 +3,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from hardware_sim.fft_block import FftBlock
 from hardware_sim.register_map import FFtRegisterMap
-from hardware_sim.buffer import Buffer
+from hardware_sim.buffer import Buffer, IQ16
 from general.helper_functions import create_fft_config, generate_single_tone, get_fft_size
 import numpy as np
 import math
@@ -62,7 +62,162 @@ def test_fft_block():
     assert output_data is not None
     print("FFT Output Magnitudes:", np.abs(output_data))
 
+def test_fft_block_batch_mode():
+    """
+    Test the batch (multi-frame) mode of the FFT block.
+    """
+    fft_size = 64
+    num_frames = 10
+    input_buffer = Buffer(4096, 4096)
+    output_buffer = Buffer(4096, 4096)
+    fft_block = FftBlock()
+    fft_block.bind_input_output(input_buffer, output_buffer)
+
+    config = create_fft_config(fft_size_code=5, zero_padding=0, normalization=1, phase_correction=0, phase_sign=0, batch_mode=1)
+    fft_block.configure(config)
+
+    # Ten full frames and a partial one that should stay in the input buffer
+    frames = np.array([generate_single_tone(frequency_bin=k + 1, fft_size=fft_size) for k in range(num_frames)])
+    leftover = generate_single_tone(frequency_bin=3, fft_size=fft_size)[:20]
+    input_buffer.writeBuffer(np.concatenate([frames.ravel(), leftover]))
+
+    fft_block.run()
+
+    output = output_buffer.getBuffer()
+    assert output.shape == (num_frames, fft_size)
+    assert np.allclose(output, np.fft.fft(frames, axis=-1) / math.sqrt(fft_size))
+    assert np.array_equal(np.argmax(np.abs(output), axis=-1), np.arange(1, num_frames + 1))
+    assert len(input_buffer) == len(leftover)
+    assert np.allclose(input_buffer.getBuffer(), leftover)
+
+def test_fft_block_plan_cache():
+    """
+    Test that configurations compile to cached, immutable plans with a fused scale factor.
+    """
+    fft_block = FftBlock()
+    configA = create_fft_config(fft_size_code=5, zero_padding=0, normalization=1, phase_correction=512, phase_sign=1)
+    configB = create_fft_config(fft_size_code=6, zero_padding=0, normalization=0, phase_correction=0, phase_sign=0)
+
+    fft_block.configure(configA)
+    planA = fft_block.plan
+    fft_block.configure(configB)
+    fft_block.configure(configA)
+    # Switching back to a known config reuses the compiled plan
+    assert fft_block.plan is planA
+    assert fft_block.getFFTSize() == 64
+    try:
+        planA.scale = 1
+        assert False, "FftPlan should be immutable"
+    except AttributeError:
+        pass
+
+    # Normalization and a negative quarter-turn phase shift, applied as one multiply
+    input_data = generate_single_tone(frequency_bin=5, fft_size=64)
+    fft_block.load_input(input_data)
+    fft_block.run()
+    expected = np.fft.fft(input_data) / math.sqrt(64) * np.exp(-1j * math.pi / 4)
+    assert np.allclose(fft_block.get_output(), expected)
+
+def test_fft_block_ring_buffer():
+    """
+    Test draining a long capture from a ring input buffer, one frame per start.
+    """
+    fft_size = 64
+    num_frames = 20
+    input_buffer = Buffer(fft_size * num_frames, ring=True)
+    output_buffer = Buffer(fft_size, fft_size)
+    fft_block = FftBlock()
+    fft_block.bind_input_output(input_buffer, output_buffer)
+    fft_block.configure(create_fft_config(fft_size_code=5, zero_padding=1, normalization=0, phase_correction=0, phase_sign=0))
+
+    frames = np.array([generate_single_tone(frequency_bin=k + 1, fft_size=fft_size) for k in range(num_frames)])
+    input_buffer.append(frames.ravel())
+    peaks = []
+    while not input_buffer.isEmpty():
+        fft_block.run()
+        peaks.append(np.argmax(np.abs(output_buffer.getBuffer())))
+    assert peaks == list(range(1, num_frames + 1))
+    # Padding behaviour 1: nothing happens once the ring is drained
+    fft_block.run()
+    assert len(input_buffer) == 0
+
+def test_fft_block_stft_mode():
+    """
+    Test the overlapped STFT streaming mode with a Hann window, driven through the registers.
+    """
+    fft_size = 64
+    hop = 16
+    input_buffer = Buffer(1024, ring=True)
+    output_buffer = Buffer(4096, 4096)
+    fft_block = FftBlock()
+    fft_block.bind_input_output(input_buffer, output_buffer)
+    fft_register = FFtRegisterMap()
+    for name in ["FFT_START", "FFT_CONFIG", "WINDOW_TYPE", "WINDOW_SIZE", "WINDOW_HOP"]:
+        fft_register.bind_module_to_register(fft_block, name)
+    fft_register.write_register("FFT_CONFIG", create_fft_config(fft_size_code=5, zero_padding=0, normalization=0, phase_correction=0, phase_sign=0))
+    fft_register.write_register("WINDOW_TYPE", 1)
+    fft_register.write_register("WINDOW_HOP", hop)
+
+    signal = generate_single_tone(frequency_bin=7, fft_size=fft_size)
+    samples = np.tile(signal, 4)[:200]
+    input_buffer.append(samples)
+    fft_register.write_register("FFT_START", 1)
+
+    # (200 - 64) // 16 + 1 = 9 frames, the next frame starts at sample 9 * 16
+    window = np.hanning(fft_size + 1)[:-1]
+    expected = np.array([np.fft.fft(samples[k * hop:k * hop + fft_size] * window) for k in range(9)])
+    output = output_buffer.getBuffer()
+    assert output.shape == (9, fft_size)
+    assert np.allclose(output, expected)
+    assert np.allclose(input_buffer.getBuffer(), samples[9 * hop:])
+
+    # A window shorter than the FFT is centered in the frame
+    fft_register.write_register("WINDOW_SIZE", 5)
+    assert np.count_nonzero(fft_block.plan.window) == 31
+    try:
+        fft_register.write_register("WINDOW_SIZE", 7)
+        assert False, "Expected a window size error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+    assert fft_block.windowSizeCode == 5
+
+def test_fft_block_single_precision():
+    """
+    Test the single precision (complex64) data path, from a packed int16 I/Q ring buffer to the output.
+    """
+    fft_size = 256
+    signal = generate_single_tone(frequency_bin=7, fft_size=fft_size) * 0.5
+    reference = np.fft.fft(signal) * np.exp(1j * 512 / 2**11 * math.pi) / math.sqrt(fft_size)
+
+    fft_block = FftBlock()
+    fft_block.configure(create_fft_config(fft_size_code=7, zero_padding=0, normalization=1, phase_correction=512, phase_sign=0, single_precision=1))
+    assert fft_block.singlePrecision == 1
+    assert fft_block.plan.dtype == np.complex64
+    fft_block.load_input(signal)
+    fft_block.run()
+    assert fft_block.get_output().dtype == np.complex64
+    assert np.allclose(fft_block.get_output(), reference, atol=1e-5)
+
+    # Windowed, with packed int16 samples in and complex64 samples out
+    input_buffer = Buffer(fft_size * 4, ring=True, dtype=IQ16)
+    output_buffer = Buffer(fft_size, dtype=np.complex64)
+    fft_block.bind_input_output(input_buffer, output_buffer)
+    fft_register = FFtRegisterMap()
+    fft_register.bind_module_to_register(fft_block, "WINDOW_TYPE")
+    fft_register.write_register("WINDOW_TYPE", 1)
+    assert fft_block.plan.window.dtype == np.float32
+    input_buffer.append(signal)
+    fft_block.run()
+    output = output_buffer.getBuffer()
+    assert output.dtype == np.complex64
+    assert np.argmax(np.abs(output)) == 7
+
 if __name__ == "__main__":
     test_fft_block_reg_map()
     test_fft_block()
+    test_fft_block_batch_mode()
+    test_fft_block_plan_cache()
+    test_fft_block_ring_buffer()
+    test_fft_block_stft_mode()
+    test_fft_block_single_precision()
     print("All tests passed!")
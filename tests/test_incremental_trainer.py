@@ -0,0 +1,82 @@
+# This script tests the incremental trainer (chunk by chunk model updates published to the model registry)
+import numpy as np
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ml_module.incremental_trainer import IncrementalTrainer, stream_chunks, iter_array_chunks
+from ml_module.dataset_generator import generate_dataset_batched
+from hardware_sim.model_registry import ModelRegistry
+from hardware_sim.classifier_block import ClassifierBlock
+from hardware_sim.register_map import ClassifierRegMap
+from model.rf_classifier import ArrayForest
+
+def test_forest_warm_start_growth():
+    trainer = IncrementalTrainer(estimators_per_chunk=4, random_state=0)
+    chunks = list(stream_chunks(1800, chunk_size=600, fft_size=64, seed=1))
+    assert [len(y) for _, y in chunks] == [600, 600, 600]
+    trainer.update(*chunks[0])
+    firstTrees = list(trainer.model.estimators_)
+    snapshot = trainer.snapshot()
+    stats = trainer.fit_stream(chunks[1:])
+    assert [s["n_estimators"] for s in stats] == [8, 12]
+    # Old trees are kept as they are, only the new chunk is fitted
+    assert trainer.model.estimators_[:4] == firstTrees
+    assert len(snapshot.estimators_) == 4 and snapshot.predict(chunks[0][0][:5]).shape == (5,)
+    X_test, y_test = generate_dataset_batched(600, 64, seed=99)
+    assert trainer.score(X_test, y_test) > 0.6
+
+    # Sliding window of trees
+    window = IncrementalTrainer(estimators_per_chunk=4, max_estimators=8, random_state=0)
+    window.fit_stream(chunks)
+    assert len(window.model.estimators_) == 8 and window.model.n_estimators == 8
+    assert window.model.estimators_[0] is not firstTrees[0]
+
+    # A forest chunk must hold every class
+    X, y = chunks[0]
+    try:
+        trainer.update(X[y != 2], y[y != 2])
+        assert False, "Expected a missing class error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+
+def test_partial_fit_models():
+    X, y = generate_dataset_batched(2000, 64, seed=2)
+    X_test, y_test = generate_dataset_batched(600, 64, seed=98)
+    for model_type in ("sgd", "naive_bayes"):
+        trainer = IncrementalTrainer(model_type=model_type, random_state=0)
+        # Chunks may miss classes with partial_fit models
+        trainer.update(X[y == 0][:50], y[y == 0][:50])
+        trainer.fit_stream(iter_array_chunks(X, y, chunk_size=500))
+        assert trainer.chunks_seen == 5 and trainer.samples_seen == 2050
+        assert trainer.score(X_test, y_test) > 0.5, model_type
+
+def test_publish_to_registry(tmp_path):
+    registry = ModelRegistry({})
+    trainer = IncrementalTrainer(estimators_per_chunk=3, random_state=0)
+    publishDir = str(tmp_path / "snapshots")
+    trainer.fit_stream(stream_chunks(1200, chunk_size=600, fft_size=64, seed=3), registry=registry, slot=0, publish_dir=publishDir)
+    assert trainer.version == 2 and registry.model_paths[0].endswith("incremental_v0002.npz")
+
+    # The running classifier switches to a new snapshot with a model select write
+    classifier_reg_map = ClassifierRegMap()
+    classifier = ClassifierBlock(registry.model_paths[0], registry=registry)
+    classifier_reg_map.bind_module_to_register(classifier, "CLASSIFY_MODEL_SELECT")
+    classifier_reg_map.write_register("CLASSIFY_MODEL_SELECT", 0)
+    assert isinstance(classifier.model, ArrayForest) and classifier.model.n_estimators == 6
+    trainer.fit_stream(stream_chunks(600, chunk_size=600, fft_size=64, seed=4), registry=registry, slot=0, publish_dir=publishDir)
+    classifier_reg_map.write_register("CLASSIFY_MODEL_SELECT", 0)
+    assert classifier.model.n_estimators == 9
+    X, y = generate_dataset_batched(50, 64, seed=5)
+    assert np.array_equal(classifier.classify(X), trainer.model.predict(X))
+
+    # partial_fit models are published as .joblib snapshots
+    sgd = IncrementalTrainer(model_type="sgd", random_state=0)
+    sgd.update(X, y)
+    path = sgd.publish(registry, 1, publishDir)
+    assert path.endswith(".joblib") and registry.get(1) is not sgd.model
+
+if __name__ == "__main__":
+    test_forest_warm_start_growth()
+    test_partial_fit_models()
+    print("All tests passed!")
@@ -0,0 +1,89 @@
+# This script tests the model registry used by the classifier block
+import numpy as np
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+
+from hardware_sim.model_registry import ModelRegistry, get_feature_size
+from hardware_sim.classifier_block import ClassifierBlock
+from hardware_sim.fft_block import FftBlock
+from hardware_sim.register_map import ClassifierRegMap
+from general.helper_functions import create_fft_config
+
+def make_models(tmp_path, feature_sizes):
+    paths = {}
+    for slot, num_features in enumerate(feature_sizes):
+        rng = np.random.default_rng(slot)
+        X = rng.random((60, num_features))
+        y = np.arange(60) % 3
+        path = str(tmp_path / f"model_{slot}.joblib")
+        joblib.dump(RandomForestClassifier(n_estimators=3, random_state=0).fit(X, y), path)
+        paths[slot] = path
+    return paths
+
+def test_registry_lru_cache(tmp_path):
+    paths = make_models(tmp_path, [64, 64, 128])
+    registry = ModelRegistry(paths, cache_size=2)
+
+    model0 = registry.get(0)
+    # A cached model is returned as is (pointer swap)
+    assert registry.get(0) is model0
+    registry.get(1)
+    registry.get(2)
+    # Slot 0 was the least recently used one
+    assert not registry.is_cached(0)
+    assert registry.is_cached(1) and registry.is_cached(2)
+    assert get_feature_size(registry.get(2)) == 128
+
+    try:
+        registry.get(7)
+        assert False, "Expected an invalid slot error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+
+def test_registry_background_preload(tmp_path):
+    paths = make_models(tmp_path, [64, 64])
+    paths[2] = str(tmp_path / "missing.joblib")
+    registry = ModelRegistry(paths, cache_size=4)
+
+    futures = registry.preload([0, 1])
+    for future in futures:
+        future.result()
+    assert registry.is_cached(0) and registry.is_cached(1)
+    # A failed background load surfaces when the slot is used
+    for future in registry.preload([2]):
+        future.exception()
+    try:
+        registry.get(2)
+        assert False, "Expected a missing model error"
+    except FileNotFoundError as e:
+        print(f"Caught expected error: {e}")
+
+def test_classifier_model_select(tmp_path):
+    paths = make_models(tmp_path, [64, 128])
+    registry = ModelRegistry(paths)
+    classifier = ClassifierBlock(paths[0], registry=registry)
+    reg_map = ClassifierRegMap()
+    reg_map.bind_module_to_register(classifier, "CLASSIFY_MODEL_SELECT")
+
+    fft_block = FftBlock()
+    fft_block.configure(create_fft_config(fft_size_code=5, zero_padding=0, normalization=1, phase_correction=0, phase_sign=0))
+    classifier.bind_fft_block(fft_block)
+
+    # The constructor load is shared with the registry, so selecting slot 0 is a pointer swap
+    model0 = classifier.model
+    reg_map.write_register("CLASSIFY_MODEL_SELECT", 0)
+    assert classifier.model is model0
+    # A 128-feature model does not fit the 64-point FFT, and the current model is kept
+    try:
+        reg_map.write_register("CLASSIFY_MODEL_SELECT", 1)
+        assert False, "Expected a feature size mismatch error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+    assert classifier.model is model0
+    fft_block.configure(create_fft_config(fft_size_code=6, zero_padding=0, normalization=1, phase_correction=0, phase_sign=0))
+    reg_map.write_register("CLASSIFY_MODEL_SELECT", 1)
+    assert classifier.model_slot == 1
+    assert get_feature_size(classifier.model) == 128
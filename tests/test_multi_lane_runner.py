@@ -0,0 +1,87 @@
+# This script tests the multi-lane runner (independent lanes across a process pool)
+import numpy as np
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from hardware_sim.multi_lane_runner import MultiLaneRunner
+from general.helper_functions import create_fft_config, generate_single_tone, generate_noise
+
+def make_lanes(num_lanes, num_frames, fft_size=64):
+    lanes = {}
+    for lane in range(num_lanes):
+        lanes[f"rx{lane}"] = np.array([generate_single_tone(frequency_bin=lane + 1, fft_size=fft_size) if k % 2 == 0 else generate_noise(fft_size)
+                                       for k in range(num_frames)])
+    return lanes
+
+def train_model(path):
+    from sklearn.ensemble import RandomForestClassifier
+    from ml_module.dataset_generator import generate_dataset_batched
+    from model.rf_classifier import export_forest
+    import joblib
+    X, y = generate_dataset_batched(1000, 64, seed=0)
+    clf = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    if path.endswith(".npz"):
+        export_forest(clf, path)
+    else:
+        joblib.dump(clf, path)
+
+def test_multi_lane_fft_only():
+    config = create_fft_config(fft_size_code=5, zero_padding=0, normalization=0, phase_correction=0, phase_sign=0)
+    lanes = make_lanes(3, 10)
+    results = MultiLaneRunner(config, n_workers=2).run(lanes)
+    assert set(results.keys()) == set(lanes.keys())
+    for lane, outputs in results.items():
+        assert len(outputs) == 10
+        assert np.allclose(outputs[0], np.fft.fft(lanes[lane][0]))
+
+def test_multi_lane_shared_model(tmp_path):
+    model_path = str(tmp_path / "model.joblib")
+    train_model(model_path)
+    config = create_fft_config(fft_size_code=5, zero_padding=0, normalization=0, phase_correction=0, phase_sign=0)
+    lanes = make_lanes(4, 20)
+
+    serial = MultiLaneRunner(config, model_path=model_path, n_workers=1)
+    expected = serial.run(lanes)
+    pooled = MultiLaneRunner(config, model_path=model_path, n_workers=2)
+    results = pooled.run(lanes)
+    for lane in lanes:
+        assert np.array_equal(results[lane], expected[lane])
+        assert list(results[lane][:2]) == [0, 2]
+
+    stats = pooled.get_stats()
+    assert set(stats["lanes"].keys()) == set(lanes.keys())
+    assert stats["total"]["frames"] == 80
+    assert stats["total"]["throughput_fps"] > 0
+    if pooled.start_method == "fork":
+        # The lanes ran in the workers, not in the parent
+        assert os.getpid() not in [lane_stats["pid"] for lane_stats in stats["lanes"].values()]
+
+def test_multi_lane_skipped_frames(tmp_path):
+    model_path = str(tmp_path / "model.joblib")
+    train_model(model_path)
+    # Padding behaviour 1: short frames are skipped by the FFT block, not classified again with the previous spectrum
+    config = create_fft_config(fft_size_code=5, zero_padding=1, normalization=0, phase_correction=0, phase_sign=0)
+    frames = [generate_single_tone(frequency_bin=3, fft_size=64), generate_single_tone(frequency_bin=5, fft_size=64)[:20],
+              generate_noise(64)]
+    runner = MultiLaneRunner(config, model_path=model_path, n_workers=1)
+    results = runner.run({"rx0": frames})
+    assert list(results["rx0"]) == [0, 2]
+    stats = runner.get_stats()
+    assert stats["lanes"]["rx0"]["frames"] == 2 and stats["total"]["frames_dropped"] == 1
+    outputs = MultiLaneRunner(config, n_workers=1).run({"rx0": frames})["rx0"]
+    assert len(outputs) == 2 and int(np.argmax(np.abs(outputs[0]))) == 3
+
+def test_multi_lane_spawn_with_capture(tmp_path):
+    # Spawned workers load the (memory mapped) forest once each, lanes can stream captures from disk
+    model_path = str(tmp_path / "model.npz")
+    train_model(model_path)
+    config = create_fft_config(fft_size_code=5, zero_padding=0, normalization=0, phase_correction=0, phase_sign=0)
+    lanes = make_lanes(2, 6)
+    capture_path = str(tmp_path / "rx0.npy")
+    np.save(capture_path, lanes["rx0"].ravel())
+
+    expected = MultiLaneRunner(config, model_path=model_path, n_workers=1).run(lanes)
+    results = MultiLaneRunner(config, model_path=model_path, n_workers=2, start_method="spawn").run({"rx0": capture_path, "rx1": lanes["rx1"]})
+    assert np.array_equal(results["rx0"], expected["rx0"])
+    assert np.array_equal(results["rx1"], expected["rx1"])
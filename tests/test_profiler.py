@@ -0,0 +1,113 @@
+# This script tests the hot-path profiler, its Chrome trace export and the performance registers
+import json
+import numpy as np
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from hardware_sim import profiler
+from hardware_sim.fft_block import FftBlock, FFT_PROFILE_STAGES
+from hardware_sim.buffer import Buffer
+from hardware_sim.register_map import FFtRegisterMap, ClassifierRegMap
+from hardware_sim.classifier_block import ClassifierBlock
+from general.helper_functions import create_fft_config, generate_single_tone
+
+def build_fft():
+    fft_reg_map = FFtRegisterMap()
+    fft_block = FftBlock()
+    fft_block.bind_input_output(Buffer(4096, 4096), Buffer(4096, 4096))
+    fft_block.bind_perf_registers(fft_reg_map.get_register("FFT_PERF_FRAMES"), fft_reg_map.get_register("FFT_PERF_LAST_NS"))
+    fft_reg_map.bind_module_to_register(fft_block, "FFT_START")
+    fft_reg_map.bind_module_to_register(fft_block, "FFT_CONFIG")
+    fft_reg_map.write_register("FFT_CONFIG", create_fft_config(fft_size_code=7, zero_padding=0, normalization=1, phase_correction=512, phase_sign=0))
+    return fft_reg_map, fft_block
+
+def run_frames(fft_reg_map, fft_block, num_frames):
+    for k in range(num_frames):
+        fft_block.input_buffer.writeBuffer(generate_single_tone(frequency_bin=k % 100 + 1, fft_size=256))
+        fft_reg_map.write_register("FFT_START", 1)
+
+def test_profiler_disabled_by_default():
+    assert profiler.active is None
+    fft_reg_map, fft_block = build_fft()
+    run_frames(fft_reg_map, fft_block, 5)
+    # Nothing is recorded and the performance registers stay at 0
+    assert fft_reg_map.read_register("FFT_PERF_FRAMES") == 0
+    assert fft_block.perf_frames == 0
+
+def test_profiler_stages_and_trace(tmp_path):
+    fft_reg_map, fft_block = build_fft()
+    prof = profiler.enable()
+    try:
+        run_frames(fft_reg_map, fft_block, 50)
+    finally:
+        assert profiler.disable() is prof
+    run_frames(fft_reg_map, fft_block, 5) # not recorded any more
+
+    summary = prof.summary()
+    for stage in FFT_PROFILE_STAGES + ("fft.run", "register.FFT_START"):
+        assert summary[stage]["count"] == 50, stage
+    assert summary["fft.run"]["min_us"] <= summary["fft.run"]["p50_us"] <= summary["fft.run"]["max_us"]
+    assert summary["register.FFT_START"]["total_ms"] >= summary["fft.run"]["total_ms"]
+    assert sum(prof.histogram("fft.fft").values()) == 50
+    # Performance registers: frames processed and the last run time
+    assert fft_reg_map.read_register("FFT_PERF_FRAMES") == 50
+    assert 0 < fft_reg_map.read_register("FFT_PERF_LAST_NS") == fft_block.perf_last_ns
+    try:
+        fft_reg_map.write_register("FFT_PERF_FRAMES", 0)
+        assert False, "Expected a read-only error"
+    except PermissionError as e:
+        print(f"Caught expected error: {e}")
+
+    # Chrome trace: one complete event per span
+    path = prof.export_chrome_trace(str(tmp_path / "trace.json"))
+    with open(path) as f:
+        trace = json.load(f)
+    events = trace["traceEvents"]
+    assert len(events) == 50 * (len(FFT_PROFILE_STAGES) + 2)
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+    runs = [event for event in events if event["name"] == "fft.run"]
+    assert runs[0]["args"] == {"frames": 1, "fft_size": 256}
+    assert runs[1]["ts"] >= runs[0]["ts"] + runs[0]["dur"]
+
+def test_profiler_classifier(tmp_path):
+    from sklearn.ensemble import RandomForestClassifier
+    from ml_module.dataset_generator import generate_dataset_batched
+    import joblib
+    X, y = generate_dataset_batched(500, 256, seed=0)
+    model_path = str(tmp_path / "model.joblib")
+    joblib.dump(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y), model_path)
+
+    fft_reg_map, fft_block = build_fft()
+    classifier_reg_map = ClassifierRegMap()
+    classifier = ClassifierBlock(model_path)
+    classifier.bind_input(fft_block.output_buffer)
+    classifier.bind_registers(classifier_reg_map.get_register("CLASSIFY_TRIGGER"), classifier_reg_map.get_register("CLASSIFY_RESULT"),
+                              classifier_reg_map.get_register("CLASSIFY_DONE"))
+    classifier.bind_perf_registers(classifier_reg_map.get_register("CLASSIFY_PERF_FRAMES"), classifier_reg_map.get_register("CLASSIFY_PERF_LAST_NS"))
+    classifier_reg_map.bind_module_to_register(classifier, "CLASSIFY_TRIGGER")
+
+    prof = profiler.enable(trace=False)
+    try:
+        for _ in range(3):
+            run_frames(fft_reg_map, fft_block, 1)
+            classifier_reg_map.write_register("CLASSIFY_TRIGGER", 1)
+    finally:
+        profiler.disable()
+    summary = prof.summary()
+    assert summary["classifier.features"]["count"] == 3
+    assert summary["classifier.predict"]["count"] == 3
+    assert classifier_reg_map.read_register("CLASSIFY_PERF_FRAMES") == 3
+    assert classifier_reg_map.read_register("CLASSIFY_PERF_LAST_NS") > 0
+    # Without tracing only the counters are kept
+    assert prof.chrome_trace()["traceEvents"] == []
+
+def test_profiler_keeps_newest_spans():
+    prof = profiler.Profiler(max_events=3)
+    for k in range(5):
+        prof.record(f"stage{k}", 1000 * k, 1000 * k + 10)
+    # The trace holds the end of the run, the oldest spans were dropped
+    trace = prof.chrome_trace()
+    assert [event["name"] for event in trace["traceEvents"]] == ["stage2", "stage3", "stage4"]
+    assert trace["otherData"]["dropped_events"] == 2
+    assert prof.summary()["stage0"]["count"] == 1
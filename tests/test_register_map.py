@@ -50,6 +50,52 @@ def test_register_read_write():
         print(f"Caught expected error: {e}")
     print("All tests passed!")
 
+def test_register_dispatch_and_addresses():
+    """
+    Test the compiled handler dispatch and the address-indexed access.
+    """
+    class Module:
+        def __init__(self):
+            self.calls = []
+        def handle_FFT_START(self, value):
+            self.calls.append(("FFT_START", value))
+        def update(self, name, value):
+            self.calls.append(("update", name, value))
+
+    fft_register = FFtRegisterMap()
+    module = Module()
+    fft_register.bind_module_to_register(module, "FFT_START")
+    fft_register.bind_module_to_register(module, "FFT_CONFIG")
+    # Handlers are resolved at bind time
+    assert fft_register.dispatch["FFT_START"].handler == module.handle_FFT_START
+
+    fft_register.write_register("FFT_START", 1)
+    fft_register.write_register("FFT_CONFIG", 5)
+    assert module.calls == [("FFT_START", 1), ("update", "FFT_CONFIG", 5)]
+
+    # Address-indexed access goes through the same registers and handlers
+    fft_register.write_address(0x0A, 7)
+    assert fft_register.read_register("FFT_CONFIG") == 7
+    assert fft_register.read_address(0x0A) == 7
+    assert module.calls[-1] == ("update", "FFT_CONFIG", 7)
+    try:
+        fft_register.write_address(0x01, 1)
+        assert False, "FFT_DONE is read-only"
+    except PermissionError as e:
+        print(f"Caught expected error: {e}")
+    # 0x03 is inside FFT_DATA_IN, not a register base address
+    try:
+        fft_register.read_address(0x03)
+        assert False, "Expected a missing register error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+    try:
+        fft_register.write_address(0x0E + 0x100, 1)
+        assert False, "Expected a missing register error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+
 if __name__ == "__main__":
     test_register_read_write()
+    test_register_dispatch_and_addresses()
     print("Test completed.")
\ No newline at end of file
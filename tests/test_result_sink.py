@@ -0,0 +1,93 @@
+# This script tests the result sink (append-only columnar log of the classifier results) and its reader
+import numpy as np
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from hardware_sim.result_sink import ResultSink, ResultReader
+from hardware_sim.fft_block import FftBlock
+from hardware_sim.buffer import Buffer
+from hardware_sim.register_map import FFtRegisterMap, ClassifierRegMap
+from hardware_sim.classifier_block import ClassifierBlock
+from general.helper_functions import create_fft_config, generate_single_tone, generate_noise
+
+def test_result_sink_segments(tmp_path):
+    directory = str(tmp_path / "results")
+    sink = ResultSink(directory, chunk_size=100, num_classes=3)
+    columns = sink.columns
+    frame = 0
+    # Batches of every size, across the chunk boundaries
+    for batch in [1, 7, 99, 250, 3, 190]:
+        frames = np.arange(frame, frame + batch)
+        probabilities = np.random.default_rng(frame).random((batch, 3))
+        sink.append_batch(frames, frames % 3, timestamp=frame * 1e-3, fft_config=0x205, model_id=1, probabilities=probabilities)
+        frame += batch
+    sink.append(frame, 2, timestamp=1.0, probabilities=[0.1, 0.2, 0.7])
+    assert len(sink) == 551 and sink.segments_written == 5
+    # The chunk arrays are reused, not reallocated
+    assert sink.columns is columns and all(column is columns[name] for name, column in sink.columns.items())
+    sink.close()
+    assert sink.segments_written == 6
+
+    reader = ResultReader(directory)
+    assert len(reader) == 551 and len(reader.segment_paths) == 6
+    assert np.array_equal(reader.column("frame"), np.arange(551))
+    assert np.array_equal(reader.column("label"), np.append(np.arange(550) % 3, 2))
+    assert reader.column("probabilities").shape == (551, 3)
+    assert np.allclose(reader.column("probabilities")[-1], [0.1, 0.2, 0.7])
+    assert list(reader.column("model_id")[-2:]) == [1, -1]
+    assert reader.column("fft_config")[0] == 0x205
+    # Segments are memory mapped, not read
+    segment = next(reader.segments())
+    assert isinstance(segment["frame"].base, np.memmap)
+    try:
+        sink.append(0, 0, 0.0, probabilities=[1, 0, 0])
+        assert False, "Expected a closed sink error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+
+    # A new sink on the same directory appends after the existing segments
+    with ResultSink(directory, chunk_size=100) as sink2:
+        sink2.append_batch([551, 552], [0, 1], timestamp=2.0)
+    assert len(ResultReader(directory).segment_paths) == 7
+
+def test_classifier_result_sink(tmp_path):
+    from sklearn.ensemble import RandomForestClassifier
+    from ml_module.dataset_generator import generate_dataset_batched
+    import joblib
+    fft_size = 64
+    X, y = generate_dataset_batched(600, fft_size, seed=0)
+    model_path = str(tmp_path / "model.joblib")
+    joblib.dump(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y), model_path)
+
+    fft_reg_map = FFtRegisterMap()
+    fft_block = FftBlock()
+    fft_block.bind_input_output(Buffer(4096, 4096), Buffer(4096, 4096))
+    fft_reg_map.bind_module_to_register(fft_block, "FFT_START")
+    fft_reg_map.bind_module_to_register(fft_block, "FFT_CONFIG")
+    config = create_fft_config(fft_size_code=5, zero_padding=0, normalization=0, phase_correction=0, phase_sign=0)
+    fft_reg_map.write_register("FFT_CONFIG", config)
+
+    classifier_reg_map = ClassifierRegMap()
+    classifier = ClassifierBlock(model_path)
+    classifier.bind_input(fft_block.output_buffer)
+    classifier.bind_fft_block(fft_block)
+    classifier.bind_registers(classifier_reg_map.get_register("CLASSIFY_TRIGGER"), classifier_reg_map.get_register("CLASSIFY_RESULT"))
+    classifier_reg_map.bind_module_to_register(classifier, "CLASSIFY_TRIGGER")
+    sink = ResultSink(str(tmp_path / "log"), chunk_size=16, num_classes=len(classifier.model.classes_))
+    classifier.bind_result_sink(sink)
+
+    registers = []
+    for k in range(40):
+        fft_block.input_buffer.writeBuffer(generate_single_tone(frequency_bin=5, fft_size=fft_size) if k % 2 == 0 else generate_noise(fft_size))
+        fft_reg_map.write_register("FFT_START", 1)
+        classifier_reg_map.write_register("CLASSIFY_TRIGGER", 1)
+        registers.append(classifier_reg_map.read_register("CLASSIFY_RESULT"))
+    sink.close()
+
+    reader = ResultReader(str(tmp_path / "log"))
+    assert list(reader.column("label")) == registers
+    assert list(reader.column("frame")) == list(range(40))
+    assert np.all(np.diff(reader.column("timestamp")) >= 0)
+    assert np.all(reader.column("fft_config") == config)
+    assert np.allclose(reader.column("probabilities").sum(axis=1), 1.0)
@@ -0,0 +1,71 @@
+# This script tests the array-backed RandomForest inference engine
+import numpy as np
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from types import SimpleNamespace
+from model.rf_classifier import ArrayForest, export_forest, load_forest, flatten_forest
+from hardware_sim.classifier_block import ClassifierBlock
+from hardware_sim.model_registry import ModelRegistry
+
+def train_forest(seed=0):
+    from sklearn.ensemble import RandomForestClassifier
+    from ml_module.dataset_generator import generate_dataset_batched
+    X, y = generate_dataset_batched(1500, 64, seed=seed)
+    return RandomForestClassifier(n_estimators=30, random_state=seed).fit(X[:1000], y[:1000]), X[1000:]
+
+def test_array_forest_matches_sklearn(tmp_path):
+    clf, X_test = train_forest()
+    path = export_forest(clf, str(tmp_path / "forest.npz"))
+
+    forest = load_forest(path)
+    # The node arrays are memory mapped, not unpickled
+    assert isinstance(forest.threshold.base, np.memmap)
+    assert forest.n_features_in_ == 64 and forest.n_estimators == 30
+    assert np.array_equal(forest.classes_, clf.classes_)
+    # Exactly the same probabilities and labels, for batches and single frames
+    assert np.array_equal(forest.predict_proba(X_test), clf.predict_proba(X_test))
+    assert np.array_equal(forest.predict(X_test), clf.predict(X_test))
+    assert np.array_equal(forest.apply(X_test) - forest.roots, clf.apply(X_test))
+    for row in X_test[:20]:
+        assert forest.predict(row)[0] == clf.predict(row.reshape(1, -1))[0]
+    # Same result without memory mapping and from the in-memory conversion
+    assert np.array_equal(load_forest(path, mmap=False).predict_proba(X_test), clf.predict_proba(X_test))
+    assert np.array_equal(ArrayForest.from_sklearn(clf).predict(X_test), clf.predict(X_test))
+
+    try:
+        forest.predict(X_test[:, :32])
+        assert False, "Expected a feature count error"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+
+def test_classifier_block_with_array_forest(tmp_path):
+    clf, X_test = train_forest(seed=1)
+    path = export_forest(clf, str(tmp_path / "forest.npz"))
+    registry = ModelRegistry(model_paths={0: path})
+
+    classifier = ClassifierBlock(path, registry=registry)
+    assert isinstance(classifier.model, ArrayForest)
+    assert classifier.classify(X_test[0]) == clf.predict(X_test[:1])[0]
+    assert np.array_equal(classifier.classify(X_test[:50]), clf.predict(X_test[:50]))
+    # Registry slots accept exported forests as well
+    assert registry.get(0) is classifier.model
+
+def test_flatten_forest_normalizes_counts():
+    clf, X_test = train_forest(seed=2)
+    expected = flatten_forest(clf)["value"]
+    # sklearn < 1.4 layout: the nodes hold weighted class counts instead of fractions
+    trees = []
+    for estimator in clf.estimators_:
+        tree = estimator.tree_
+        counts = tree.value * tree.weighted_n_node_samples[:, None, None]
+        trees.append(SimpleNamespace(tree_=SimpleNamespace(node_count=tree.node_count, children_left=tree.children_left,
+                                                           children_right=tree.children_right, feature=tree.feature,
+                                                           threshold=tree.threshold, value=counts, max_depth=tree.max_depth)))
+    legacy = SimpleNamespace(estimators_=trees, n_outputs_=1, classes_=clf.classes_, n_features_in_=clf.n_features_in_)
+    value = flatten_forest(legacy)["value"]
+    assert np.allclose(value, expected)
+    assert np.allclose(value.sum(axis=1), 1)
+    assert np.array_equal(ArrayForest(flatten_forest(legacy)).predict(X_test), clf.predict(X_test))
+
@@ -0,0 +1,51 @@
+# This script tests that the simulator starts fast: no heavy imports or model loads before they are needed
+import subprocess
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from hardware_sim.classifier_block import ClassifierBlock
+from hardware_sim.model_registry import ModelRegistry
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def test_imports_stay_light():
+    # Fresh interpreter, so nothing is imported yet
+    code = ("import sys\n"
+            f"sys.path.insert(0, {ROOT!r})\n"
+            "import hardware_sim.classifier_block, hardware_sim.multi_lane_runner, hardware_sim.system_runner, interface.cli_controller\n"
+            "import ml_module.dataset_cache, ml_module.incremental_trainer\n"
+            "print(sorted(name for name in ('joblib', 'sklearn') if name in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    assert output.strip() == "[]"
+
+def test_classifier_model_deferred(tmp_path):
+    from sklearn.ensemble import RandomForestClassifier
+    from ml_module.dataset_generator import generate_dataset_batched
+    import joblib
+    X, y = generate_dataset_batched(300, 64, seed=0)
+    model_path = str(tmp_path / "model.joblib")
+    joblib.dump(RandomForestClassifier(n_estimators=3, random_state=0).fit(X, y), model_path)
+
+    registry = ModelRegistry()
+    classifier = ClassifierBlock(model_path, registry=registry)
+    assert not classifier.is_model_loaded() and len(registry.cache) == 0
+    # Loaded by the first prediction, then cached
+    label = classifier.classify(X[0])
+    assert label == y[0]
+    assert classifier.is_model_loaded() and registry.load_path(model_path) is classifier.model
+
+    # A bad path still fails at construction
+    try:
+        ClassifierBlock(str(tmp_path / "missing.joblib"))
+        assert False, "Expected a missing model error"
+    except FileNotFoundError as e:
+        print(f"Caught expected error: {e}")
+
+if __name__ == "__main__":
+    test_imports_stay_light()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_classifier_model_deferred(Path(tmp))
+    print("All tests passed!")
@@ -0,0 +1,52 @@
+# This script tests the hyperparameter / FFT size sweep and its latency/accuracy Pareto report
+import numpy as np
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ml_module.sweep import build_grid, run_sweep, pareto_front, select_models, write_slot_models
+from hardware_sim.model_registry import ModelRegistry, DEFAULT_MODEL_PATHS, get_feature_size
+
+def test_pareto_front():
+    results = [{"name": "a", "frame_latency_us": 10, "accuracy": 0.80},
+               {"name": "b", "frame_latency_us": 20, "accuracy": 0.90},
+               {"name": "c", "frame_latency_us": 30, "accuracy": 0.85}, # slower and less accurate than b
+               {"name": "d", "frame_latency_us": 10, "accuracy": 0.70}, # as fast as a, less accurate
+               {"name": "e", "frame_latency_us": 50, "accuracy": 0.95}]
+    assert [r["name"] for r in pareto_front(results)] == ["a", "b", "e"]
+
+def test_sweep(tmp_path):
+    grid = build_grid([64, 128], [2, 6], [None, 3])
+    assert len(grid) == 8
+    report = run_sweep(grid, num_samples=600, seed=0, n_jobs=2, output_dir=str(tmp_path / "sweep"), cache_dir=str(tmp_path / "cache"))
+    results = {r["name"]: r for r in report["results"]}
+    assert len(results) == 8
+    for r in results.values():
+        assert 0 <= r["accuracy"] <= 1 and r["frame_latency_us"] > 0 and r["batch_latency_us"] > 0
+        assert os.path.isfile(r["model_path"]) and os.path.isfile(r["forest_path"])
+    # No result on the front is beaten on both latency and accuracy
+    front = [results[name] for name in report["pareto_front"]]
+    for r in front:
+        assert not any(o["frame_latency_us"] < r["frame_latency_us"] and o["accuracy"] > r["accuracy"] for o in results.values())
+
+    # Latency budget: the most accurate model of each FFT size within it, the fastest when none fits
+    fastest64 = min((r for r in results.values() if r["fft_size"] == 64), key=lambda r: r["frame_latency_us"])
+    selection = select_models(list(results.values()), latency_budget_us=0)
+    assert set(selection.keys()) == {0, 2} and selection[0] is fastest64
+    selection = select_models(list(results.values()))
+    assert selection[2]["accuracy"] == max(r["accuracy"] for r in results.values() if r["fft_size"] == 128)
+
+    # Slot artifacts, loadable by the registry with the FFT size of their slot
+    paths = write_slot_models(selection, slot_dir=str(tmp_path / "slots"))
+    registry = ModelRegistry({slot: path for slot, path in paths.items()})
+    assert paths[2].endswith(os.path.basename(DEFAULT_MODEL_PATHS[2]))
+    assert get_feature_size(registry.get(0)) == 64 and get_feature_size(registry.get(2)) == 128
+    assert os.path.isfile(os.path.splitext(paths[2])[0] + ".npz")
+
+if __name__ == "__main__":
+    test_pareto_front()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_sweep(Path(tmp))
+    print("All tests passed!")
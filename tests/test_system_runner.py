@@ -0,0 +1,91 @@
+# This script tests the pipelined system runner
+import numpy as np
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from hardware_sim.fft_block import FftBlock
+from hardware_sim.buffer import Buffer
+from hardware_sim.register_map import FFtRegisterMap, ClassifierRegMap
+from hardware_sim.classifier_block import ClassifierBlock
+from hardware_sim.system_runner import SystemRunner
+from general.helper_functions import create_fft_config, generate_single_tone, generate_noise
+
+def build_fft_system(fft_size_code=5):
+    register_map = FFtRegisterMap()
+    fft_block = FftBlock()
+    fft_block.bind_input_output(Buffer(4096, 4096), Buffer(4096, 4096))
+    register_map.bind_module_to_register(fft_block, "FFT_START")
+    register_map.bind_module_to_register(fft_block, "FFT_CONFIG")
+    register_map.write_register("FFT_CONFIG", create_fft_config(fft_size_code=fft_size_code, zero_padding=0, normalization=1, phase_correction=0, phase_sign=0))
+    return register_map, fft_block
+
+def test_system_runner_fft_only():
+    register_map, fft_block = build_fft_system()
+    frames = [generate_single_tone(frequency_bin=k % 31 + 1, fft_size=64) for k in range(100)]
+
+    runner = SystemRunner(fft_block, register_map, queue_depth=4)
+    results = runner.run(frames)
+
+    # Results come back in order, one spectrum per frame
+    assert len(results) == 100
+    assert [int(np.argmax(np.abs(r))) for r in results] == [k % 31 + 1 for k in range(100)]
+    stats = runner.get_stats()
+    assert set(stats.keys()) == {"input", "fft", "features"}
+    assert stats["fft"]["frames"] == 100
+    assert stats["fft"]["max_queue_depth"] <= 4
+    assert stats["fft"]["throughput_fps"] > 0
+
+def test_system_runner_skipped_frame():
+    register_map, fft_block = build_fft_system()
+    # Padding behaviour 1: a short frame is skipped instead of padded
+    register_map.write_register("FFT_CONFIG", create_fft_config(fft_size_code=5, zero_padding=1, normalization=1, phase_correction=0, phase_sign=0))
+    frames = [generate_single_tone(frequency_bin=3, fft_size=64), generate_single_tone(frequency_bin=5, fft_size=64)[:20],
+              generate_single_tone(frequency_bin=7, fft_size=64)]
+    results = SystemRunner(fft_block, register_map, queue_depth=2).run(frames)
+    # The previous spectrum is not passed on again for the skipped frame
+    assert [int(np.argmax(np.abs(r))) for r in results] == [3, 7]
+
+def test_system_runner_with_classifier(tmp_path):
+    from sklearn.ensemble import RandomForestClassifier
+    from ml_module.dataset_generator import generate_dataset
+    import joblib
+
+    np.random.seed(0)
+    X, y = generate_dataset(600, 64)
+    model_path = str(tmp_path / "model.joblib")
+    joblib.dump(RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y), model_path)
+
+    register_map, fft_block = build_fft_system()
+    classifier_reg_map = ClassifierRegMap()
+    classifier = ClassifierBlock(model_path)
+    classifier.bind_registers(classifier_reg_map.get_register("CLASSIFY_TRIGGER"), classifier_reg_map.get_register("CLASSIFY_RESULT"),
+                              classifier_reg_map.get_register("CLASSIFY_DONE"))
+
+    frames = [generate_single_tone(frequency_bin=5, fft_size=64) if k % 2 == 0 else generate_noise(64) for k in range(40)]
+    runner = SystemRunner(fft_block, register_map, classifier_block=classifier, queue_depth=2)
+    labels = runner.run(frames)
+
+    assert len(labels) == 40
+    assert set(int(label) for label in labels).issubset({0, 1, 2})
+    # The result registers hold the last frame's label
+    assert classifier_reg_map.read_register("CLASSIFY_RESULT") == labels[-1]
+    assert classifier_reg_map.read_register("CLASSIFY_DONE") == 1
+    assert runner.get_stats()["classify"]["frames"] == 40
+
+def test_system_runner_error():
+    register_map, fft_block = build_fft_system()
+    # A short frame with padding behaviour 0 makes the FFT stage fail
+    frames = [generate_single_tone(frequency_bin=3, fft_size=64)] * 20 + [np.zeros(10)] + [generate_single_tone(frequency_bin=3, fft_size=64)] * 20
+    runner = SystemRunner(fft_block, register_map, queue_depth=2)
+    try:
+        runner.run(frames)
+        assert False, "Expected the FFT stage error to propagate"
+    except ValueError as e:
+        print(f"Caught expected error: {e}")
+
+if __name__ == "__main__":
+    test_system_runner_fft_only()
+    test_system_runner_skipped_frame()
+    test_system_runner_error()
+    print("All tests passed!")